@@ -0,0 +1,79 @@
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from gui import compression, jsonstream
+
+
+def make_document(choices, criteria, continuous, seed=0):
+    # Same shape as IO._write's output: integer ratings with some gaps,
+    # a few continuous criteria with value/score pairs and raw data
+    rng = np.random.default_rng(seed)
+    names = [f'criterion {j}' for j in range(criteria)]
+    index = ['Weight'] + [f'choice {i}' for i in range(choices)]
+    values = rng.integers(0, 11, size=(choices + 1, criteria)).astype(float)
+    values[rng.random(values.shape) < 0.05] = np.nan
+    matrix = pd.DataFrame(values, index=index, columns=names)
+    matrix['Percentage'] = np.concatenate([[np.nan], rng.random(choices) * 100])
+
+    cc = names[:continuous]
+    value_score_df = pd.DataFrame({
+        column: series
+        for criterion in cc
+        for column, series in (
+            (criterion, np.linspace(0, 1000, 5)),
+            (criterion + '_score', np.linspace(10, 0, 5)),
+        )
+    })
+    data_df = pd.DataFrame(rng.random((choices, continuous)) * 1000, index=index[1:], columns=cc)
+    return {
+        'matrix': matrix.to_dict(),
+        'value_score_df': value_score_df.to_dict(),
+        'data_df': data_df.to_dict(orient='index'),
+    }
+
+
+def bench(codec, data, directory):
+    path = Path(directory) / ('matrix' + codec.suffix)
+    start = time.perf_counter()
+    with codec.open_text(path, 'w') as f:
+        f.writelines(json.JSONEncoder(indent=2).iterencode(data))
+    write = time.perf_counter() - start
+
+    start = time.perf_counter()
+    jsonstream.read_document(lambda: compression.open_text(path, 'r'))
+    read = time.perf_counter() - start
+    return path.stat().st_size, write, read
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.bench_codecs',
+        description='Size and speed of each save file codec',
+    )
+    parser.add_argument('--choices', type=int, default=10_000)
+    parser.add_argument('--criteria', type=int, default=20)
+    parser.add_argument('--continuous', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    data = make_document(args.choices, args.criteria, args.continuous)
+    print(f'{args.choices} choices x {args.criteria} criteria ({args.continuous} continuous)')
+    print(f'{"codec":<6} {"size (MB)":>10} {"ratio":>6} {"write (s)":>10} {"read (s)":>9}')
+    with tempfile.TemporaryDirectory() as directory:
+        plain = None
+        for codec in compression.CODECS.values():
+            if not codec.available:
+                print(f'{codec.name:<6} not installed')
+                continue
+            size, write, read = bench(codec, data, directory)
+            plain = plain or size
+            print(f'{codec.name:<6} {size / 1e6:>10.2f} {plain / size:>6.1f} {write:>10.2f} {read:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
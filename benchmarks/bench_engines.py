@@ -0,0 +1,60 @@
+import argparse
+import time
+
+import numpy as np
+
+from gui import engines
+
+
+def per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.bench_engines',
+        description='Cost of a full score and of one edit for each scoring engine',
+    )
+    parser.add_argument('--choices', type=int, default=100_000)
+    parser.add_argument('--criteria', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    ratings = rng.integers(0, 11, size=(args.choices, args.criteria)).astype(float)
+    weights = rng.integers(1, 10, size=args.criteria).astype(float)
+    rows = rng.integers(args.choices, size=args.repeat)
+    columns = rng.integers(args.criteria, size=args.repeat)
+
+    print(f'{args.choices} choices x {args.criteria} criteria')
+    print(f'{"engine":<17} {"full (ms)":>10} {"rating edit (ms)":>17} {"weight edit (ms)":>17}')
+    for name, Engine in engines.ENGINES.items():
+        engine = Engine()
+        full = per_call(lambda: engine.score(weights, ratings), max(args.repeat // 10, 1))
+
+        edits = iter(zip(rows, columns))
+
+        def rating_edit():
+            row, column = next(edits)
+            old = ratings[row, column]
+            ratings[row, column] = 10 - old
+            engine.rating_changed(weights, ratings, row, column, old)
+        rating = per_call(rating_edit, args.repeat)
+
+        edits = iter(columns)
+
+        def weight_edit():
+            column = next(edits)
+            old = weights[column]
+            weights[column] = 10 - old
+            engine.weight_changed(weights, ratings, column, old)
+        weight = per_call(weight_edit, args.repeat)
+
+        print(f'{name:<17} {full * 1000:>10.2f} {rating * 1000:>17.3f} {weight * 1000:>17.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.bench_codecs import make_document
+from gui import jsonstream
+
+
+def json_load(path):
+    # How IO.open_ read a save file before gui.jsonstream
+    with open(path) as f:
+        data = json.load(f)
+    return (
+        pd.DataFrame.from_dict(data['matrix']),
+        pd.DataFrame.from_dict(data['value_score_df']),
+        pd.DataFrame.from_dict(data['data_df'], orient='index'),
+    )
+
+
+def stream(path):
+    # The document's arrays are what IO.load takes
+    return jsonstream.read_document(lambda: open(path))
+
+
+def measure(read, path, repeat):
+    # (best seconds, peak bytes allocated while reading, bytes the result
+    # keeps: its arrays and its names)
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        read(path)
+        seconds.append(time.perf_counter() - start)
+    tracemalloc.start()
+    result = read(path)
+    kept, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return min(seconds), peak, kept
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.bench_jsonstream',
+        description='Time and peak memory of reading a legacy save file',
+    )
+    parser.add_argument('--choices', type=int, default=5_000)
+    parser.add_argument('--criteria', type=int, default=20)
+    parser.add_argument('--continuous', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    data = make_document(args.choices, args.criteria, args.continuous)
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'matrix.json'
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+        del data
+        size = path.stat().st_size
+        arrays = 8 * (args.choices + 1) * (args.criteria + 1 + args.continuous)
+        print(f'{args.choices} choices x {args.criteria} criteria, {size / 1e6:.2f} MB file, '
+              f'{arrays / 1e6:.2f} MB of arrays')
+        print(f'{"reader":<10} {"time (s)":>9} {"peak (MB)":>10} {"kept (MB)":>10}')
+        for name, read in (('json.load', json_load), ('stream', stream)):
+            seconds, peak, kept = measure(read, path, args.repeat)
+            print(f'{name:<10} {seconds:>9.3f} {peak / 1e6:>10.2f} {kept / 1e6:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
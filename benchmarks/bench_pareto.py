@@ -0,0 +1,52 @@
+import argparse
+import time
+
+import numpy as np
+
+from gui import pareto
+
+
+def per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.bench_pareto',
+        description='Cost of finding the Pareto front and of keeping it up to date after an edit',
+    )
+    parser.add_argument('--choices', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    print(f'{args.choices} choices')
+    print(f'{"criteria":<14} {"front":>6} {"build (ms)":>11} {"edit mean (ms)":>15} {"edit max (ms)":>14}')
+    for criteria, integer in ((2, True), (3, True), (5, True), (3, False), (5, False), (8, False)):
+        if integer:
+            ratings = rng.integers(0, 11, size=(args.choices, criteria)).astype(float)
+        else:
+            ratings = rng.random((args.choices, criteria)) * 10
+        start = time.perf_counter()
+        front = pareto.ParetoFront(ratings)
+        build = time.perf_counter() - start
+        size = front.front.sum()
+
+        # One rating of a choice set to the best or the worst there is, as
+        # an edit in the table would; half of them are front choices
+        times = []
+        for i in range(args.repeat):
+            row = rng.choice(np.flatnonzero(front.front)) if i % 2 else rng.integers(args.choices)
+            column = rng.integers(criteria)
+            ratings[row, column] = ratings[:, column].max() if rng.random() < 0.5 else ratings[:, column].min()
+            times.append(per_call(lambda: front.rating_changed(row, ratings[row]), 1))
+        kind = 'integer' if integer else 'float'
+        print(f'{criteria} {kind:<12} {size:>6} {build * 1000:>11.1f} '
+              f'{np.mean(times) * 1000:>15.2f} {np.max(times) * 1000:>14.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_codecs import make_document
+from gui import parsing
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.bench_parsing',
+        description='Time to parse several saved matrices, one after another or side by side',
+    )
+    parser.add_argument('--files', type=int, default=5)
+    parser.add_argument('--choices', type=int, default=50_000)
+    parser.add_argument('--criteria', type=int, default=20)
+    parser.add_argument('--continuous', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i in range(args.files):
+            path = Path(directory) / f'matrix {i}.json'
+            with open(path, 'w') as f:
+                json.dump(make_document(args.choices, args.criteria, args.continuous, seed=i), f, indent=2)
+            paths.append(str(path))
+
+        # Processes only help with as many CPUs as files
+        print(f'{args.files} files of {args.choices} choices x {args.criteria} criteria, '
+              f'{os.cpu_count()} CPUs')
+        serial = timed(lambda: [parsing.read(path) for path in paths])
+
+        def threads():
+            with ThreadPoolExecutor(args.workers) as pool:
+                list(pool.map(parsing.read, paths))
+
+        pool = parsing.Parsers(args.workers)
+        rows = [
+            ('serial', serial),
+            ('threads', timed(threads)),
+            # The first call spawns the workers
+            ('processes', timed(lambda: pool.read_all(paths))),
+            ('processes, warm', timed(lambda: pool.read_all(paths))),
+        ]
+        pool.shutdown()
+
+        print(f'{"reader":<16} {"time (s)":>9} {"speedup":>8}')
+        for name, seconds in rows:
+            print(f'{name:<16} {seconds:>9.2f} {serial / seconds:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
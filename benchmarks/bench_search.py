@@ -0,0 +1,53 @@
+import argparse
+import random
+import time
+
+from gui import search
+
+
+WORDS = [
+    'apple', 'orange', 'pear', 'plum', 'grape', 'melon', 'kiwi', 'lemon', 'cherry', 'peach',
+    'mango', 'lime', 'fig', 'date', 'quince', 'guava',
+]
+QUERIES = ['a', 'man', 'Mango', 'pear 12', 'ach 9', 'e f', 'lime lemon 7', '123456', 'zzz']
+
+
+def per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.bench_search',
+        description='Cost of building the name index, of editing it and of a search',
+    )
+    parser.add_argument('--names', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    random.seed(0)
+    names = [
+        ('choice', f'{random.choice(WORDS)} {random.choice(WORDS)} {i}') for i in range(args.names)
+    ]
+    start = time.perf_counter()
+    index = search.NameSearch(names)
+    print(f'{args.names} names, built in {time.perf_counter() - start:.2f} s')
+
+    added = iter(range(args.repeat))
+    add = per_call(lambda: index.add('criterion', f'{random.choice(WORDS)} new {next(added)}'), args.repeat)
+    removed = iter(random.sample(names, args.repeat))
+    remove = per_call(lambda: index.remove(*next(removed)), args.repeat)
+    print(f'add {add * 1000:.3f} ms, remove {remove * 1000:.3f} ms')
+
+    print(f'{"query":<14} {"found":>6} {"search (ms)":>12}')
+    for text in QUERIES:
+        found = len(index.search(text))
+        took = per_call(lambda: index.search(text), max(args.repeat // 10, 1))
+        print(f'{text!r:<14} {found:>6} {took * 1000:>12.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,25 @@
+import logging
+import os
 import sys
 
-from PySide2.QtWidgets import QApplication, QMainWindow
+from PySide2.QtWidgets import QApplication
 
-from gui import main
+from gui.documents import DocumentTabs
+from gui.watchdog import StallWatchdog, matrix_dimensions
 
 
+logging.basicConfig()
+
 app = QApplication(sys.argv)
-MainWindow = QMainWindow()
-ui = main.Ui_MainWindow()
-ui.setupUi(MainWindow)
-MainWindow.show()
+documents = DocumentTabs()
+documents.new_document()
+documents.show()
+# Files named on the command line are parsed in worker processes, one tab each
+documents.open_files(app.arguments()[1:])
+
+# Log the main thread's stack whenever the event loop is stuck this long; 0 disables
+if (stall_ms := int(os.environ.get('DECISION_MATRIX_STALL_MS', 500))):
+    watchdog = StallWatchdog(stall_ms, lambda: matrix_dimensions(documents.current))
+    watchdog.start()
+
 sys.exit(app.exec_())
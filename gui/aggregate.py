@@ -0,0 +1,102 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from gui import scoring
+
+
+def union(names_lists):
+    # First-seen order, like pd.Index.union without the sorting
+    return list(dict.fromkeys(name for names in names_lists for name in names))
+
+
+def align(documents):
+    # -> choices, criteria, stack of shape (matrices, 1 + choices, criteria);
+    # row 0 holds the weights, NaN wherever a matrix lacks a choice or criterion
+    choices = union(document.choices for document in documents)
+    criteria = union(document.criteria for document in documents)
+    choice_index = pd.Index(choices)
+    criterion_index = pd.Index(criteria)
+
+    stack = np.full((len(documents), len(choices) + 1, len(criteria)), np.nan)
+    for k, document in enumerate(documents):
+        rows = choice_index.get_indexer(document.choices) + 1
+        columns = criterion_index.get_indexer(document.criteria)
+        stack[k, 0, columns] = document.weights
+        stack[k, rows[:, None], columns] = document.ratings
+    return choices, criteria, stack
+
+
+def geometric_mean(stack, axis=0):
+    # Zero ratings give zero; negative ones have no geometric mean
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.exp(np.nanmean(np.log(stack), axis=axis))
+
+
+METHODS = {
+    'Mean': np.nanmean,
+    'Median': np.nanmedian,
+    'Geometric mean': geometric_mean,
+}
+
+
+class Aggregate:
+    # Has the attributes IO.load reads, so it can be opened like a file
+    def __init__(self, choices, criteria, stack, method='Mean'):
+        self.choices = choices
+        self.criteria = criteria
+        self.method = method
+        self.continuous_criteria = []
+
+        # Each matrix scored with its own weights: (matrices, choices),
+        # NaN where a matrix does not rate the choice at all
+        rated = ~np.isnan(stack[:, 1:]).all(axis=-1)
+        self.percentages = np.where(
+            rated, scoring.percentages(stack[:, None, 0], stack[:, 1:]), np.nan
+        )
+
+        # All-NaN slices are expected wherever the matrices do not overlap
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            combined = METHODS[method](stack, axis=0)
+            self.spread = np.nanstd(self.percentages, axis=0)
+            self.lowest = np.nanmin(self.percentages, axis=0)
+            self.highest = np.nanmax(self.percentages, axis=0)
+        self.weights = combined[0]
+        self.ratings = combined[1:]
+
+    def value_score_frame(self):
+        return pd.DataFrame()
+
+    def data_frame(self):
+        return pd.DataFrame()
+
+    def scenarios(self):
+        return {}
+
+    def derived(self):
+        return {}
+
+    def constraints(self):
+        return {}
+
+    def summary(self, top=10):
+        # Most disputed choices first
+        order = np.argsort(-np.nan_to_num(self.spread, nan=-1), kind='stable')
+        lines = [
+            f'{len(self.percentages)} matrices, {len(self.choices)} choices, '
+            f'{len(self.criteria)} criteria; {self.method.lower()} of each cell',
+            '',
+            'Largest disagreement (standard deviation of the percentages):',
+        ]
+        lines += [
+            f'{self.choices[i]}: {self.spread[i]:.2f} '
+            f'({self.lowest[i]:.2f}% to {self.highest[i]:.2f}%)'
+            for i in order[:top]
+        ]
+        return '\n'.join(lines)
+
+
+def aggregate(documents, method='Mean'):
+    return Aggregate(*align(documents), method)
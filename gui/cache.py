@@ -0,0 +1,104 @@
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+
+
+def matrix_key(matrix):
+    # Stable across runs and processes: names, shapes and the float64 bytes of
+    # every array that scoring reads, plus the engine
+    digest = hashlib.blake2b(digest_size=20)
+
+    def names(values):
+        digest.update('\0'.join(map(str, values)).encode() + b'\1')
+
+    def array(values):
+        values = np.ascontiguousarray(values, dtype=np.float64)
+        # Every NaN the same bits, whatever produced it
+        values = np.where(np.isnan(values), np.nan, values)
+        digest.update(str(values.shape).encode() + values.tobytes())
+
+    names([matrix.engine.name])
+    names(matrix.choices)
+    names(matrix.all_criteria)
+    names(matrix.continuous_criteria)
+    array(matrix.weights)
+    array(matrix.ratings)
+    for frame in (matrix.value_score_df, matrix.data_df):
+        names(frame.index)
+        names(frame.columns)
+        array(frame.to_numpy(dtype=float))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    # Percentages and ranking per matrix key, one small .npz file each.
+    # A file's modification time is its last use; the least recently used
+    # files go first once the directory is over max_bytes.
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def path(self, key):
+        return self.directory / f'{key}.npz'
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with np.load(path) as data:
+                result = data['percentages'], data['ranking']
+            os.utime(path)
+        except (OSError, KeyError, ValueError):
+            return None
+        return result
+
+    def put(self, key, percentages):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        percentages = np.asarray(percentages, dtype=np.float64)
+        ranking = np.argsort(-np.nan_to_num(percentages, nan=-np.inf), kind='stable')
+
+        # Written aside and renamed, so readers never see half a file
+        temporary = self.directory / f'{key}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as f:
+            np.savez(f, percentages=percentages, ranking=ranking)
+        os.replace(temporary, self.path(key))
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.npz'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Another process got there first
+            total -= size
+
+    def clear(self):
+        for path in self.directory.glob('*.npz'):
+            path.unlink(missing_ok=True)
+
+
+def from_environment():
+    # DECISION_MATRIX_CACHE=0 turns the cache off
+    directory = os.environ.get(
+        'DECISION_MATRIX_CACHE', Path.home() / '.cache' / 'decision_matrix_qt'
+    )
+    if str(directory) in ('', '0'):
+        return None
+    max_mb = int(os.environ.get('DECISION_MATRIX_CACHE_MB', 256))
+    return ResultCache(directory, max_mb * 1024 * 1024)
+
+
+results = from_environment()
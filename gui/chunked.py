@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+from gui import scoring
+from gui.model import Breakpoints
+
+
+class RunningStats:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        # Chan et al.'s pairwise update; one pass, numerically stable
+        n = len(values)
+        mean = values.mean()
+        delta = mean - self.mean
+        total = self.count + n
+        self.m2 += ((values - mean) ** 2).sum() + delta ** 2 * self.count * n / total
+        self.mean += delta * n / total
+        self.count = total
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / self.count) if self.count else np.nan
+
+
+class TopK:
+    def __init__(self, k):
+        self.k = k
+        self.names = np.empty(0, dtype=object)
+        self.scores = np.empty(0)
+
+    def update(self, names, scores):
+        names = np.concatenate([self.names, names])
+        scores = np.concatenate([self.scores, np.nan_to_num(scores, nan=-np.inf)])
+        if len(scores) > self.k:
+            keep = np.argpartition(-scores, self.k - 1)[:self.k]
+            names, scores = names[keep], scores[keep]
+        self.names, self.scores = names, scores
+
+    def ranked(self):
+        order = np.argsort(-self.scores, kind='stable')
+        return list(zip(self.names[order], self.scores[order]))
+
+
+class ChunkedResult:
+    def __init__(self, top, stats):
+        self.top: 'list[tuple[str, float]]' = top
+        self.count = stats.count
+        self.mean = stats.mean
+        self.std = stats.std
+        self.min = stats.min
+        self.max = stats.max
+
+    def summary(self):
+        lines = [
+            f'{self.count} choices scored',
+            f'mean {self.mean:.2f}%, std {self.std:.2f}, '
+            f'min {self.min:.2f}%, max {self.max:.2f}%',
+            '',
+        ]
+        lines += [
+            f'{rank}. {name}: {score:.2f}%'
+            for rank, (name, score) in enumerate(self.top, 1)
+        ]
+        return '\n'.join(lines)
+
+
+class ChunkedScorer:
+    def __init__(self, weights: 'dict[str, float]', breakpoints, top_k=10):
+        self.criteria = list(weights)
+        self.weights = np.array(list(weights.values()), dtype=float)
+        # {criterion: (values, scores)}, only for continuous criteria;
+        # sorted once, for every chunk
+        self.breakpoints = {
+            criterion: Breakpoints(*pairs) for criterion, pairs in breakpoints.items()
+        }
+        self.stats = RunningStats()
+        self.top = TopK(top_k)
+
+    def ratings(self, chunk):
+        ratings = np.full((len(chunk), len(self.criteria)), np.nan)
+        for col, criterion in enumerate(self.criteria):
+            if criterion not in chunk.columns:
+                continue
+            column = chunk[criterion].to_numpy(dtype=float)
+            if criterion in self.breakpoints:
+                column = self.breakpoints[criterion].interpolate(column)
+            ratings[:, col] = column
+        return ratings
+
+    def update(self, chunk):
+        percentages = scoring.percentages(self.weights, self.ratings(chunk))
+        self.stats.update(percentages)
+        self.top.update(chunk.index.to_numpy(dtype=object), percentages)
+
+    def result(self):
+        return ChunkedResult(self.top.ranked(), self.stats)
+
+
+def read_chunks(path, chunksize=100_000):
+    # One choice per line; first column is the choice name, then one column per criterion
+    return pd.read_csv(path, index_col=0, chunksize=chunksize)
+
+
+def document_inputs(document):
+    # Weights and breakpoints from a jsonstream.LegacyDocument
+    weights = dict(zip(document.criteria, document.weights))
+    return weights, document.breakpoints()
+
+
+def score_file(path, weights, breakpoints, top_k=10, chunksize=100_000):
+    scorer = ChunkedScorer(weights, breakpoints, top_k)
+    for chunk in read_chunks(path, chunksize):
+        scorer.update(chunk)
+    return scorer.result()
@@ -0,0 +1,84 @@
+import gzip
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+
+class Codec:
+    def __init__(self, name, label, suffix, magic, open_text, module=True):
+        self.name = name
+        self.label = label
+        self.suffix = suffix
+        # Leading bytes of a file written with this codec
+        self.magic = magic
+        self._open_text = open_text
+        self.available = module is not None
+
+    @property
+    def file_filter(self):
+        return f'{self.label} (*{self.suffix})'
+
+    def open_text(self, path, mode):
+        if not self.available:
+            raise RuntimeError(f'Saving or opening {self.label} files needs the {self.name} package')
+        return self._open_text(path, mode)
+
+
+# Fast levels: saving should be limited by the disk, not by the compressor
+CODECS = {
+    codec.name: codec
+    for codec in (
+        Codec('json', 'JSON', '.json', b'', lambda path, mode: open(path, mode)),
+        Codec(
+            'gzip', 'JSON, gzip', '.json.gz', b'\x1f\x8b',
+            lambda path, mode: gzip.open(path, mode + 't', compresslevel=6),
+        ),
+        Codec(
+            'zstd', 'JSON, zstd', '.json.zst', b'\x28\xb5\x2f\xfd',
+            lambda path, mode: zstandard.open(
+                path, mode + 't', cctx=zstandard.ZstdCompressor(level=3)
+            ),
+            zstandard,
+        ),
+        Codec(
+            'lz4', 'JSON, lz4', '.json.lz4', b'\x04\x22\x4d\x18',
+            lambda path, mode: lz4.frame.open(path, mode + 't'),
+            lz4,
+        ),
+    )
+}
+
+
+def available_codecs():
+    return [codec for codec in CODECS.values() if codec.available]
+
+
+def codec_for_path(path):
+    # Longest suffix first, so .json.gz is not taken for .json
+    for codec in sorted(CODECS.values(), key=lambda codec: -len(codec.suffix)):
+        if str(path).endswith(codec.suffix):
+            return codec
+    return None
+
+
+def detect(path):
+    # By content, not by name, so renamed files still open
+    with open(path, 'rb') as f:
+        head = f.read(4)
+    for codec in CODECS.values():
+        if codec.magic and head.startswith(codec.magic):
+            return codec
+    return CODECS['json']
+
+
+def open_text(path, mode, codec=None):
+    if codec is None:
+        codec = detect(path) if mode == 'r' else codec_for_path(path) or CODECS['json']
+    return codec.open_text(path, mode)
@@ -0,0 +1,119 @@
+import re
+
+import numpy as np
+
+
+BOUND = re.compile(r'\s*(>=|<=)\s*(\S+)\s*$')
+RANGE = re.compile(r'\s*(\S+?)\s*\.\.\s*(\S+)\s*$')
+
+
+def parse(text):
+    # '>= 3', '<= 500' or '3..500' -> {'min': 3.0, 'max': 500.0};
+    # raises ValueError for anything else
+    if (match := RANGE.match(text)):
+        low, high = float(match.group(1)), float(match.group(2))
+        if low > high:
+            raise ValueError(f'{low:g} is more than {high:g}')
+        return {'min': low, 'max': high}
+    if (match := BOUND.match(text)):
+        return {'min' if match.group(1) == '>=' else 'max': float(match.group(2))}
+    raise ValueError(f'{text!r} is not a threshold; try >= 3, <= 500 or 3..500')
+
+
+def describe(bounds):
+    if 'min' in bounds and 'max' in bounds:
+        return f'{bounds["min"]:g}..{bounds["max"]:g}'
+    if 'min' in bounds:
+        return f'>= {bounds["min"]:g}'
+    return f'<= {bounds["max"]:g}' if 'max' in bounds else ''
+
+
+class Constraints:
+    # Must-have thresholds, at most one range per criterion, checked against
+    # the data of continuous criteria (a price, not its score) and the
+    # ratings of the rest. A missing value fails nothing.
+    # Each criterion keeps a bitmap of the choices failing it and each
+    # choice a count of the criteria it fails, so moving one threshold
+    # re-evaluates one column and an edit one cell.
+    def __init__(self, bounds: 'dict[str, dict[str, float]]' = None):
+        self.bounds: 'dict[str, dict[str, float]]' = {}
+        self._choices: 'list[str]' = None  # What the arrays below line up with
+        self._failing: 'dict[str, np.ndarray]' = {}
+        self._failures = np.zeros(0, dtype=np.int64)
+        self._stale_columns: 'dict[str, None]' = {}
+        self._stale_cells: 'dict[tuple[str, str], None]' = {}
+        self.load(bounds or {})
+
+    def load(self, bounds):
+        self.bounds = {criterion: dict(b) for criterion, b in bounds.items() if b}
+        self.invalidate()
+
+    def invalidate(self):
+        self._choices = None
+
+    def set(self, criterion, bounds: 'dict[str, float]'):
+        # Empty bounds remove the criterion's constraint
+        if bounds:
+            self.bounds[criterion] = dict(bounds)
+        else:
+            self.bounds.pop(criterion, None)
+        self._stale_columns[criterion] = None
+
+    def changed(self, kind, key):
+        # An ArrayMatrix observer
+        if kind in ('rating', 'data') and key[1] in self.bounds:
+            self._stale_cells[key] = None
+        elif kind == 'column' and key in self.bounds:
+            self._stale_columns[key] = None
+        elif kind == 'shape':
+            self.invalidate()
+
+    def values(self, matrix, criterion, choices):
+        if matrix.is_continuous(criterion):
+            if criterion in matrix.data_df.columns:
+                return matrix.data_df[criterion].reindex(choices).to_numpy(dtype=float)
+        elif criterion in matrix.all_criteria:
+            column = matrix.criterion_position(criterion)
+            if choices is matrix.choices:
+                # A whole column: a slice, with no lookup per choice
+                return matrix.ratings[:, column]
+            rows = [matrix.choice_position(choice) for choice in choices]
+            return matrix.ratings[rows, column]
+        return np.full(len(choices), np.nan)
+
+    def fails(self, criterion, values):
+        bounds = self.bounds.get(criterion, {})
+        return (values < bounds.get('min', -np.inf)) | (values > bounds.get('max', np.inf))
+
+    def passing(self, matrix):
+        # Mask over matrix.choices of the choices meeting every constraint
+        choices = matrix.choices
+        if self._choices != choices:
+            self._choices = list(choices)
+            self._failing = {
+                criterion: self.fails(criterion, self.values(matrix, criterion, choices))
+                for criterion in self.bounds
+            }
+            self._failures = np.zeros(len(choices), dtype=np.int64)
+            for failing in self._failing.values():
+                self._failures += failing
+        else:
+            for criterion in self._stale_columns:
+                old = self._failing.pop(criterion, False)
+                if criterion in self.bounds:
+                    self._failing[criterion] = self.fails(
+                        criterion, self.values(matrix, criterion, choices)
+                    )
+                self._failures += self._failing.get(criterion, False)
+                self._failures -= old
+            for choice, criterion in self._stale_cells:
+                if criterion in self._stale_columns or criterion not in self._failing:
+                    continue
+                row = matrix.choice_position(choice)
+                failing = self._failing[criterion]
+                self._failures[row] -= failing[row]
+                failing[row] = self.fails(criterion, self.values(matrix, criterion, [choice]))[0]
+                self._failures[row] += failing[row]
+        self._stale_columns = {}
+        self._stale_cells = {}
+        return self._failures == 0
@@ -1,3 +1,4 @@
+import os
 from functools import partial
 
 import numpy as np
@@ -12,9 +13,88 @@ from PySide2.QtWidgets import (
     QLabel,
     QFormLayout,
     QSlider,
+    QWidget,
 )
 
 
+# Hidden value/score rows kept for reuse, per layout
+POOL_SIZE = int(os.environ.get('DECISION_MATRIX_EDITOR_POOL', 64))
+
+
+def set_quietly(value, *widgets):
+    # Shows a value from the matrix without calling back into it
+    if np.isnan(value):
+        return
+    for widget in widgets:
+        widget.blockSignals(True)
+        widget.setValue(int(value))
+        widget.blockSignals(False)
+
+
+class PairEditor(QWidget):
+    # One 'If <criterion> is <value> then score should be <score>' row.
+    # Which pair it edits is data, not captured in its callbacks, so a
+    # deleted row can be hidden and reused for any other pair.
+    def __init__(self):
+        super().__init__()
+        self.criterion = None
+        self.index = 0
+
+        self.label = QLabel()
+        self.value_spin_box = QSpinBox()
+        self.value_spin_box.setRange(0, 100)
+        self.score_spin_box = QSpinBox()
+        self.score_spin_box.setRange(0, 100)
+
+        self.delete_button = QPushButton('&Delete')
+        size_policy = QSizePolicy()
+        size_policy.setRetainSizeWhenHidden(True)
+        self.delete_button.setSizePolicy(size_policy)
+
+        inner_grid = QGridLayout()
+        inner_grid.addWidget(self.value_spin_box, 0, 0)
+        inner_grid.addWidget(QLabel('then score should be '), 0, 1)
+        inner_grid.addWidget(self.score_spin_box, 0, 2)
+        inner_grid.addWidget(self.delete_button, 0, 3)
+
+        form = QFormLayout(self)
+        form.setContentsMargins(0, 0, 0, 0)
+        form.addRow(self.label, inner_grid)
+
+    def assign(self, criterion, index, deleteable):
+        self.criterion = criterion
+        self.index = index
+        self.label.setText('If ' + str(criterion) + ' is ')
+        for spin_box in (self.value_spin_box, self.score_spin_box):
+            spin_box.blockSignals(True)
+            spin_box.setValue(0)
+            spin_box.blockSignals(False)
+        self.delete_button.setVisible(deleteable)
+
+
+class EditorPool:
+    # Released editors wait here, hidden and unparented, until the next
+    # acquire; past max_size they are destroyed instead
+    def __init__(self, create, max_size=POOL_SIZE):
+        self.create = create
+        self.max_size = max_size
+        self.free: 'list[PairEditor]' = []
+
+    def acquire(self):
+        if self.free:
+            return self.free.pop()
+        return self.create()
+
+    def release(self, editor):
+        editor.hide()
+        # Not destroyed along with its groupbox
+        editor.setParent(None)
+        if len(self.free) < self.max_size:
+            self.free.append(editor)
+        else:
+            editor.deleteLater()
+
+
 class AbstractValueScoreLayout:
     def __init__(self, grid):
         # Subclasses must provide these attributes
@@ -26,50 +106,53 @@ class AbstractValueScoreLayout:
         self.has_score = False
         # Outer dict maps the criteria name to the last row
         self.rows_for_each_criteria: 'dict[str, int]' = {}
-        # Mapping between criteria name to list of spinboxes
+        # Maps each criteria to their vertical layouts
+        self.vertical_layouts: 'dict[str, QVBoxLayout]' = {}
+        # Mapping between criteria name to its rows, in order
+        self.editors: 'dict[str, list[PairEditor]]' = {}
         self.value_spin_boxes: 'dict[str, list[QSpinBox]]' = {}
         self.score_spin_boxes: 'dict[str, list[QSpinBox]]' = {}
+        # How many of each criterion's first editors show a pair in the
+        # matrix; those after are blank rows
+        self.pair_counts: 'dict[str, int]' = {}
+        self.pool = EditorPool(self.new_editor)
 
     def initializePage(self, criteria):
-        # Maps each criteria to their vertical layouts
-        self.vertical_layouts: 'dict[str, QVBoxLayout]' = {}
-
         # grid
         # |----> groupbox 1 (for criteria 1)
         #        |----> self.vertical_layout[0]
-        #               |----> form 1 (for row 1)
+        #               |----> editor 1 (for row 1)  # self.editors[criteria 1][0]
         #                      |----> label
         #                      |----> inner_grid
         #                             |----> value_spin_box  # self.value_spin_boxes[criteria 1][0]
         #                             |----> label
         #                             |----> score_spin_box  # self.score_spin_boxes[criteria 1][0]
         #                             |----> delete_button
-        #               |----> form 2 (for row 2)
-        #                      |----> label
-        #                      |----> inner_grid
-        #                             |----> value_spin_box  # self.value_spin_boxes[criteria 1][1]
-        #                             |----> label
-        #                             |----> score_spin_box  # self.score_spin_boxes[criteria 1][1]
-        #                             |----> delete_button
-        #               |-... more forms...
+        #               |----> editor 2 (for row 2)
+        #                      |-...
+        #               |-... more editors...
         #               |----> add_new_pair_button
         # |----> groupbox 2 (for criteria 2)
         #        |----> self.vertical_layout[1]
         #               |-...
         for idx, criterion in enumerate(criteria):
             self.rows_for_each_criteria[criterion] = 0
+            self.pair_counts[criterion] = 0
             groupbox = QGroupBox(criterion)
             vertical_layout = QVBoxLayout(groupbox)
             self.vertical_layouts[criterion] = vertical_layout
 
+            self.editors[criterion] = []
             self.score_spin_boxes[criterion] = []
             self.value_spin_boxes[criterion] = []
-            self.add_row(criterion, False)
-            self.add_row(criterion, False)
             add_new_pair_button = QPushButton('&Add new pair')
             add_new_pair_button.clicked.connect(partial(self.add_row, criterion))
 
             vertical_layout.addWidget(add_new_pair_button, 0, alignment=Qt.AlignRight)
+            self.add_row(criterion, False)
+            self.add_row(criterion, False)
+            for index in range(len(self.matrix.breakpoints.get(criterion, ()))):
+                self.show_pair(criterion, index)
 
             self.grid.addWidget(groupbox)
 
@@ -90,83 +173,96 @@ class AbstractValueScoreLayout:
         self.update_matrix(value, score, criterion, index)
 
     def update_matrix(self, value, score, criterion, index):
-        if len(self.matrix.value_score_df.columns) == 0:
-            self.matrix.criterion_value_to_score(criterion, {value: score})
-        else:
-            # Think the API must support modifications by index
-            # to avoid this.
-            self.matrix.value_score_df.loc[index, criterion] = value
-            self.matrix.value_score_df.loc[index, criterion + '_score'] = score
-
-        self.matrix._calculate_percentage()
-
+        # Only this criterion's column is rescored
+        self.matrix.set_breakpoint(criterion, index, value, score)
+        self.pair_counts[criterion] = max(self.pair_counts[criterion], index + 1)
+        self.matrix.rescore_dirty()
+
+    def new_editor(self):
+        # Connected once; the pool hands the same editor out again and again
+        editor = PairEditor()
+        editor.value_spin_box.valueChanged.connect(
+            lambda value: self.value_changed(editor.criterion, editor.index, value)
+        )
+        editor.score_spin_box.valueChanged.connect(
+            lambda score: self.score_changed(editor.criterion, editor.index, score)
+        )
+        editor.delete_button.clicked.connect(
+            lambda: self.delete(editor.criterion, editor.index)
+        )
+        return editor
 
     def add_row(self, criterion, deleteable=True):
         # The last row for this criterion
-        index = self.rows_for_each_criteria[criterion]
-
-        value_spin_box = QSpinBox()
-        value_spin_box.setRange(0, 100)
-        self.value_spin_boxes[criterion].append(value_spin_box)
-
-        score_spin_box = QSpinBox()
-        score_spin_box.setRange(0, 100)
-        self.score_spin_boxes[criterion].append(score_spin_box)
-
-        delete_button = QPushButton('&Delete')
-        cb = partial(self.delete, criterion, index)
-        delete_button.clicked.connect(cb)
-        size_policy = QSizePolicy()
-        size_policy.setRetainSizeWhenHidden(True)
-        delete_button.setSizePolicy(size_policy)
-
-        cb = partial(self.value_changed, criterion, index)
-        value_spin_box.valueChanged.connect(cb)
-        cb = partial(self.score_changed, criterion, index)
-        score_spin_box.valueChanged.connect(cb)
-
-        inner_grid = QGridLayout()
-        inner_grid.addWidget(value_spin_box, index, 0)
-        inner_grid.addWidget(QLabel('then score should be '), index, 1)
-        inner_grid.addWidget(score_spin_box, index, 2)
-        inner_grid.addWidget(delete_button, index, 3)
-        if not deleteable:
-            delete_button.hide()
+        self.insert_row(criterion, self.rows_for_each_criteria[criterion], deleteable)
 
-        form = QFormLayout()
-        form.addRow(QLabel('If ' + str(criterion) + ' is '), inner_grid)
+    def insert_row(self, criterion, index, deleteable=True):
+        editor = self.pool.acquire()
+        editor.assign(criterion, index, deleteable)
+        self.editors[criterion].insert(index, editor)
+        self.value_spin_boxes[criterion].insert(index, editor.value_spin_box)
+        self.score_spin_boxes[criterion].insert(index, editor.score_spin_box)
+        for later in self.editors[criterion][index + 1:]:
+            later.index += 1
 
-        pos = self.vertical_layouts[criterion].count() - 1
-        self.vertical_layouts[criterion].insertLayout(pos, form)
+        # The add button stays last
+        self.vertical_layouts[criterion].insertWidget(index, editor)
+        editor.show()
 
         # Increment the row number
         self.rows_for_each_criteria[criterion] += 1
 
-    def delete(self, criterion, idx):
-        pair = [criterion, criterion + '_score']
-        self.matrix.value_score_df.loc[idx, pair] = np.nan
+    def remove_row(self, criterion, index):
         self.rows_for_each_criteria[criterion] -= 1
+        editor = self.editors[criterion].pop(index)
+        self.value_spin_boxes[criterion].pop(index)
+        self.score_spin_boxes[criterion].pop(index)
+        for later in self.editors[criterion][index:]:
+            later.index -= 1
 
-        # Last item is the add button; get second last item
-        form_pos = self.vertical_layouts[criterion].count() - 2
-        # The form (row) to delete
-        form = self.vertical_layouts[criterion].takeAt(form_pos)
-
-        # Remove inner grid (second item in the form)
-        inner_grid = form.takeAt(1)
-        while (child := inner_grid.takeAt(0)):
-            child.widget().deleteLater()
-        del inner_grid
-        self.value_spin_boxes[criterion].pop(idx)
-        self.score_spin_boxes[criterion].pop(idx)
+        self.vertical_layouts[criterion].removeWidget(editor)
+        self.pool.release(editor)
 
-        # Remove form label (first item in the form)
-        label = form.takeAt(0)
-        label.widget().deleteLater()
-        del label
-
-        # Remove the form
-        self.vertical_layouts[criterion].removeItem(form)
+    def delete(self, criterion, idx):
+        # Later pairs move up a row, in the matrix as on screen, so that
+        # row numbers and editors stay in step; other views follow
+        # through show_pairs
+        self.matrix.remove_breakpoint(criterion, idx)
+        self.matrix.rescore_dirty()
+        if idx < self.pair_counts[criterion]:
+            self.pair_counts[criterion] -= 1
+        self.remove_row(criterion, idx)
+
+    def show_pair(self, criterion, index):
+        # A pair set here or elsewhere; one past the rows here gets a new row
+        if criterion not in self.editors:
+            return
+        while self.rows_for_each_criteria[criterion] <= index:
+            self.add_row(criterion)
+        self.pair_counts[criterion] = max(self.pair_counts[criterion], index + 1)
+
+        value, score = self.matrix.breakpoint(criterion, index)
+        set_quietly(value, self.value_spin_boxes[criterion][index])
+        set_quietly(score, self.score_spin_boxes[criterion][index])
+        # The pair is complete now, so editing either half applies it
+        if not np.isnan(value) and not np.isnan(score):
+            self.has_value = self.has_score = True
+
+    def show_pairs(self, criterion):
+        # Pairs were inserted or removed, maybe in another view: rows are
+        # added or dropped after the last pair, the blank rows after it are
+        # kept, and every pair is shown again at its new index
+        if criterion not in self.editors:
+            return
+        count = len(self.matrix.breakpoints.get(criterion, ()))
+        for _ in range(self.pair_counts[criterion] - count):
+            if count < self.rows_for_each_criteria[criterion]:
+                self.remove_row(criterion, count)
+        for _ in range(count - self.pair_counts[criterion]):
+            self.insert_row(criterion, self.pair_counts[criterion])
+        self.pair_counts[criterion] = count
+        for index in range(count):
+            self.show_pair(criterion, index)
 
 
 class AbstractDataTab:
@@ -214,9 +310,5 @@ class AbstractDataTab:
             criterion: spin_box.value()
             for criterion, spin_box in self.spin_boxes[choice].items()
         })
-        self.sync(choice, criterion_, value_)
-
-    def sync(self, choice, criterion, value):
-        raise NotImplementedError
 
 
@@ -0,0 +1,108 @@
+from concurrent.futures import CancelledError
+from pathlib import Path
+
+from PySide2.QtCore import QCoreApplication, QObject, QRunnable, QThreadPool, Signal
+from PySide2.QtWidgets import QMainWindow, QMessageBox, QTabWidget
+
+from gui import main, parsing
+
+
+class ParseSignals(QObject):
+    # QRunnable is not a QObject, so it cannot have signals of its own
+    parsed = Signal(str, object)
+    failed = Signal(str, str)
+
+
+class ParseTask(QRunnable):
+    # Waits on a pool thread for one file parsed in a worker process; its
+    # tab is built back on the UI thread
+    def __init__(self, path):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.path = path
+        self.signals = ParseSignals()
+
+    def run(self):
+        try:
+            document = parsing.parsers.submit(self.path).result()
+        except CancelledError:
+            return  # The application is quitting
+        except Exception as e:  # Nothing above a pool thread to catch it
+            self.signals.failed.emit(self.path, str(e))
+            return
+        self.signals.parsed.emit(self.path, document)
+
+
+class DocumentTabs(QTabWidget):
+    # One Ui_MainWindow, and so one matrix, per tab
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Decision Matrix')
+        self.resize(771, 514)
+        self.setDocumentMode(True)
+        self.setTabsClosable(True)
+        self.tabCloseRequested.connect(self.close_document)
+        self.currentChanged.connect(self.current_changed)
+
+        self.pool = QThreadPool(self)
+        # Otherwise the worker processes outlive the application
+        QCoreApplication.instance().aboutToQuit.connect(parsing.parsers.shutdown)
+        self.uis: 'dict[QMainWindow, main.Ui_MainWindow]' = {}
+        # Plain attribute, so other threads can read it without touching Qt
+        self.current = None
+        # Tasks are kept alive until their result has been delivered
+        self.tasks: 'dict[str, ParseTask]' = {}
+
+    def new_document(self, title='Untitled'):
+        page = QMainWindow()
+        ui = main.Ui_MainWindow()
+        ui.documents = self
+        ui.setupUi(page)
+        self.uis[page] = ui
+        self.setCurrentIndex(self.addTab(page, title))
+        return ui
+
+    def current_changed(self, index):
+        self.current = self.uis.get(self.widget(index))
+
+    def open_files(self, paths):
+        for path in paths:
+            if path in self.tasks:
+                continue
+            task = ParseTask(path)
+            task.signals.parsed.connect(self.add_parsed)
+            task.signals.failed.connect(self.report_failure)
+            self.tasks[path] = task
+            self.pool.start(task)
+
+    def add_parsed(self, path, document):
+        del self.tasks[path]
+        self.add_document(document, Path(path).name, path)
+
+    def add_document(self, document, title, path=None):
+        # An untouched tab is filled rather than left empty
+        ui = self.current
+        if ui is None or ui.io.path is not None or ui.matrix.shape != (0, 0):
+            ui = self.new_document()
+        ui.io.load(ui, document, path)
+        self.setTabText(self.indexOf(ui.main_window), title)
+        return ui
+
+    def report_failure(self, path, message):
+        del self.tasks[path]
+        msgbox = QMessageBox()
+        msgbox.setIcon(QMessageBox.Warning)
+        msgbox.setWindowTitle('Open files')
+        msgbox.setText(f'Could not open {path}')
+        msgbox.setInformativeText(message)
+        msgbox.exec()
+
+    def close_document(self, index):
+        page = self.widget(index)
+        ui = self.uis.pop(page)
+        if ui.worker is not None:
+            ui.worker.stop()
+        self.removeTab(index)
+        page.deleteLater()
+        if not self.count():
+            self.new_document()
@@ -0,0 +1,153 @@
+import warnings
+
+import numpy as np
+
+from gui import scoring
+
+
+class Engine:
+    # Turns weights (criteria,) and ratings (choices, criteria) into one score
+    # per choice, higher is better, shown in the Percentage column.
+    # Edits return (index, scores): the choices whose score changed and
+    # their new scores.
+    name = ''
+
+    def score(self, weights, ratings):
+        raise NotImplementedError
+
+    def invalidate(self):
+        # The ratings or weights were edited behind the engine's back
+        pass
+
+    def rows_changed(self, weights, ratings, rows):
+        return slice(None), self.score(weights, ratings)
+
+    def rating_changed(self, weights, ratings, row, column, old):
+        return self.rows_changed(weights, ratings, slice(row, row + 1))
+
+    def weight_changed(self, weights, ratings, column, old):
+        return slice(None), self.score(weights, ratings)
+
+    def column_changed(self, weights, ratings, scores, column, old):
+        # Every rating in one column changed, e.g. a continuous criterion was
+        # re-interpolated; scores are the current ones, old the previous column
+        return slice(None), self.score(weights, ratings)
+
+
+class RowwiseEngine(Engine):
+    # A choice's score depends on its own ratings only
+    def rows_changed(self, weights, ratings, rows):
+        return rows, self.score(weights, ratings[rows])
+
+
+class WeightedSum(RowwiseEngine):
+    name = 'Weighted sum'
+
+    def score(self, weights, ratings):
+        return scoring.percentages(weights, ratings)
+
+    def column_changed(self, weights, ratings, scores, column, old):
+        # Only this column's share of each total moved: one subtract and one add
+        weight = weights[column]
+        if np.isnan(weight):
+            return slice(0, 0), np.empty(0)
+        delta = np.nan_to_num(ratings[:, column]) - np.nan_to_num(old)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return slice(None), scores + delta * weight / (np.nansum(weights) * 10) * 100
+
+
+class WeightedProduct(RowwiseEngine):
+    name = 'Weighted product'
+
+    def score(self, weights, ratings):
+        # Product of (rating / 10) ** normalised weight, so 10 everywhere is 100%.
+        # Missing ratings or weights are left out of the product.
+        exponents = weights / np.nansum(weights)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            logs = np.log(ratings / 10) * exponents
+        logs[np.isnan(logs)] = 0
+        return np.exp(logs.sum(axis=-1)) * 100
+
+
+class ColumnwiseEngine(Engine):
+    # Scores combine per-row sums of per-column terms, and each column's terms
+    # depend on the whole column (its norm, sum, best and worst).
+    # An edit recomputes its column's terms and patches the row sums:
+    # O(choices) rather than O(choices x criteria).
+    def __init__(self):
+        self.terms = None  # (sums, choices, criteria)
+        self.sums = None  # (sums, choices)
+
+    def column_terms(self, weights, ratings):
+        raise NotImplementedError
+
+    def finish(self, weights, sums):
+        raise NotImplementedError
+
+    def score(self, weights, ratings):
+        self.terms = self.column_terms(weights, ratings)
+        self.sums = self.terms.sum(axis=-1)
+        return self.finish(weights, self.sums)
+
+    def invalidate(self):
+        self.terms = None
+
+    def patch_column(self, weights, ratings, column):
+        if self.terms is None or self.terms.shape[1:] != ratings.shape:
+            return slice(None), self.score(weights, ratings)
+        terms = self.column_terms(weights[column:column + 1], ratings[:, column:column + 1])
+        self.sums += terms[..., 0] - self.terms[..., column]
+        self.terms[..., column] = terms[..., 0]
+        return slice(None), self.finish(weights, self.sums)
+
+    def rating_changed(self, weights, ratings, row, column, old):
+        return self.patch_column(weights, ratings, column)
+
+    def weight_changed(self, weights, ratings, column, old):
+        return self.patch_column(weights, ratings, column)
+
+    def column_changed(self, weights, ratings, scores, column, old):
+        return self.patch_column(weights, ratings, column)
+
+
+class Topsis(ColumnwiseEngine):
+    name = 'TOPSIS'
+
+    def column_terms(self, weights, ratings):
+        # Squared distances to the best and the worst rating in each column,
+        # after dividing each column by its norm and multiplying by its weight
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weighted = ratings / np.sqrt(np.nansum(ratings ** 2, axis=0)) * weights
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # All-NaN columns
+            best = np.nanmax(weighted, axis=0)
+            worst = np.nanmin(weighted, axis=0)
+        terms = np.stack([(weighted - best) ** 2, (weighted - worst) ** 2])
+        terms[np.isnan(terms)] = 0
+        return terms
+
+    def finish(self, weights, sums):
+        # Relative closeness to the best choice imaginable
+        to_best, to_worst = np.sqrt(sums)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return to_worst / (to_best + to_worst) * 100
+
+
+class Ahp(ColumnwiseEngine):
+    name = 'AHP'
+
+    def column_terms(self, weights, ratings):
+        # Distributive AHP: the pairwise comparison matrix of ratios is
+        # consistent, so its priority vector is the column normalised by its sum
+        with np.errstate(divide='ignore', invalid='ignore'):
+            terms = ratings / np.nansum(ratings, axis=0) * weights
+        terms[np.isnan(terms)] = 0
+        return terms[None]
+
+    def finish(self, weights, sums):
+        # Each choice's share of the total; they add up to 100%
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return sums[0] / np.nansum(weights) * 100
+
+
+ENGINES = {engine.name: engine for engine in (WeightedSum, WeightedProduct, Topsis, Ahp)}
@@ -0,0 +1,142 @@
+import ast
+import re
+
+import numpy as np
+
+
+# Elementwise, so an expression gives the same value for a choice whether
+# it is evaluated for one row or for the whole column
+FUNCTIONS = {
+    'abs': np.abs,
+    'sqrt': np.sqrt,
+    'log': np.log,
+    'exp': np.exp,
+    'min': np.minimum,
+    'max': np.maximum,
+}
+
+OPERATORS = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Load, ast.Constant,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.USub, ast.UAdd,
+)
+
+# Names that are not identifiers go in backticks: `unit price` / units
+QUOTED = re.compile(r'`([^`]*)`')
+
+
+class Expression:
+    # A derived criterion's formula over data columns, parsed and compiled
+    # once; evaluating it is a handful of NumPy calls on whole columns
+    def __init__(self, text):
+        self.text = text
+        self.inputs: 'list[str]' = []  # Data columns read, in order of first use
+        quoted = {}
+
+        def quote(match):
+            return quoted.setdefault(match.group(1), f'_q{len(quoted)}')
+
+        try:
+            tree = ast.parse(QUOTED.sub(quote, text).strip(), mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f'{text!r} is not an expression') from e
+        names = {placeholder: name for name, placeholder in quoted.items()}
+
+        for node in ast.walk(tree):
+            if not isinstance(node, OPERATORS):
+                raise ValueError(f'{type(node).__name__} is not allowed in {text!r}')
+            if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+                raise ValueError(f'{node.value!r} is not a number')
+            if isinstance(node, ast.Call) and (
+                not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS
+                or node.keywords
+            ):
+                raise ValueError(f'Unknown function in {text!r}; use one of {", ".join(FUNCTIONS)}')
+
+        # Every data column becomes a positional argument _0, _1, ...
+        functions = {id(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call)}
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and id(node) not in functions:
+                name = names.get(node.id, node.id)
+                if name not in self.inputs:
+                    self.inputs.append(name)
+                node.id = f'_{self.inputs.index(name)}'
+        if not self.inputs:
+            raise ValueError(f'{text!r} does not use any data')
+
+        self.code = compile(tree, '<expression>', 'eval')
+
+    def __call__(self, columns: 'list[np.ndarray]'):
+        namespace = {'__builtins__': {}, **FUNCTIONS}
+        namespace.update((f'_{i}', column) for i, column in enumerate(columns))
+        with np.errstate(all='ignore'):
+            return np.asarray(eval(self.code, namespace), dtype=float)
+
+    def evaluate(self, frame):
+        # One value per row of frame; a missing column reads as NaN
+        columns = [
+            frame[name].to_numpy(dtype=float) if name in frame.columns
+            else np.full(len(frame), np.nan)
+            for name in self.inputs
+        ]
+        return np.broadcast_to(self(columns), len(frame))
+
+
+class DerivedCriteria:
+    # Continuous criteria whose data is computed from other data columns,
+    # which may be derived too
+    def __init__(self, texts: 'dict[str, str]' = None):
+        self.expressions: 'dict[str, Expression]' = {}
+        for criterion, text in (texts or {}).items():
+            self.define(criterion, text)
+
+    def __contains__(self, criterion):
+        return criterion in self.expressions
+
+    def __getitem__(self, criterion):
+        return self.expressions[criterion]
+
+    @property
+    def texts(self):
+        return {criterion: e.text for criterion, e in self.expressions.items()}
+
+    def define(self, criterion, text):
+        expression = Expression(text)
+        previous = self.expressions.get(criterion)
+        self.expressions[criterion] = expression
+        if criterion in self.dependents([criterion]):
+            if previous is None:
+                del self.expressions[criterion]
+            else:
+                self.expressions[criterion] = previous
+            raise ValueError(f'{criterion!r} would depend on itself')
+        return expression
+
+    def remove(self, criterion):
+        self.expressions.pop(criterion, None)
+
+    def dependents(self, criteria):
+        # The derived criteria that read any of criteria, directly or not,
+        # each after everything it reads: to recompute after criteria changed
+        readers = {}
+        for derived, expression in self.expressions.items():
+            for name in expression.inputs:
+                readers.setdefault(name, []).append(derived)
+
+        # Depth-first; a criterion is finished after all its readers, so
+        # the reverse of that order has inputs first
+        finished = {}
+        visiting = set()
+
+        def visit(criterion):
+            visiting.add(criterion)
+            for reader in readers.get(criterion, ()):
+                if reader not in visiting and reader not in finished:
+                    visit(reader)
+            visiting.discard(criterion)
+            finished[criterion] = None
+
+        for criterion in criteria:
+            for reader in readers.get(criterion, ()):
+                if reader not in finished:
+                    visit(reader)
+        return list(reversed(finished))
@@ -0,0 +1,60 @@
+import argparse
+import asyncio
+import logging
+import sys
+
+from gui import chunked, compression, jsonstream
+
+
+def score_large(args):
+    document = jsonstream.read_document(
+        lambda: compression.open_text(args.document, 'r')
+    )
+    weights, breakpoints = chunked.document_inputs(document)
+    result = chunked.score_file(
+        args.choices, weights, breakpoints, args.top, args.chunksize
+    )
+    print(result.summary())
+
+
+def serve(args):
+    # Imported here so score-large works without the matrix package
+    from gui import service
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(service.serve(args.host, args.port, args.cache_size))
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog='python -m gui.headless',
+        description='Decision matrix tools that do not need the GUI',
+    )
+    subparsers = parser.add_subparsers(required=True)
+
+    parser_score = subparsers.add_parser(
+        'score-large', help='score a CSV of choices too big to open, chunk by chunk'
+    )
+    parser_score.add_argument('document', help='saved matrix with the weights and value/score pairs')
+    parser_score.add_argument('choices', help='CSV with one choice per line and one column per criterion')
+    parser_score.add_argument('--top', type=int, default=10)
+    parser_score.add_argument('--chunksize', type=int, default=100_000)
+    parser_score.set_defaults(fn=score_large)
+
+    parser_serve = subparsers.add_parser(
+        'serve', help='score saved matrices sent over HTTP; POST /score, POST /batch, GET /engines'
+    )
+    parser_serve.add_argument('--host', default='127.0.0.1')
+    parser_serve.add_argument('--port', type=int, default=8765)
+    parser_serve.add_argument('--cache-size', type=int, default=1024, help='rankings kept in memory')
+    parser_serve.set_defaults(fn=serve)
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    args.fn(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
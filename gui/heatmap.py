@@ -0,0 +1,167 @@
+import math
+
+import numpy as np
+from PySide2.QtCore import Qt, QRect, QRectF, Signal
+from PySide2.QtGui import QImage, QPainter, qRgb
+from PySide2.QtWidgets import QDockWidget, QSizePolicy, QWidget
+
+
+# Pixels per side of the squares repainted after an edit
+TILE = 64
+# Pixel value of a missing rating or percentage; the rest are 0-254
+MISSING = 255
+# Pale to dark blue, higher is better, and grey for missing
+PALE, DARK = np.array([247, 251, 255]), np.array([8, 48, 107])
+COLORS = [
+    qRgb(*np.round(PALE + (DARK - PALE) * i / (MISSING - 1)).astype(int).tolist())
+    for i in range(MISSING)
+] + [qRgb(210, 210, 210)]
+
+
+def to_pixels(values, top):
+    # 0-top to 0-254
+    values = np.asarray(values, dtype=float)
+    with np.errstate(invalid='ignore'):
+        pixels = np.clip(np.nan_to_num(values) / top * (MISSING - 1), 0, MISSING - 1).round()
+    return np.where(np.isnan(values), MISSING, pixels).astype(np.uint8)
+
+
+class HeatmapImage:
+    # One uint8 pixel per choice (row) and criterion (column), plus the
+    # Percentage column last; rows padded to 4 bytes as QImage wants.
+    # Updates return the (tile row, tile column) squares that changed.
+    def __init__(self):
+        self.pixels = np.zeros((0, 0), dtype=np.uint8)
+        self.shape = (0, 0)
+
+    def tiles(self):
+        n, width = self.shape
+        return [(r, c) for r in range(-(-n // TILE)) for c in range(-(-width // TILE))]
+
+    def build(self, ratings, percentages):
+        n, m = ratings.shape
+        self.shape = (n, m + 1)
+        self.pixels = np.full((n, -(-(m + 1) // 4) * 4), MISSING, dtype=np.uint8)
+        self.pixels[:, :m] = to_pixels(ratings, 10)
+        self.pixels[:, m] = to_pixels(percentages, 100)
+        return self.tiles()
+
+    def update(self, ratings, percentages, cells=(), columns=()):
+        # cells are (row, column) ratings and columns whole rating columns
+        # that may have changed; the Percentage column is always compared
+        n, width = self.shape
+        m = width - 1
+        cells = np.array(list(cells), dtype=np.int64).reshape(-1, 2)
+        rows = np.concatenate([cells[:, 0], *(np.arange(n) for _ in columns)])
+        cols = np.concatenate([cells[:, 1], *(np.full(n, column) for column in columns)])
+        inside = (rows < n) & (cols < m)
+        rows, cols = rows[inside], cols[inside]
+
+        new = to_pixels(ratings[rows, cols], 10)
+        changed = new != self.pixels[rows, cols]
+        self.pixels[rows, cols] = new
+        dirty = set(zip((rows[changed] // TILE).tolist(), (cols[changed] // TILE).tolist()))
+
+        new = to_pixels(percentages, 100)
+        changed = np.flatnonzero(new != self.pixels[:n, m])
+        self.pixels[:n, m] = new
+        dirty.update((row, m // TILE) for row in np.unique(changed // TILE).tolist())
+        return sorted(dirty)
+
+
+class HeatmapView(QWidget):
+    # The image stretched over the widget; a click reports the choice row
+    # and column under it
+    clicked = Signal(int, int)
+
+    def __init__(self, image):
+        super().__init__()
+        self.image = image
+        self.qimage = None
+        self.setMinimumSize(40, 120)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+    def wrap(self):
+        # Shares the array's memory; no copy
+        n, width = self.image.shape
+        self.qimage = None
+        if n and width:
+            pixels = self.image.pixels
+            self.qimage = QImage(pixels.data, width, n, pixels.shape[1], QImage.Format_Indexed8)
+            self.qimage.setColorTable(COLORS)
+
+    def repaint_tiles(self, tiles):
+        self.wrap()
+        for tile in tiles:
+            self.update(self.tile_rect(*tile))
+
+    def tile_rect(self, tile_row, tile_column):
+        n, width = self.image.shape
+        x, y = self.width() / width, self.height() / n
+        left = math.floor(tile_column * TILE * x)
+        top = math.floor(tile_row * TILE * y)
+        right = math.ceil(min((tile_column + 1) * TILE, width) * x)
+        bottom = math.ceil(min((tile_row + 1) * TILE, n) * y)
+        return QRect(left, top, right - left, bottom - top)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        target = event.rect()
+        painter.fillRect(target, self.palette().window())
+        if self.qimage is None:
+            return
+        # Only the exposed part of the image is scaled
+        n, width = self.image.shape
+        x, y = width / self.width(), n / self.height()
+        source = QRectF(target.x() * x, target.y() * y, target.width() * x, target.height() * y)
+        painter.drawImage(QRectF(target), self.qimage, source)
+
+    def mousePressEvent(self, event):
+        n, width = self.image.shape
+        if n and width:
+            row = min(int(event.pos().y() / self.height() * n), n - 1)
+            column = min(int(event.pos().x() / self.width() * width), width - 1)
+            self.clicked.emit(row, column)
+
+
+class HeatmapDock(QDockWidget):
+    # Every rating and percentage of the matrix at a glance, drawn from a
+    # NumPy array rather than table items
+    def __init__(self, parent, matrix):
+        super().__init__('Overview', parent)
+        self.setAllowedAreas(Qt.AllDockWidgetAreas)
+        self.matrix = matrix
+        self.image = HeatmapImage()
+        self.view = HeatmapView(self.image)
+        self.setWidget(self.view)
+
+    def showEvent(self, event):
+        # Edits made while hidden were not followed
+        super().showEvent(event)
+        self.rebuild()
+
+    def rebuild(self):
+        self.view.repaint_tiles(self.image.build(self.matrix.ratings, self.matrix.percentages))
+
+    def apply_changes(self, changes):
+        matrix = self.matrix
+        if not self.isVisible():
+            return
+        if changes['shape'] or self.image.shape != (len(matrix.choices), len(matrix.all_criteria) + 1):
+            self.rebuild()
+            return
+        cells = []
+        for choice, criterion in changes['rating'] + changes['data']:
+            try:
+                cells.append((matrix.choice_position(choice), matrix.criterion_position(criterion)))
+            except KeyError:
+                continue
+        columns = [
+            matrix.criterion_position(criterion)
+            for criterion in changes['column'] if criterion in matrix.all_criteria
+        ]
+        self.view.repaint_tiles(self.image.update(matrix.ratings, matrix.percentages, cells, columns))
+
+    def scores_changed(self):
+        if self.isVisible() and self.image.shape[0] == len(self.matrix.choices):
+            self.view.repaint_tiles(self.image.update(self.matrix.ratings, self.matrix.percentages))
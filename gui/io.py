@@ -1,16 +1,25 @@
 from pathlib import Path
 import json
 
-import pandas as pd
+import numpy as np
+from PySide2.QtCore import QCoreApplication, QSettings
 from PySide2.QtWidgets import (
     QFileDialog,
+    QInputDialog,
+    QMessageBox,
+    QProgressDialog,
     QTableWidgetItem
 )
 
+from gui import aggregate, cache, chunked, compression, parsing
+from gui.expressions import DerivedCriteria
+from gui.profiling import instrument
+
 
 class IO:
     def __init__(self):
         self.path = None
+        self.codec = compression.CODECS['json']
 
     def save(self, matrix):
         if self.path is None:
@@ -18,108 +27,218 @@ class IO:
         self._write(matrix)
 
     def save_as(self, matrix):
-        path, _ = QFileDialog.getSaveFileName(
-            None, 'Save as', str(Path.home()), 'JSON (*.json)'
+        # The last codec picked is offered first next time
+        settings = QSettings('twenty5151', 'decision_matrix_qt')
+        codecs = {codec.file_filter: codec for codec in compression.available_codecs()}
+        last = compression.CODECS.get(settings.value('save_codec'), self.codec)
+        path, selected_filter = QFileDialog.getSaveFileName(
+            None, 'Save as', str(Path.home()), ';;'.join(codecs), last.file_filter
         )
         if path == '':
             return
-        self.path = path.split('.')[0] + '.json'
+        # A typed extension wins over the selected filter
+        codec = compression.codec_for_path(path) or codecs.get(selected_filter, last)
+        self.path = path.split('.')[0] + codec.suffix
+        self.codec = codec
+        settings.setValue('save_codec', codec.name)
         self._write(matrix)
 
+    @instrument
     def _write(self, matrix):
         data = {
             'matrix': matrix.df.to_dict(),
             'value_score_df': matrix.value_score_df.to_dict(),
             'data_df': matrix.data_df.to_dict(orient='index'),
+            'scenarios': matrix.scenarios.weights,
+            'derived': matrix.derived.texts,
+            'constraints': matrix.constraints.bounds,
         }
-        with open(self.path, 'w') as f:
-            f.write(json.dumps(data, indent=2))
+        # Encoded and compressed piece by piece; the whole text never exists
+        with self.codec.open_text(self.path, 'w') as f:
+            f.writelines(json.JSONEncoder(indent=2).iterencode(data))
+
+        # So that reopening this file does not score it again
+        if cache.results is not None and not matrix.percentages_stale:
+            cache.results.put(cache.matrix_key(matrix), matrix.percentages)
 
     def open_(self, parent):
+        paths, _ = QFileDialog.getOpenFileNames(
+            None, 'Open files', str(Path.home()), open_filter()
+        )
+        if not paths:
+            return
+
+        # With tabs, every file is parsed in a worker process and gets its own tab
+        if parent.documents is not None:
+            parent.documents.open_files(paths)
+            return
+        self.load(parent, parsing.read(paths[0]), paths[0])
+
+    @instrument
+    def load(self, parent, document, path=None):
+        # Widgets are created here, so this must run on the UI thread.
+        # Without a path (e.g. an aggregate) the first save asks for one.
+        if path is not None:
+            self.path = path
+            self.codec = compression.detect(path)
+
+        # The widget callbacks fired while loading only fill in the matrix;
+        # it is scored once at the end
+        with parent.matrix.deferred_scoring():
+            # Order is significant
+            # Criteria are marked continuous again as their widgets are added
+            parent.matrix.continuous_criteria = []
+            parent.matrix.load_arrays(
+                document.choices, document.criteria, document.weights, document.ratings
+            )
+            parent.matrix.derived = DerivedCriteria(document.derived())
+            load_criteria(parent, document.continuous_criteria)
+
+            parent.matrix.value_score_df = document.value_score_frame()
+            parent.matrix.data_df = document.data_frame()
+            parent.matrix.scenarios.load(document.scenarios())
+            parent.matrix.constraints.load(document.constraints())
+            parent.matrix.continuous_criteria = document.continuous_criteria
+
+            load_choices(parent)
+            insert_weights(parent)
+            insert_ratings(parent)
+            insert_criterion_value_to_scores(parent)
+            insert_data(parent)
+
+        score_loaded(parent)
+        # Loading goes through the editing callbacks; none of it is undoable
+        parent.undo_stack.clear()
+
+    def score_large_file(self, parent):
         path, _ = QFileDialog.getOpenFileName(
-            None, 'Open file', str(Path.home()), 'JSON (*.json)'
+            None, 'Score large file', str(Path.home()), 'CSV (*.csv)'
         )
         if path == '':
             return
 
-        with open(path, 'r') as f:
-            data = json.load(f)
-
-        # Order is significant
-        # Duplicated because this clears the weights
-        load_continuous_criteria(
-            parent, pd.DataFrame.from_dict(data['data_df'], orient='index').columns
+        # Weights and interpolators come from the open matrix
+        weights = dict(zip(parent.matrix.all_criteria, parent.matrix.weights))
+        breakpoints = {
+            criterion: points.sorted() for criterion, points in parent.matrix.breakpoints.items()
+        }
+        scorer = chunked.ChunkedScorer(weights, breakpoints)
+
+        progress = QProgressDialog('Scoring...', 'Cancel', 0, 0)
+        progress.setMinimumDuration(500)
+        for chunk in chunked.read_chunks(path):
+            scorer.update(chunk)
+            progress.setLabelText(f'{scorer.stats.count} choices scored')
+            QCoreApplication.processEvents()
+            if progress.wasCanceled():
+                return
+        progress.close()
+
+        msgbox = QMessageBox()
+        msgbox.setWindowTitle('Score large file')
+        msgbox.setText(scorer.result().summary())
+        msgbox.exec()
+
+
+    def aggregate_files(self, parent):
+        paths, _ = QFileDialog.getOpenFileNames(
+            None, 'Compare/aggregate', str(Path.home()), open_filter()
         )
+        if not paths:
+            return
+        method, ok = QInputDialog.getItem(
+            None, 'Compare/aggregate', 'Combine each cell with the', list(aggregate.METHODS),
+            0, False
+        )
+        if not ok:
+            return
 
-        parent.matrix.df = pd.DataFrame.from_dict(data['matrix'])
-        load_criteria(parent)
+        documents = parsing.parsers.read_all(paths)
+        result = aggregate.aggregate(documents, method)
 
-        # Loading again because load_criteria has nasty side effects
-        parent.matrix.df = pd.DataFrame.from_dict(data['matrix'])
-        parent.matrix.value_score_df = pd.DataFrame.from_dict(data['value_score_df'])
-        parent.matrix.data_df = pd.DataFrame.from_dict(data['data_df'], orient='index')
+        # The combined matrix opens as a new, unsaved tab
+        if parent.documents is not None:
+            parent.documents.add_document(result, f'{method} of {len(paths)}')
 
-        parent.matrix.continuous_criteria = parent.matrix.data_df.columns
+        msgbox = QMessageBox()
+        msgbox.setWindowTitle('Compare/aggregate')
+        msgbox.setText(result.summary())
+        msgbox.exec()
 
-        load_choices(parent)
-        insert_weights(parent)
-        insert_ratings(parent)
-        insert_criterion_value_to_scores(parent)
-        insert_data(parent)
+
+def open_filter():
+    suffixes = ' '.join(f'*{codec.suffix}' for codec in compression.available_codecs())
+    return f'JSON ({suffixes})'
 
 
 def load_choices(parent):
-    for choice in parent.matrix.df.index[1:]:
-        parent.lineEdit.setText(choice)
-        parent.pushButton.click()
-        parent.matrix.df = parent.matrix.df[:-1]
+    # The choices are already in the matrix; only the widgets are missing
+    for choice in parent.matrix.choices:
+        parent.add_row_widgets(choice)
 
 
-def load_criteria(parent):
+def load_criteria(parent, continuous_criteria):
+    # The criteria are already in the matrix; add their widgets in file order
     parent.combo_box.setCurrentIndex(1)
-    for criterion in parent.matrix.criteria:
-        parent.lineEdit.setText(criterion)
-        parent.pushButton.click()
+    for criterion in list(parent.matrix.all_criteria):
+        if criterion in continuous_criteria:
+            parent.line_edit_cc_tab.setText(criterion)
+            parent.criterion_button.click()
+        else:
+            parent.lineEdit.setText(criterion)
+            parent.pushButton.click()
     parent.combo_box.setCurrentIndex(0)
 
 
-def load_continuous_criteria(parent, cc):
-    for criterion in cc:
-        parent.line_edit_cc_tab.setText(criterion)
-        parent.criterion_button.click()
+def score_loaded(parent):
+    # An unchanged file that was scored before is not scored again
+    matrix = parent.matrix
+    key = cache.matrix_key(matrix) if cache.results is not None else None
+    if key is not None and (cached := cache.results.get(key)) is not None:
+        matrix.set_percentages(cached[0])
+    else:
+        matrix._calculate_percentage()
+        if key is not None:
+            cache.results.put(key, matrix.percentages)
+
+    parent.invalidate_compute()
+    parent.update_percentage_display()
+    parent.update_max_total_display()
 
 
+# The matrix already holds the weights and ratings; these only fill in the
+# table, with its signals blocked so no cell is applied twice
 def insert_weights(parent):
-    for idx, weight in enumerate(parent.matrix.df.loc['Weight'][:-1]):
+    parent.matrix_widget.blockSignals(True)
+    for idx, weight in enumerate(parent.matrix.weights):
         parent.matrix_widget.setItem(0, idx, QTableWidgetItem(str(weight)))
-    # Fixes bug where first column seems to be ignored
-    parent.max_total_changed(0)
+    parent.matrix_widget.blockSignals(False)
 
 
 def insert_ratings(parent):
-    for idx, (choice, series) in enumerate(parent.matrix.df.iloc[1:, :-1].iterrows()):
+    discrete_columns = np.flatnonzero(~parent.matrix.continuous_mask)
+    parent.matrix_widget.blockSignals(True)
+    for idx, ratings in enumerate(parent.matrix.ratings):
         row = idx + 1  # First row is weights
-        for col, (criterion, rating) in enumerate(series.items()):
-            if criterion in parent.matrix.continuous_criteria:
-                continue
-            parent.matrix_widget.setItem(row, col, QTableWidgetItem(str(rating)))
-            parent.rating_changed(row, col)  # Update percentages
+        for col in discrete_columns:
+            parent.matrix_widget.setItem(row, col, QTableWidgetItem(str(ratings[col])))
+    parent.matrix_widget.blockSignals(False)
 
 
 def insert_criterion_value_to_scores(parent):
-    for row, series in parent.matrix.value_score_df.iterrows():
-        for col_name, value in series.items():
-            if col_name.endswith('_score'):
-                criterion = col_name.split('_score')[0]
-                parent.cc_tab_page.score_spin_boxes[criterion][int(row)].setValue(value)
-            else:
-                parent.cc_tab_page.value_spin_boxes[col_name][int(row)].setValue(value)
+    # Straight from the matrix; a row is added for every pair past the first two
+    page = parent.cc_tab_page
+    for criterion, points in parent.matrix.breakpoints.items():
+        if page is None:
+            continue
+        for index in range(len(points)):
+            page.show_pair(criterion, index)
 
 
 def insert_data(parent):
     for choice, series in parent.matrix.data_df.iterrows():
         for criterion, value in series.items():
+            # Derived criteria have no sliders; their data is computed
+            if criterion in parent.matrix.derived:
+                continue
             parent.data_tab_page.sliders[choice][criterion].setValue(value)
-
-
-io = IO()
@@ -0,0 +1,311 @@
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+
+# The structure of an object up to each of its values: its opening brace
+# or the comma after a value, then a key and a colon, or else its closing
+# brace. json's own scanner only reads a value starting right at its
+# position, so the whitespace before the value is taken too.
+KEY = r'[ \t\n\r]*"((?:[^"\\]|\\.)*)"[ \t\n\r]*:[ \t\n\r]*'
+FIRST = re.compile(rf'[ \t\n\r]*\{{(?:{KEY}|[ \t\n\r]*(\}}))')
+NEXT = re.compile(rf'[ \t\n\r]*(?:,{KEY}|(\}}))')
+
+# Reads NaN and Infinity, as json.dumps writes them for missing or
+# infinite floats
+DECODER = json.JSONDecoder()
+
+# Characters of a long object decoded at once
+PIECE = 1 << 16
+
+
+class Stream:
+    # Walks the outer objects of a JSON text with a few patterns, and hands
+    # each value the caller asks for to json's C scanner. At most one chunk,
+    # or the value being decoded, is held as text.
+    def __init__(self, f, chunk_size=1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        # Length of the last value decoded
+        self.last = 0
+
+    def read(self, size):
+        chunk = self.f.read(size)
+        self.eof = not chunk
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+
+    def ensure(self, size):
+        # At least size characters past pos in the buffer, short of the end
+        while len(self.buffer) - self.pos < size and not self.eof:
+            self.read(max(self.chunk_size, size - len(self.buffer) + self.pos))
+
+    def match(self, pattern, expected):
+        size = self.chunk_size
+        while True:
+            match = pattern.match(self.buffer, self.pos)
+            # A match reaching the end of the buffer may go on in the next chunk
+            if match and match.end() < len(self.buffer) or self.eof:
+                break
+            # Doubling keeps text much larger than a chunk from being
+            # scanned more than a few times
+            self.read(size)
+            size *= 2
+        if match is None:
+            raise ValueError(f'Expected {expected} near {self.buffer[self.pos:self.pos + 40]!r}')
+        self.pos = match.end()
+        return match
+
+    def value(self):
+        # Values side by side tend to be the same size; reading enough for
+        # one up front saves decoding a large one over and over
+        if not self.eof and len(self.buffer) - self.pos <= self.last:
+            self.read(self.last)
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as error:
+                if self.eof:
+                    raise ValueError(f'Invalid JSON: {error.msg} near {self.buffer[error.pos:error.pos + 40]!r}')
+            else:
+                if end < len(self.buffer) or self.eof:
+                    self.last = end - self.pos
+                    self.pos = end
+                    return value
+            self.read(size)
+            size *= 2
+
+    def keys(self):
+        # Walks a JSON object, yielding each key; the caller must consume its value
+        match = self.match(FIRST, "'{' and a key or '}'")
+        while not match[2]:
+            key = match[1]
+            yield json.loads(f'"{key}"') if '\\' in key else key
+            match = self.match(NEXT, "',' and a key or '}'")
+
+    def pieces(self):
+        # A flat object as dicts of its entries, from about PIECE characters
+        # of text each, so that a long one is never decoded whole. Pieces
+        # end at ',\n', which cannot occur inside a JSON string; an object
+        # written without newlines comes whole.
+        self.ensure(PIECE)
+        if not self.buffer.startswith('{', self.pos) or self.buffer.find('}', self.pos, self.pos + PIECE) >= 0:
+            yield self.value()
+            return
+        self.pos += 1
+        while True:
+            self.ensure(PIECE)
+            cut = self.buffer.rfind(',\n', self.pos, self.pos + PIECE)
+            if cut == -1:
+                # The object ends, or has one entry longer than a piece
+                self.buffer = '{' + self.buffer[self.pos:]
+                self.pos = 0
+                yield self.value()
+                return
+            text = '{' + self.buffer[self.pos:cut] + '}'
+            try:
+                piece, end = DECODER.raw_decode(text)
+            except json.JSONDecodeError as error:
+                raise ValueError(f'Invalid JSON: {error.msg} near {text[error.pos:error.pos + 40]!r}')
+            yield piece
+            if end < len(text):
+                # The object closed inside the piece
+                self.pos += end - 1
+                return
+            self.pos = cut + 2
+
+
+class Table:
+    # A two-level JSON object read into a float array a piece of an inner
+    # object at a time, straight into place; the parsed JSON never piles up
+    def __init__(self):
+        self.outer: 'dict[str, int]' = {}
+        self.inner: 'dict[str, int]' = {}
+        # Owns the memory behind values, so that it can be resized in place
+        self.buffer = np.empty(0)
+        self.values = self.buffer.reshape(0, 0)
+
+    def reserve(self, rows, columns):
+        # Grow geometrically, as ArrayMatrix._reserve does, but in place:
+        # realloc extends a large buffer without a second copy beside it
+        capacity_rows, capacity_columns = self.values.shape
+        if rows <= capacity_rows and columns <= capacity_columns:
+            return
+        if rows > capacity_rows:
+            rows = max(rows, capacity_rows * 2)
+        if columns > capacity_columns:
+            columns = max(columns, capacity_columns * 2)
+        self.relayout(rows, columns)
+
+    def relayout(self, rows, columns):
+        # values becomes rows x columns, keeping what fits and padding with NaN
+        old_rows, old_columns = self.values.shape
+        kept_rows, kept_columns = min(rows, old_rows), min(columns, old_columns)
+        self.values = None
+        buffer = self.buffer
+        if columns < old_columns:
+            # Rows move towards the start, so go first to last
+            for i in range(1, kept_rows):
+                buffer[i * columns:i * columns + kept_columns] = buffer[i * old_columns:i * old_columns + kept_columns]
+        buffer.resize(rows * columns, refcheck=False)
+        if columns > old_columns:
+            # Rows move towards the end, so go last to first
+            for i in reversed(range(kept_rows)):
+                buffer[i * columns:i * columns + kept_columns] = buffer[i * old_columns:i * old_columns + kept_columns]
+                buffer[i * columns + kept_columns:(i + 1) * columns] = np.nan
+        buffer[kept_rows * columns:] = np.nan
+        self.values = buffer.reshape(rows, columns)
+
+    def read(self, stream):
+        keys = columns = None
+        for outer in stream.keys():
+            i = self.outer.setdefault(outer, len(self.outer))
+            for row in stream.pieces():
+                if not isinstance(row, dict):
+                    raise ValueError(f'Expected an object under {outer!r}, got {row!r}')
+                try:
+                    # null becomes NaN, true and false 1 and 0
+                    values = np.array(list(row.values()), dtype=float)
+                except (TypeError, ValueError):
+                    raise ValueError(f'Expected numbers under {outer!r}')
+                # Most objects have the same keys as the one before, and
+                # share its column positions
+                if list(row) != keys:
+                    keys = list(row)
+                    for inner in keys:
+                        self.inner.setdefault(inner, len(self.inner))
+                    columns = np.array(list(map(self.inner.__getitem__, keys)), dtype=np.intp)
+                self.reserve(len(self.outer), len(self.inner))
+                self.values[i, columns] = values
+        # Down to the final size; shrinking gives the spare memory back
+        self.relayout(len(self.outer), len(self.inner))
+
+    def frame(self, outer_is_index):
+        # No copies; pandas wraps the array
+        if outer_is_index:
+            return pd.DataFrame(self.values, index=list(self.outer), columns=list(self.inner), copy=False)
+        return pd.DataFrame(self.values.T, index=list(self.inner), columns=list(self.outer), copy=False)
+
+
+class Strings:
+    # A flat JSON object of strings
+    def __init__(self):
+        self.values: 'dict[str, str]' = {}
+
+    def read(self, stream):
+        for key in stream.keys():
+            value = stream.value()
+            if not isinstance(value, str):
+                raise ValueError(f'Expected a string under {key!r}, got {value!r}')
+            self.values[key] = value
+
+
+class LegacyDocument:
+    sections = ('matrix', 'value_score_df', 'data_df', 'scenarios', 'constraints')
+
+    def __init__(self):
+        # matrix and value_score_df are column-major (criterion -> row -> value),
+        # data_df is row-major (choice -> criterion -> value),
+        # scenarios is name -> criterion -> weight,
+        # constraints is criterion -> 'min' or 'max' -> threshold,
+        # derived is criterion -> expression
+        self.tables = {name: Table() for name in self.sections}
+        self.tables['derived'] = Strings()
+
+    def read(self, stream):
+        for section in stream.keys():
+            if section in self.tables:
+                self.tables[section].read(stream)
+            else:
+                stream.value()
+
+    ## Matrix
+    @property
+    def criteria(self):
+        return [c for c in self.tables['matrix'].outer if c != 'Percentage']
+
+    @property
+    def choices(self):
+        return [r for r in self.tables['matrix'].inner if r != 'Weight']
+
+    def _matrix_columns(self):
+        table = self.tables['matrix']
+        return [table.outer[c] for c in self.criteria]
+
+    @property
+    def weights(self):
+        table = self.tables['matrix']
+        if 'Weight' not in table.inner:
+            return np.full(len(self.criteria), np.nan)
+        return table.values[self._matrix_columns(), table.inner['Weight']]
+
+    @property
+    def ratings(self):
+        table = self.tables['matrix']
+        rows = [table.inner[r] for r in self.choices]
+        return table.values[np.ix_(self._matrix_columns(), rows)].T
+
+    ## Continuous criteria
+    @property
+    def continuous_criteria(self):
+        # Anything with data or with value/score pairs
+        names = dict.fromkeys(self.tables['data_df'].inner)
+        names.update(dict.fromkeys(
+            c for c in self.tables['value_score_df'].outer if not c.endswith('_score')
+        ))
+        return list(names)
+
+    def value_score_frame(self):
+        df = self.tables['value_score_df'].frame(outer_is_index=False)
+        df.index = df.index.astype(int)
+        return df
+
+    def data_frame(self):
+        return self.tables['data_df'].frame(outer_is_index=True)
+
+    def breakpoints(self):
+        table = self.tables['value_score_df']
+        return {
+            criterion: (table.values[j], table.values[table.outer[criterion + '_score']])
+            for criterion, j in table.outer.items()
+            if not criterion.endswith('_score')
+        }
+
+
+    def nested(self, section):
+        # {outer: {inner: value}} as saved, without the NaN padding
+        table = self.tables[section]
+        return {
+            outer: {
+                inner: table.values[i, j]
+                for inner, j in table.inner.items()
+                if not np.isnan(table.values[i, j])
+            }
+            for outer, i in table.outer.items()
+        }
+
+    ## Weight scenarios
+    def scenarios(self):
+        return self.nested('scenarios')
+
+    ## Must-have thresholds
+    def constraints(self):
+        return self.nested('constraints')
+
+    ## Derived criteria
+    def derived(self):
+        return dict(self.tables['derived'].values)
+
+
+def read_document(open_stream, chunk_size=1 << 16):
+    # One pass over the stream opened by open_stream()
+    document = LegacyDocument()
+    with open_stream() as f:
+        document.read(Stream(f, chunk_size))
+    return document
@@ -1,7 +1,6 @@
 import numpy as np
-import pandas as pd
-from matrix import Matrix
 from PySide2.QtCore import QSettings, QCoreApplication
+from PySide2.QtGui import QBrush, QColor
 from PySide2.QtWidgets import (
     QWidget,
     QTableWidgetItem,
@@ -11,14 +10,40 @@ from PySide2.QtWidgets import (
     QGroupBox,
     QVBoxLayout,
     QHBoxLayout,
+    QInputDialog,
+    QLineEdit,
 )
 
 from gui.setup import SetupUIMixin
-from gui.core import AbstractDataTab, AbstractValueScoreLayout
+from gui import constraints, engines, pareto, scenarios, search
+from gui.core import AbstractDataTab, AbstractValueScoreLayout, set_quietly
+from gui.io import IO
+from gui.model import ArrayMatrix
+from gui.observable import Notifier
+from gui.profiling import instrument
+from gui.undo import (
+    UndoStack,
+    CommandGroup,
+    CellEdit,
+    ValueScoreEdit,
+    PairDelete,
+    DataEdit,
+    RowAdd,
+    RowDelete,
+    ColumnAdd,
+    ColumnDelete,
+)
+from gui.worker import ComputeWorker
 
 
 _translate = QCoreApplication.translate
 
+# Matrices with more cells than this are recalculated off the UI thread
+BACKGROUND_CELLS = 20_000
+
+# Background of choices off the Pareto front
+DOMINATED = QColor(225, 225, 225)
+
 
 def safe_float(string, fallback: 'T' = None) -> 'Union[float, T]':
     try:
@@ -29,19 +54,47 @@ def safe_float(string, fallback: 'T' = None) -> 'Union[float, T]':
         return 0.0
 
 
+def format_number(value):
+    # '4' rather than '4.0', so that the cell passes cell_changed's isdigit check
+    return '' if np.isnan(value) else f'{value:g}'
+
+
 class ValueScoreTab(AbstractValueScoreLayout):
     def __init__(self, other):
         super().__init__(other.cc_grid)
+        self.parent = other
         self.matrix = other.matrix
         self.tab_1 = other.matrix_tab
 
     def initializePage(self, criteria):
-        criteria_filtered = [
-            x for x in criteria
-            if x not in self.rows_for_each_criteria.keys()
-        ]
+        criteria_filtered = [x for x in criteria if x not in self.rows_for_each_criteria]
         super().initializePage(criteria_filtered)
 
+    def update_matrix(self, value, score, criterion, index):
+        self.parent.record_pair_edit(criterion, index, (value, score))
+        super().update_matrix(value, score, criterion, index)
+
+    def delete(self, criterion, idx):
+        self.parent.record_pair_delete(criterion, idx)
+        super().delete(criterion, idx)
+
+    def restore_pair(self, criterion, index, value, score):
+        # The spin boxes follow through show_pair
+        self.matrix.set_breakpoint(criterion, index, value, score)
+        self.matrix.rescore_dirty()
+        self.parent.update_percentage_display()
+
+    def insert_pair(self, criterion, index, value, score):
+        # The rows follow through show_pairs
+        self.matrix.insert_breakpoint(criterion, index, value, score)
+        self.matrix.rescore_dirty()
+        self.parent.update_percentage_display()
+
+    def remove_pair(self, criterion, index):
+        self.matrix.remove_breakpoint(criterion, index)
+        self.matrix.rescore_dirty()
+        self.parent.update_percentage_display()
+
 
 class DataTab(AbstractDataTab):
     def __init__(self, parent):
@@ -49,17 +102,32 @@ class DataTab(AbstractDataTab):
         self.parent = parent
         self.matrix = parent.matrix
 
-    def sync(self, choice, criterion, value):
-        row = self.matrix.df.index.get_loc(choice)
-        column = self.matrix.df.columns.get_loc(criterion)
-        item = QTableWidgetItem(str(value))
-        self.parent.matrix_widget.setItem(row, column, item)
-        self.parent.max_total_changed(column)
+    def matrix_action(self, choice, criterion_, value_):
+        self.parent.record_data_edit(choice, criterion_, value_)
+        super().matrix_action(choice, criterion_, value_)
+
+    def current_value(self, choice, criterion):
+        df = self.matrix.data_df
+        if choice in df.index and criterion in df.columns:
+            return df.at[choice, criterion]
+        return np.nan
+
+    def show_value(self, choice, criterion):
+        if criterion in self.spin_boxes.get(choice, ()):
+            set_quietly(
+                self.current_value(choice, criterion),
+                self.spin_boxes[choice][criterion], self.sliders[choice][criterion],
+            )
+
+    def restore_value(self, choice, criterion, value):
+        # The sliders here and in the wizard follow through show_value
+        self.matrix.add_data(choice, {criterion: value})
 
 
 class MatrixTabMixin:
     # Tab 1
     ## Callbacks
+    @instrument
     def cell_changed(self, row, column):
         # Prevent infinite recursion
         if column == self.matrix_widget.columnCount() - 1:
@@ -87,10 +155,24 @@ class MatrixTabMixin:
             self.pushButton.clicked.connect(self.add_column)
             self.pushButton.setText(_translate("MainWindow", "Add column", None))
 
+    @instrument
     def add_row(self):
         if not (new_row_name := self.lineEdit.text()):
             return
+        # Rows are looked up by name; a taken one becomes 'name (2)'
+        new_row_name = self.matrix.unique_choice(new_row_name)
+
+        self.add_row_widgets(new_row_name)
+        self.lineEdit.clear()
+        self.lineEdit.setFocus()
 
+        self.matrix.add_choices(new_row_name)
+        self.undo_stack.push(
+            RowAdd(self.matrix.choice_position(new_row_name) + 1, new_row_name, self.matrix.shape[1])
+        )
+        return new_row_name
+
+    def add_row_widgets(self, new_row_name):
         current_row_count = self.matrix_widget.rowCount()
         self.matrix_widget.setRowCount(current_row_count + 1)
 
@@ -103,33 +185,43 @@ class MatrixTabMixin:
 
         self.set_last_column_uneditable()
         self.set_continuous_cells_uneditable()
-        self.lineEdit.clear()
-        self.lineEdit.setFocus()
+        self.invalidate_compute()
+        self.add_data_widgets(new_row_name)
 
+    def add_data_widgets(self, choice):
         # Add to data tab
-        if type(self.data_grid.itemAt(0).widget()) == QLabel:
+        if (first := self.data_grid.itemAt(0)) and type(first.widget()) == QLabel:
             self.data_grid.takeAt(0).widget().deleteLater()
 
-        groupbox = QGroupBox(new_row_name)
+        groupbox = QGroupBox(choice)
         QVBoxLayout(groupbox)
 
         # Copied
         for criterion_name in self.matrix.continuous_criteria:
+            if criterion_name in self.matrix.derived:
+                continue
             inner_grid = QHBoxLayout()
-            self.data_tab_page.add_row(inner_grid, new_row_name, criterion_name)
+            self.data_tab_page.add_row(inner_grid, choice, criterion_name)
             groupbox.layout().addLayout(inner_grid)
             self.data_grid.addWidget(groupbox)
 
         self.data_grid.addWidget(groupbox)
-        self.data_tab_groupboxes[new_row_name] = groupbox
+        self.data_tab_groupboxes[choice] = groupbox
 
-        self.matrix.add_choices(new_row_name)
+    def remove_data_widgets(self, choice):
+        if (groupbox := self.data_tab_groupboxes.pop(choice, None)) is not None:
+            self.data_grid.removeWidget(groupbox)
+            groupbox.deleteLater()
+        self.data_tab_page.sliders.pop(choice, None)
+        self.data_tab_page.spin_boxes.pop(choice, None)
 
+    @instrument
     def add_column(self):
         # New column will be second last column; last column is always Percentage
         # Add new column on the right, then copy the values in Percentage to the new column
         if not (new_col_name := self.lineEdit.text()):
             return
+        new_col_name = self.new_criterion_name(new_col_name)
 
         # WARNING: column count starts from 1, but the column argument in setters start from 0!!!
         self.matrix_widget.setColumnCount(self.matrix_widget.columnCount() + 1)
@@ -158,8 +250,20 @@ class MatrixTabMixin:
 
         self.lineEdit.clear()
         self.lineEdit.setFocus()
+        self.invalidate_compute()
 
         self.matrix.add_criterion(new_col_name, weight=float('nan'))
+        self.undo_stack.push(
+            ColumnAdd(new_col_pos, new_col_name, self.matrix.shape[0] + 1)
+        )
+        return new_col_name
+
+    def new_criterion_name(self, name):
+        # While a file loads, its criteria are in the matrix before their
+        # columns are added; otherwise a taken name becomes 'name (2)'
+        if self.matrix_widget.columnCount() - 1 < self.matrix.shape[1]:
+            return name
+        return self.matrix.unique_criterion(name)
 
     def delete_row(self):
         bottom_fn = lambda x: x.topRow()
@@ -169,14 +273,16 @@ class MatrixTabMixin:
             return
 
         deleted_rows = []
+        commands = []
         for the_range in reversed(selected_ranges):
             rows = range(the_range.topRow(), the_range.bottomRow() + 1)
             for row in reversed(rows):
                 # If weights row selected, do nothing silently
                 if row != 0 and row not in deleted_rows:
-                    self.matrix_widget.removeRow(row)
-                    self.matrix.df.drop(self.matrix.df.index[row], inplace=True)
+                    commands.append(self.delete_choice(row))
                     deleted_rows.append(row)
+        if commands:
+            self.undo_stack.push(CommandGroup(commands))
 
     def delete_column(self):
         percentage_col = self.matrix_widget.columnCount() - 1
@@ -189,52 +295,475 @@ class MatrixTabMixin:
             return
 
         deleted_columns = []
+        commands = []
         for the_range in reversed(selected_ranges):
             cols = range(the_range.leftColumn(), the_range.rightColumn() + 1)
             for col in reversed(cols):
                 if col != percentage_col and col not in deleted_columns:
-                    self.matrix_widget.removeColumn(col)
-                    self.matrix.df.drop(
-                        self.matrix.df.columns[col], axis='columns', inplace=True
-                    )
+                    commands.append(self.delete_criterion(col))
                     deleted_columns.append(col)
-
+        if commands:
+            self.undo_stack.push(CommandGroup(commands))
+
+    def delete_choice(self, row) -> 'RowDelete':
+        # Returns the command that brings it back, for the caller to push
+        choice = self.matrix.choices[row - 1]
+        command = RowDelete(
+            row, choice, self.matrix.ratings[row - 1].copy(), self.matrix.choice_data(choice),
+        )
+        self.remove_choice(row)
+        return command
+
+    def delete_criterion(self, col) -> 'ColumnDelete':
+        # Returns the command that brings it back, for the caller to push
+        criterion = self.matrix.all_criteria[col]
+        command = ColumnDelete(
+            col, criterion, self.column_values(col), self.matrix.criterion_extras(criterion),
+        )
+        self.remove_criterion(col)
+        return command
 
     ## Sub-routines
     def set_continuous_cells_uneditable(self):
-        for continuous_idx, criterion in enumerate(self.matrix.all_criteria):
-            if criterion in self.matrix.continuous_criteria:
-                for row in range(1, self.matrix_widget.rowCount()):
-                    self.set_cell_uneditable(row, continuous_idx)
+        for continuous_idx in np.flatnonzero(self.matrix.continuous_mask):
+            for row in range(1, self.matrix_widget.rowCount()):
+                self.set_cell_uneditable(row, continuous_idx)
 
+    @instrument
     def max_total_changed(self, column):
         new_weight = self.matrix_widget.item(0, column)
         criterion_name = self.matrix_widget.horizontalHeaderItem(column)
+        large = self.is_large_matrix()
         if new_weight and criterion_name:
-            self.matrix.update_weight(criterion_name.text(), safe_float(new_weight.text()))
+            self.edit_cell(0, column, safe_float(new_weight.text()))
 
-        self.update_percentage_display()
-        max_total = self.matrix.df.loc['Weight'].sum() * 10
-        item = QTableWidgetItem(str(max_total))
-        last_col = self.matrix_widget.columnCount()
-        self.set_item_uneditable(item, 0, last_col - 1)
+        if not large:
+            self.update_percentage_display()
+        self.update_max_total_display()
 
+    @instrument
     def rating_changed(self, row, column):
         new_rating = self.matrix_widget.item(row, column)
         choice = self.matrix_widget.verticalHeaderItem(row)
         criterion_name = self.matrix_widget.horizontalHeaderItem(column)
         if new_rating and criterion_name and choice:
-            self.matrix.update_rating(choice.text(), criterion_name.text(), safe_float(new_rating.text()))
+            self.edit_cell(row, column, safe_float(new_rating.text()))
+            if self.is_large_matrix():
+                return
 
         self.update_percentage_display()
 
+    @instrument
     def update_percentage_display(self):
-        it = zip(self.matrix.df.loc[:, 'Percentage'][1:], range(1, self.matrix_widget.rowCount()))
+        if self.matrix.scoring_deferred:
+            return
+        if self.heatmap_dock:
+            self.heatmap_dock.scores_changed()
+        it = zip(self.matrix.percentages, range(1, self.matrix_widget.rowCount()))
         for value, row in it:
             item = QTableWidgetItem(str(round(value, 2)) + '%')
             if (last_col := self.matrix_widget.columnCount()):
                 self.set_item_uneditable(item, row, last_col - 1)
 
+    def update_max_total_display(self):
+        max_total = np.nansum(self.matrix.weights) * 10
+        item = QTableWidgetItem(str(max_total))
+        last_col = self.matrix_widget.columnCount()
+        self.set_item_uneditable(item, 0, last_col - 1)
+
+    ## Document model
+    def apply_changes(self, changes):
+        # The matrix was edited, here or in the wizard, and has been scored
+        # already; only the widgets catch up, with their signals blocked
+        self.matrix_widget.blockSignals(True)
+        for row, column in self.changed_cells(changes):
+            text = format_number(self.cell_value(row, column))
+            if (item := self.matrix_widget.item(row, column)):
+                item.setText(text)  # Keeps the item's flags
+            else:
+                self.matrix_widget.setItem(row, column, QTableWidgetItem(text))
+        self.matrix_widget.blockSignals(False)
+
+        if self.cc_tab_page:
+            for criterion, index in changes['breakpoint']:
+                self.cc_tab_page.show_pair(criterion, index)
+            for criterion in changes['pairs']:
+                self.cc_tab_page.show_pairs(criterion)
+        for choice, criterion in changes['data']:
+            self.data_tab_page.show_value(choice, criterion)
+
+        if not self.matrix.percentages_stale:
+            self.update_percentage_display()
+        else:
+            self.recompute_stale()
+        if changes['weight']:
+            self.update_max_total_display()
+        if self.master_tab_widget.currentWidget() is self.scenario_tab:
+            self.update_scenario_display()
+        if self.pareto is not None:
+            self.update_pareto(changes)
+        if self.heatmap_dock:
+            self.heatmap_dock.apply_changes(changes)
+        if changes['shape']:
+            self.update_search_index(changes)
+        if self.matrix.constraints.bounds or changes['constraint']:
+            self.update_hidden_rows(changes)
+
+    def changed_cells(self, changes):
+        # Table (row, column) of every changed weight and rating; names
+        # removed since the edit are skipped
+        matrix = self.matrix
+        rows = self.matrix_widget.rowCount()
+        columns = self.matrix_widget.columnCount() - 1  # Last is Percentage
+        cells = [(None, criterion) for criterion in changes['weight']]
+        cells += changes['rating'] + changes['data']
+        for criterion in changes['column']:
+            cells += [(choice, criterion) for choice in matrix.choices]
+        for choice, criterion in dict.fromkeys(cells):
+            try:
+                row = 0 if choice is None else matrix.choice_position(choice) + 1
+                column = matrix.criterion_position(criterion)
+            except KeyError:
+                continue
+            if row < rows and column < columns:
+                yield row, column
+
+    def scroll_to_cell(self, row, column):
+        # From the heatmap: a choice row, and a criterion or the Percentage
+        # column past the last one
+        column = min(column, self.matrix_widget.columnCount() - 1)
+        self.matrix_widget.setCurrentCell(row + 1, column)
+
+    ## Search
+    def focus_search_box(self):
+        self.master_tab_widget.setCurrentWidget(self.matrix_tab)
+        self.search_box.setFocus()
+        self.search_box.selectAll()
+
+    def search_changed(self, text):
+        self.highlight_matches(text)
+        self.match_position = -1
+        self.next_match()
+
+    def highlight_matches(self, text):
+        # Matching headers are shown in bold
+        if text and self.names is None:
+            self.names = search.NameSearch(
+                [('choice', c) for c in self.matrix.choices]
+                + [('criterion', c) for c in self.matrix.all_criteria]
+            )
+        for match in self.matches:
+            self.set_header_bold(*match, False)
+        self.matches = self.names.search(text) if text else []
+        for match in self.matches:
+            self.set_header_bold(*match, True)
+
+    def next_match(self):
+        # Return in the search box moves on to the next match
+        if not self.matches:
+            return
+        self.match_position = (self.match_position + 1) % len(self.matches)
+        kind, name = self.matches[self.match_position]
+        widget = self.matrix_widget
+        if kind == 'choice':
+            widget.setCurrentCell(self.matrix.choice_position(name) + 1, max(widget.currentColumn(), 0))
+        else:
+            widget.setCurrentCell(max(widget.currentRow(), 0), self.matrix.criterion_position(name))
+
+    def set_header_bold(self, kind, name, bold):
+        try:
+            if kind == 'choice':
+                item = self.matrix_widget.verticalHeaderItem(self.matrix.choice_position(name) + 1)
+            else:
+                item = self.matrix_widget.horizontalHeaderItem(self.matrix.criterion_position(name))
+        except KeyError:
+            return  # Since removed
+        if item:
+            font = item.font()
+            font.setBold(bold)
+            item.setFont(font)
+
+    def update_search_index(self, changes):
+        # Kept in step once built; matches are highlighted again
+        for key in changes['shape']:
+            if self.names is None:
+                break
+            if key is None:
+                self.names = None
+                break
+            kind, name = key
+            position = self.matrix.choice_position if kind == 'choice' else self.matrix.criterion_position
+            try:
+                position(name)
+            except KeyError:
+                self.names.remove(kind, name)
+            else:
+                self.names.add(kind, name)
+        if (text := self.search_box.text()):
+            self.highlight_matches(text)
+
+    ## Constraints
+    def set_constraint(self):
+        if not (criteria := self.matrix.all_criteria):
+            return
+        criterion, ok = QInputDialog.getItem(
+            None, 'Constraint', 'Every choice must meet a threshold on', criteria, 0, False
+        )
+        if not ok:
+            return
+        current = constraints.describe(self.matrix.constraints.bounds.get(criterion, {}))
+        text, ok = QInputDialog.getText(
+            None, 'Constraint', f'{criterion} must be (>= 3, <= 500 or 3..500; empty for any)',
+            QLineEdit.Normal, current
+        )
+        if not ok:
+            return
+        try:
+            bounds = constraints.parse(text) if text.strip() else {}
+        except ValueError as e:
+            QMessageBox.warning(None, 'Invalid constraint', str(e), QMessageBox.Ok, QMessageBox.Ok)
+            return
+        # The rows follow through apply_changes
+        self.matrix.set_constraint(criterion, bounds)
+
+    def update_hidden_rows(self, changes):
+        # Choices failing a constraint are hidden, but stay in the matrix;
+        # only rows that were shown and now fail, or the other way round,
+        # are touched
+        passing = self.matrix.constraints.passing(self.matrix)
+        if changes['shape'] or self.shown is None or len(self.shown) != len(passing):
+            rows = range(len(passing))
+        else:
+            rows = np.flatnonzero(passing != self.shown)
+        for row in rows:
+            self.matrix_widget.setRowHidden(row + 1, not passing[row])
+        self.shown = passing
+
+    ## Pareto front
+    def toggle_pareto(self, checked):
+        if checked:
+            self.pareto = pareto.ParetoFront(self.matrix.ratings)
+            self.shade_rows(range(len(self.pareto.front)))
+        else:
+            front, self.pareto = self.pareto, None
+            if front is not None:
+                self.shade_rows(np.flatnonzero(~front.front))
+
+    def update_pareto(self, changes):
+        # A rating edit only moves the rows whose status it changed, and its
+        # own row, whose item may be new; anything else recomputes the front
+        if changes['shape'] or changes['column'] or self.pareto.shape != self.matrix.ratings.shape:
+            self.toggle_pareto(False)
+            self.toggle_pareto(True)
+            return
+        rows = set()
+        for choice, criterion in changes['rating'] + changes['data']:
+            try:
+                row = self.matrix.choice_position(choice)
+            except KeyError:
+                continue
+            rows.add(row)
+            rows.update(self.pareto.rating_changed(row, self.matrix.ratings[row]).tolist())
+        self.shade_rows(sorted(rows))
+
+    def shade_rows(self, rows):
+        # Table row = choice row + 1, below the weights; the Percentage
+        # column is rebuilt on every score, so it is left alone
+        front = self.pareto.front if self.pareto is not None else None
+        dominated, default = QBrush(DOMINATED), QBrush()
+        self.matrix_widget.blockSignals(True)
+        for row in rows:
+            brush = dominated if front is not None and not front[row] else default
+            if (header := self.matrix_widget.verticalHeaderItem(row + 1)):
+                header.setBackground(brush)
+            for column in range(self.matrix_widget.columnCount() - 1):
+                if (item := self.matrix_widget.item(row + 1, column)):
+                    item.setBackground(brush)
+        self.matrix_widget.blockSignals(False)
+
+    ## Undo and redo
+    def cell_value(self, row, column):
+        if row == 0:
+            return self.matrix.weights[column]
+        return self.matrix.ratings[row - 1, column]
+
+    def column_values(self, column):
+        # Weight first, then every rating
+        return np.concatenate([self.matrix.weights[column:column + 1], self.matrix.ratings[:, column]])
+
+    def record_cell_edit(self, row, column, new):
+        choices, criteria = self.matrix.shape
+        if row <= choices and column < criteria:
+            if (old := self.cell_value(row, column)) != new:
+                self.undo_stack.push(CellEdit(row, column, old, new))
+
+    def edit_cell(self, row, column, value):
+        # A weight (row 0) or rating at its table position, typed here or
+        # set in the wizard: recorded, then scored here or on the worker
+        self.record_cell_edit(row, column, value)
+        if self.is_large_matrix():
+            if row == 0:
+                self.edit_in_background('weight', column, value)
+            else:
+                self.edit_in_background('rating', row - 1, column, value)
+        elif row == 0:
+            self.matrix.set_weight_at(column, value)
+        else:
+            self.matrix.set_rating_at(row - 1, column, value)
+
+    def record_pair_edit(self, criterion, index, new):
+        if (old := self.matrix.breakpoint(criterion, index)) != new:
+            self.undo_stack.push(ValueScoreEdit(criterion, index, old, new))
+
+    def record_pair_delete(self, criterion, index):
+        if index < len(self.matrix.breakpoints.get(criterion, ())):
+            self.undo_stack.push(
+                PairDelete(criterion, index, self.matrix.breakpoint(criterion, index))
+            )
+
+    def record_data_edit(self, choice, criterion, new):
+        if (old := self.data_tab_page.current_value(choice, criterion)) != new:
+            self.undo_stack.push(DataEdit(choice, criterion, old, new))
+
+    def restore_cell(self, row, column, value):
+        self.matrix_widget.blockSignals(True)
+        self.matrix_widget.setItem(row, column, QTableWidgetItem(format_number(value)))
+        self.matrix_widget.blockSignals(False)
+
+        if row == 0:
+            self.matrix.set_weight_at(column, value)
+        else:
+            self.matrix.set_rating_at(row - 1, column, value)
+        self.update_percentage_display()
+        self.update_max_total_display()
+        self.invalidate_compute()
+
+    def insert_choice(self, position, name, values, data=None):
+        self.matrix_widget.blockSignals(True)
+        self.matrix_widget.insertRow(position)
+        self.matrix_widget.setVerticalHeaderItem(position, QTableWidgetItem(name))
+        for column, value in enumerate(values):
+            item = QTableWidgetItem(format_number(value))
+            self.matrix_widget.setItem(position, column, item)
+        self.matrix_widget.blockSignals(False)
+
+        self.matrix.insert_choice(position - 1, name, values)
+        # The sliders show the data through apply_changes
+        self.add_data_widgets(name)
+        if data:
+            self.matrix.add_data(name, data)
+
+        self.set_last_column_uneditable()
+        self.set_continuous_cells_uneditable()
+        self.update_percentage_display()
+        self.invalidate_compute()
+
+    def remove_choice(self, position):
+        self.matrix_widget.removeRow(position)
+        self.remove_data_widgets(self.matrix.choices[position - 1])
+        self.matrix.remove_choice(position - 1)
+        self.invalidate_compute()
+
+    def insert_criterion(self, position, name, values, extras=None):
+        self.matrix_widget.blockSignals(True)
+        self.matrix_widget.insertColumn(position)
+        self.matrix_widget.setHorizontalHeaderItem(position, QTableWidgetItem(name))
+        for row, value in enumerate(values):
+            item = QTableWidgetItem(format_number(value))
+            self.matrix_widget.setItem(row, position, item)
+        self.matrix_widget.blockSignals(False)
+
+        self.matrix.insert_criterion(position, name, values[0], values[1:])
+        if extras:
+            # Its value/score rows and sliders follow through apply_changes
+            self.matrix.restore_criterion(name, extras)
+            if extras['continuous']:
+                if not self.cc_tab_page:
+                    self.cc_tab_page = ValueScoreTab(self)
+                self.cc_tab_page.initializePage([name])
+
+        self.set_continuous_cells_uneditable()
+        self.update_percentage_display()
+        self.update_max_total_display()
+        self.invalidate_compute()
+
+    def remove_criterion(self, position):
+        self.matrix_widget.removeColumn(position)
+        self.matrix.remove_criterion(position)
+        self.update_percentage_display()
+        self.update_max_total_display()
+        self.invalidate_compute()
+
+    def set_engine(self, name):
+        self.matrix.set_engine(engines.ENGINES[name]())
+        self.invalidate_compute()
+        self.update_percentage_display()
+
+    def undo(self):
+        self.undo_stack.undo(self)
+
+    def redo(self):
+        self.undo_stack.redo(self)
+
+    ## Background computation
+    def is_large_matrix(self):
+        choices, criteria = self.matrix.shape
+        return choices * criteria > BACKGROUND_CELLS
+
+    def submit_compute(self, command, *args):
+        if self.matrix.scoring_deferred:
+            return  # Scored as a whole afterwards
+        if self.worker is None:
+            self.worker = ComputeWorker()
+            self.worker.result_ready.connect(self.apply_compute_result)
+            QCoreApplication.instance().aboutToQuit.connect(self.worker.stop)
+            self.worker.start()
+
+        self.compute_version += 1
+        if self.compute_reset:
+            # The worker's copy is out of date; send everything, edit included
+            self.compute_reset = False
+            command, args = 'reset', (
+                self.matrix.weights.copy(), self.matrix.ratings.copy(), self.matrix.engine.name
+            )
+        self.worker.submit(self.compute_version, command, *args)
+
+    def edit_in_background(self, command, *args):
+        # A 'rating' (row, column, value) or 'weight' (column, value) edit,
+        # made without rescoring and sent on to the worker in step
+        self.sending_compute = True
+        try:
+            if command == 'rating':
+                self.matrix.set_rating_at(*args, rescore=False)
+            else:
+                self.matrix.set_weight_at(*args, rescore=False)
+        finally:
+            self.sending_compute = False
+        self.submit_compute(command, *args)
+
+    def invalidate_compute(self):
+        # Rows or columns changed, so results in flight no longer line up
+        self.compute_version += 1
+        self.compute_reset = True
+
+    def matrix_edited(self, kind, key):
+        # Told of every edit to the matrix as it is made, from any view.
+        # One not sent to the worker leaves its copy behind, so the next
+        # submit sends the whole matrix; see recompute_stale.
+        if kind != 'constraint' and not self.sending_compute:
+            self.invalidate_compute()
+
+    def recompute_stale(self):
+        # Percentages were left to a result that has since been discarded
+        if self.worker is not None and self.compute_reset and self.matrix.percentages_stale:
+            self.submit_compute('reset')
+
+    def apply_compute_result(self, version, percentages):
+        if version != self.compute_version:
+            return  # Stale; a newer result is on its way
+        self.matrix.set_percentages(percentages)
+        self.update_percentage_display()
+
     def delete_row_or_column(self, bottom_fn, top_fn, name, condition):
         selected_ranges = self.matrix_widget.selectedRanges()
 
@@ -262,7 +791,7 @@ class MatrixTabMixin:
         msgbox = QMessageBox()
         msgbox.setIcon(QMessageBox.Question)
         msgbox.setText(message)
-        msgbox.setInformativeText('This action cannot be undone (for now)!')
+        msgbox.setInformativeText('This action can be undone from the Edit menu.')
         msgbox.setStandardButtons(QMessageBox.Cancel | QMessageBox.Yes)
         msgbox.setDefaultButton(QMessageBox.Yes)
         checkbox = QCheckBox('Do not show this again')
@@ -283,11 +812,23 @@ class ValueScoreTabMixin:
         if not (criterion_name := self.line_edit_cc_tab.text()):
             return
 
+        # 'name = expression' adds a criterion whose data is computed from
+        # the other data columns
+        criterion_name, _, expression = criterion_name.partition('=')
+        criterion_name = self.new_criterion_name(criterion_name.strip())
+        if expression.strip():
+            try:
+                self.matrix.define_criterion(criterion_name, expression.strip())
+            except ValueError as e:
+                QMessageBox.warning(
+                    None, 'Invalid expression', str(e), QMessageBox.Ok, QMessageBox.Ok
+                )
+                return
+
         if not self.cc_tab_page:
             self.cc_tab_page = ValueScoreTab(self)
 
-        if criterion_name not in self.matrix.continuous_criteria:
-            self.matrix.continuous_criteria.append(criterion_name)
+        self.matrix.mark_continuous(criterion_name)
 
         self.cc_tab_page.initializePage(self.matrix.continuous_criteria)
 
@@ -303,24 +844,128 @@ class ValueScoreTabMixin:
         self.line_edit_cc_tab.setFocus()
 
         # Add to data tab
-        if type(self.data_grid.itemAt(0).widget()) == QLabel:
-            return
+        if (first := self.data_grid.itemAt(0)) and type(first.widget()) == QLabel:
+            return criterion_name
+        if criterion_name in self.matrix.derived:
+            return criterion_name
 
         for choice, groupbox in self.data_tab_groupboxes.items():
             inner_grid = QHBoxLayout()
             self.data_tab_page.add_row(inner_grid, choice, criterion_name)
             groupbox.layout().addLayout(inner_grid)
             self.data_grid.addWidget(groupbox)
+        return criterion_name
 
 
-class Ui_MainWindow(SetupUIMixin, MatrixTabMixin, ValueScoreTabMixin):
+class ScenarioTabMixin:
+    # Tab 4
+    ## Callbacks
+    def add_scenario(self):
+        if not (name := self.line_edit_scenario.text()):
+            return
+        self.matrix.scenarios.add(name, dict(zip(self.matrix.all_criteria, self.matrix.weights)))
+        self.line_edit_scenario.clear()
+        self.update_scenario_display()
+
+    def use_scenario(self):
+        if (column := self.scenario_widget.currentColumn()) < 0:
+            return
+        weights = self.matrix.scenarios.weights[self.matrix.scenarios.names[column]]
+        new = np.array([weights.get(c, np.nan) for c in self.matrix.all_criteria])
+
+        commands = [
+            CellEdit(0, position, old, value)
+            for position, (old, value) in enumerate(zip(self.matrix.weights, new))
+            if not (old == value or np.isnan(old) and np.isnan(value))
+        ]
+        if commands:
+            self.undo_stack.push(CommandGroup(commands))
+        # The table follows through apply_changes
+        self.matrix.set_weights(new)
+        self.invalidate_compute()
+
+    def delete_scenario(self):
+        if (column := self.scenario_widget.currentColumn()) < 0:
+            return
+        self.matrix.scenarios.remove(self.matrix.scenarios.names[column])
+        self.update_scenario_display()
+
+    def scenario_tab_shown(self, index):
+        if self.master_tab_widget.widget(index) is self.scenario_tab:
+            self.update_scenario_display()
+
+    ## Display
+    def update_scenario_display(self):
+        # Scores only what changed since last time; see scenarios.Scenarios
+        percentages = self.matrix.scenarios.score(self.matrix)
+        rescored = self.matrix.scenarios.rescored
+        # Choices failing a constraint are neither ranked nor shown
+        passing = self.matrix.constraints.passing(self.matrix)
+        ranks = scenarios.ranks(np.where(passing[:, None], percentages, np.nan))
+        widget = self.scenario_widget
+        shown_ranks, shown_passing = self.scenario_shown or (None, None)
+        if rescored is None or shown_ranks is None:
+            widget.setRowCount(len(self.matrix.choices))
+            widget.setColumnCount(len(self.matrix.scenarios.names))
+            widget.setVerticalHeaderLabels(self.matrix.choices)
+            widget.setHorizontalHeaderLabels(self.matrix.scenarios.names)
+            stale = np.ones(ranks.shape, dtype=bool)
+            hidden = np.arange(len(passing))
+        else:
+            # The cells scored again, and those whose rank moved because of them
+            rows, columns = rescored
+            if len(columns):
+                widget.setColumnCount(len(self.matrix.scenarios.names))
+                widget.setHorizontalHeaderLabels(self.matrix.scenarios.names)
+            stale = np.zeros(ranks.shape, dtype=bool)
+            stale[rows] = True
+            stale[:, columns] = True
+            kept = shown_ranks.shape[1]
+            stale[:, :kept] |= ranks[:, :kept] != shown_ranks
+            hidden = np.flatnonzero(passing != shown_passing)
+        for row, column in np.argwhere(stale).tolist():
+            text = f'{round(percentages[row, column], 2)}% (#{ranks[row, column]})'
+            if (item := widget.item(row, column)) is not None:
+                item.setText(text)
+            else:
+                widget.setItem(row, column, QTableWidgetItem(text))
+        for row in hidden.tolist():
+            widget.setRowHidden(row, not passing[row])
+        self.scenario_shown = ranks, passing
+
+
+class Ui_MainWindow(SetupUIMixin, MatrixTabMixin, ValueScoreTabMixin, ScenarioTabMixin):
     def __init__(self):
         # Make sure that mixins do not have an init method
-        self.matrix = Matrix()
+        self.matrix = ArrayMatrix()
+        # Path and codec of this matrix's file
+        self.io = IO()
+        # Set by DocumentTabs when this matrix is one tab of several
+        self.documents = None
         self.settings = QSettings('twenty5151', 'decision_matrix_qt')
         self.cc_tab_page = None
         self.data_tab_page = DataTab(self)
         self.data_tab_groupboxes = {}
+        self.undo_stack = UndoStack()
+        self.performance_dock = None
+        self.heatmap_dock = None
+        self.worker = None
+        self.compute_version = 0
+        self.compute_reset = True
+        # Set while an edit is being sent to the worker; see matrix_edited
+        self.sending_compute = False
+        # Tells every view about edits to the matrix; see apply_changes
+        self.notifier = Notifier()
+        # Set while the Pareto front is highlighted
+        self.pareto = None
+        # Which choices' rows are shown, after the constraints
+        self.shown = None
+        # Ranks and passing choices in the scenario table, to compare with
+        self.scenario_shown = None
+        # Choice and criterion names, indexed on the first search
+        self.names = None
+        self.matches = []
+        self.match_position = -1
 
         if not self.settings.contains('confirm_delete'):
             self.settings.setValue('confirm_delete', True)
@@ -0,0 +1,657 @@
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from matrix import Matrix
+
+from gui import engines
+from gui.constraints import Constraints
+from gui.expressions import DerivedCriteria
+from gui.scenarios import Scenarios
+
+
+class NameIndex:
+    # Names in order plus name -> position, kept in step on insert/remove.
+    # Names are unique: repeats among those loaded are renamed, and
+    # inserting a taken name is an error
+    def __init__(self, names=()):
+        self.names = list(names)
+        self.positions = {name: i for i, name in enumerate(self.names)}
+        # name -> the next number unique tries for it
+        self.suffixes: 'dict[str, int]' = {}
+        if len(self.positions) < len(self.names):
+            self.positions = {}
+            for i, name in enumerate(self.names):
+                if name in self.positions:
+                    name = self.names[i] = self.unique(name)
+                self.positions[name] = i
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __contains__(self, name):
+        return name in self.positions
+
+    def __getitem__(self, position):
+        return self.names[position]
+
+    def position(self, name):
+        return self.positions[name]
+
+    def unique(self, name):
+        # name, or the first of 'name (2)', 'name (3)'... not taken
+        if name not in self.positions:
+            return name
+        number = self.suffixes.get(name, 2)
+        while (renamed := f'{name} ({number})') in self.positions:
+            number += 1
+        self.suffixes[name] = number + 1
+        return renamed
+
+    def insert(self, position, name):
+        if name in self.positions:
+            raise ValueError(f'{name!r} is already taken')
+        self.names.insert(position, name)
+        for i in range(position, len(self.names)):
+            self.positions[self.names[i]] = i
+
+    def remove(self, position):
+        name = self.names.pop(position)
+        del self.positions[name]
+        for i in range(position, len(self.names)):
+            self.positions[self.names[i]] = i
+        return name
+
+
+class Breakpoints:
+    # One continuous criterion's value -> score pairs, in the order they are
+    # edited, with nothing but live pairs: deleting one closes the gap.
+    # A half-entered pair is NaN on its missing side until it is completed.
+    def __init__(self, values=(), scores=()):
+        self.values = np.asarray(values, dtype=float)
+        self.scores = np.asarray(scores, dtype=float)
+        self._sorted = None
+
+    def __len__(self):
+        return len(self.values)
+
+    def pair(self, index):
+        if index >= len(self.values):
+            return np.nan, np.nan
+        return self.values[index], self.scores[index]
+
+    def set(self, index, value, score):
+        if index >= len(self.values):
+            padding = np.full(index + 1 - len(self.values), np.nan)
+            self.values = np.concatenate([self.values, padding])
+            self.scores = np.concatenate([self.scores, padding])
+        self.values[index] = value
+        self.scores[index] = score
+        self._sorted = None
+
+    def remove(self, index):
+        self.values = np.delete(self.values, index)
+        self.scores = np.delete(self.scores, index)
+        self._sorted = None
+
+    def insert(self, index, value, score):
+        self.values = np.insert(self.values, index, value)
+        self.scores = np.insert(self.scores, index, score)
+        self._sorted = None
+
+    def sorted(self):
+        # Complete pairs in value order, which is what interpolation reads;
+        # rebuilt on the first use after an edit
+        if self._sorted is None:
+            keep = ~(np.isnan(self.values) | np.isnan(self.scores))
+            order = np.argsort(self.values[keep], kind='stable')
+            self._sorted = self.values[keep][order], self.scores[keep][order]
+        return self._sorted
+
+    def interpolate(self, values):
+        # Linear between breakpoints, clamped outside them
+        xs, ys = self.sorted()
+        if not len(xs):
+            return np.full(np.shape(values), np.nan)
+        return np.interp(values, xs, ys)
+
+
+class ArrayMatrix(Matrix):
+    # Same interface as Matrix, but weights, ratings and percentages live in
+    # preallocated NumPy arrays with dict-based name -> position lookups.
+    # `df` is only a view, built on demand (for saving, mostly); edit through
+    # the methods below, never through the frame.
+    def __init__(self, dtype=np.float64):
+        # Matrix.__init__ is deliberately not called; it would build a
+        # DataFrame that is thrown away immediately
+        self.dtype = dtype
+        # What the Percentage column shows; see gui.engines
+        self.engine = engines.WeightedSum()
+        # Ordered set of continuous criteria names; may be marked before the
+        # column exists. The bitmap below says which columns they are.
+        self._continuous: 'dict[str, None]' = {}
+        # Continuous criterion -> its value/score pairs
+        self.breakpoints: 'dict[str, Breakpoints]' = {}
+        self.data_df = pd.DataFrame()
+        # Continuous criteria whose data_df column is computed from others
+        self.derived = DerivedCriteria()
+        # Continuous criteria whose breakpoints changed since they were last scored
+        self._dirty: 'dict[str, None]' = {}
+        # Set while percentages are left to the ComputeWorker
+        self._stale = False
+        # Set inside deferred_scoring()
+        self._deferred = False
+        # Callables taking (kind, key), told about every value edit; see
+        # gui.observable.Changes for the kinds
+        self.observers = []
+        # Named weight sets, saved with the matrix
+        self.scenarios = Scenarios()
+        self.observers.append(self.scenarios.changed)
+        # Must-have thresholds; failing choices are hidden, not removed
+        self.constraints = Constraints()
+        self.observers.append(self.constraints.changed)
+        self.load_arrays([], [], np.empty(0), np.empty((0, 0)))
+        self._scored = False
+
+    @classmethod
+    def from_document(cls, document):
+        # document is a jsonstream.LegacyDocument, or anything shaped like one
+        matrix = cls()
+        matrix.continuous_criteria = document.continuous_criteria
+        matrix.load_arrays(document.choices, document.criteria, document.weights, document.ratings)
+        matrix.value_score_df = document.value_score_frame()
+        matrix.data_df = document.data_frame()
+        matrix.derived = DerivedCriteria(document.derived())
+        matrix.scenarios.load(document.scenarios())
+        matrix.constraints.load(document.constraints())
+        return matrix
+
+    ## Views
+    @property
+    def shape(self):
+        return len(self._choices), len(self._criteria)
+
+    @property
+    def choices(self) -> 'list[str]':
+        # Do not mutate
+        return self._choices.names
+
+    @property
+    def all_criteria(self) -> 'list[str]':
+        # Do not mutate
+        return self._criteria.names
+
+    @property
+    def criteria(self) -> 'list[str]':
+        return [c for c, continuous in zip(self._criteria, self.continuous_mask) if not continuous]
+
+    @property
+    def continuous_criteria(self) -> 'list[str]':
+        return list(self._continuous)
+
+    @continuous_criteria.setter
+    def continuous_criteria(self, criteria):
+        self._continuous = dict.fromkeys(criteria)
+        self._continuous_mask[:] = False
+        for criterion in self._continuous:
+            self.mark_continuous(criterion)
+
+    @property
+    def continuous_mask(self):
+        # True for every column that is a continuous criterion
+        return self._continuous_mask[:len(self._criteria)]
+
+    def is_continuous(self, criterion):
+        return criterion in self._continuous
+
+    def mark_continuous(self, criterion):
+        self._continuous[criterion] = None
+        if criterion in self._criteria:
+            self._continuous_mask[self._criteria.position(criterion)] = True
+
+    @property
+    def weights(self):
+        return self._weights[:len(self._criteria)]
+
+    @property
+    def ratings(self):
+        n, m = self.shape
+        return self._ratings[:n, :m]
+
+    @property
+    def percentages(self):
+        return self._percentages[:len(self._choices)]
+
+    def choice_position(self, choice):
+        return self._choices.position(choice)
+
+    def criterion_position(self, criterion):
+        return self._criteria.position(criterion)
+
+    def unique_choice(self, choice):
+        # choice, renamed if another choice has its name
+        return self._choices.unique(choice)
+
+    def unique_criterion(self, criterion):
+        return self._criteria.unique(criterion)
+
+    def weight(self, criterion):
+        return self._weights[self._criteria.position(criterion)]
+
+    @property
+    def df(self):
+        if self._frame is None:
+            self._frame = self.to_frame()
+        return self._frame
+
+    @df.setter
+    def df(self, df):
+        self.load_frame(df)
+
+    @property
+    def value_score_df(self):
+        # The saved layout: a criterion and a criterion_score column per
+        # criterion, NaN-padded to the one with the most pairs
+        columns = {}
+        for criterion, points in self.breakpoints.items():
+            columns[criterion] = pd.Series(points.values)
+            columns[criterion + '_score'] = pd.Series(points.scores)
+        return pd.DataFrame(columns)
+
+    @value_score_df.setter
+    def value_score_df(self, df):
+        # Rows empty for a criterion (holes left by older versions) are dropped
+        self.breakpoints = {}
+        for criterion in df.columns:
+            if criterion.endswith('_score') or criterion + '_score' not in df.columns:
+                continue
+            values = df[criterion].to_numpy(dtype=float)
+            scores = df[criterion + '_score'].to_numpy(dtype=float)
+            live = ~(np.isnan(values) & np.isnan(scores))
+            self.breakpoints[criterion] = Breakpoints(values[live], scores[live])
+        self._dirty.update(dict.fromkeys(self.breakpoints))
+
+    def breakpoint(self, criterion, index):
+        if criterion not in self.breakpoints:
+            return np.nan, np.nan
+        return self.breakpoints[criterion].pair(index)
+
+    def to_frame(self):
+        n, m = self.shape
+        values = np.empty((n + 1, m))
+        values[0] = self.weights
+        values[1:] = self.ratings
+        df = pd.DataFrame(values, index=['Weight', *self._choices], columns=list(self._criteria))
+        # Like Matrix, there is no Percentage column until something was scored
+        if self._scored:
+            df['Percentage'] = np.concatenate([[np.nan], self.percentages])
+        return df
+
+    ## Bulk loading
+    def load_frame(self, df):
+        criteria = [c for c in df.columns if c != 'Percentage']
+        values = df[criteria].to_numpy(dtype=float)
+        if len(values) == 0:
+            values = np.full((1, len(criteria)), np.nan)
+        self.load_arrays(list(df.index[1:]), criteria, values[0], values[1:])
+        self._scored = 'Percentage' in df.columns
+
+    def load_arrays(self, choices, criteria, weights, ratings):
+        self._choices = NameIndex(choices)
+        self._criteria = NameIndex(criteria)
+
+        n, m = self.shape
+        self._ratings = np.full((max(n, 4), max(m, 4)), np.nan, dtype=self.dtype)
+        self._weights = np.full(max(m, 4), np.nan, dtype=self.dtype)
+        self._percentages = np.full(max(n, 4), np.nan)
+        self._continuous_mask = np.zeros(max(m, 4), dtype=bool)
+        self._ratings[:n, :m] = ratings
+        self._weights[:m] = weights
+        self._continuous_mask[:m] = [c in self._continuous for c in self._criteria]
+        self.scenarios.invalidate()
+        self._rescore()
+        self._notify('shape', None)
+
+    def _reserve(self, rows, columns):
+        # Grow geometrically so appending is amortised O(1) per cell
+        capacity_rows, capacity_columns = self._ratings.shape
+        if rows <= capacity_rows and columns <= capacity_columns:
+            return
+        n, m = self.shape
+        if rows > capacity_rows:
+            capacity_rows = max(rows, capacity_rows * 2)
+        if columns > capacity_columns:
+            capacity_columns = max(columns, capacity_columns * 2)
+
+        ratings = np.full((capacity_rows, capacity_columns), np.nan, dtype=self.dtype)
+        ratings[:n, :m] = self.ratings
+        weights = np.full(capacity_columns, np.nan, dtype=self.dtype)
+        weights[:m] = self.weights
+        percentages = np.full(capacity_rows, np.nan)
+        percentages[:n] = self.percentages
+        continuous_mask = np.zeros(capacity_columns, dtype=bool)
+        continuous_mask[:m] = self.continuous_mask
+        self._ratings, self._weights, self._percentages = ratings, weights, percentages
+        self._continuous_mask = continuous_mask
+
+    def _notify(self, kind, key):
+        for observer in self.observers:
+            observer(kind, key)
+
+    ## Scoring
+    def set_engine(self, engine):
+        self.engine = engine
+        self._rescore()
+
+    @property
+    def scoring_deferred(self):
+        return self._deferred
+
+    @property
+    def percentages_stale(self):
+        # True until the ComputeWorker or a full rescore catches up
+        return self._stale
+
+    @contextmanager
+    def deferred_scoring(self):
+        # Edits inside only change the ratings and weights; afterwards the
+        # caller scores once, or sets known percentages
+        self._deferred = True
+        try:
+            yield
+        finally:
+            self._deferred = False
+            self.engine.invalidate()
+            self._stale = True
+            self._frame = None
+
+    def _rescore(self, rows=slice(None)):
+        if self._deferred:
+            self._frame = None
+            return
+        if rows == slice(None):
+            self._stale = False
+        self._apply_scores(self.engine.rows_changed(self.weights, self.ratings, rows))
+
+    def _apply_scores(self, changed):
+        index, scores = changed
+        self.percentages[index] = scores
+        self._frame = None
+
+    def set_percentages(self, percentages):
+        # Results computed elsewhere, e.g. by the ComputeWorker
+        self.percentages[:] = percentages
+        self._scored = True
+        self._stale = False
+        self._frame = None
+
+    def _calculate_percentage(self):
+        for criterion in self._continuous:
+            if self._score_continuous(criterion):
+                self._notify('column', criterion)
+        self._dirty.clear()
+        self._rescore()
+        self._scored = True
+
+    def _score_continuous(self, criterion):
+        if (
+            criterion not in self._criteria
+            or criterion not in self.breakpoints
+            or criterion not in self.data_df.columns
+        ):
+            return False
+        values = self.data_df[criterion].reindex(self.choices).to_numpy(dtype=float)
+        self.ratings[:, self._criteria.position(criterion)] = (
+            self.breakpoints[criterion].interpolate(values)
+        )
+        return True
+
+    def set_breakpoint(self, criterion, index, value, score):
+        # Takes effect at the next rescore_dirty()
+        self.breakpoints.setdefault(criterion, Breakpoints()).set(index, value, score)
+        self._dirty[criterion] = None
+        self._notify('breakpoint', (criterion, index))
+
+    def remove_breakpoint(self, criterion, index):
+        # Later pairs move up one; also takes effect at the next rescore_dirty()
+        if criterion in self.breakpoints and index < len(self.breakpoints[criterion]):
+            self.breakpoints[criterion].remove(index)
+            self._dirty[criterion] = None
+            self._notify('pairs', criterion)
+
+    def insert_breakpoint(self, criterion, index, value, score):
+        # Later pairs move down one, e.g. to undo remove_breakpoint
+        self.breakpoints.setdefault(criterion, Breakpoints()).insert(index, value, score)
+        self._dirty[criterion] = None
+        self._notify('pairs', criterion)
+
+    def rescore_dirty(self):
+        # Re-interpolates only the columns whose breakpoints changed, and lets
+        # the engine patch the scores column by column
+        if self._deferred:
+            return
+        dirty, self._dirty = self._dirty, {}
+        for criterion in dirty:
+            if criterion not in self._criteria:
+                continue
+            column = self._criteria.position(criterion)
+            old = self.ratings[:, column].copy()
+            if not self._score_continuous(criterion):
+                continue
+            if self._stale:
+                self._rescore()
+            else:
+                self._apply_scores(self.engine.column_changed(
+                    self.weights, self.ratings, self.percentages, column, old
+                ))
+            self._notify('column', criterion)
+        self._scored = True
+
+    ## Cell edits
+    def set_rating_at(self, row, column, rating, rescore=True):
+        old = self._ratings[row, column]
+        self._ratings[row, column] = rating
+        if rescore and not self._deferred:
+            self._apply_scores(
+                self.engine.rating_changed(self.weights, self.ratings, row, column, old)
+            )
+            self._scored = True
+        else:
+            self.engine.invalidate()
+            self._stale = True
+        self._frame = None
+        self._notify('rating', (self._choices[row], self._criteria[column]))
+
+    def set_weight_at(self, column, weight, rescore=True):
+        old = self._weights[column]
+        self._weights[column] = weight
+        if rescore and not self._deferred:
+            self._apply_scores(
+                self.engine.weight_changed(self.weights, self.ratings, column, old)
+            )
+            self._scored = True
+        else:
+            self.engine.invalidate()
+            self._stale = True
+        self._frame = None
+        self._notify('weight', self._criteria[column])
+
+    def set_weights(self, weights):
+        # Every weight at once, scored once
+        self.weights[:] = weights
+        self.engine.invalidate()
+        self._rescore()
+        self._scored = True
+        for criterion in self._criteria:
+            self._notify('weight', criterion)
+
+    def update_rating(self, choice, criterion, rating):
+        self.set_rating_at(
+            self._choices.position(choice), self._criteria.position(criterion), rating
+        )
+
+    def update_weight(self, criterion, weight):
+        self.set_weight_at(self._criteria.position(criterion), weight)
+
+    def rate_choices(self, ratings: 'dict[str, dict[str, float]]'):
+        for choice, criteria in ratings.items():
+            row = self._choices.position(choice)
+            for criterion, rating in criteria.items():
+                self._ratings[row, self._criteria.position(criterion)] = rating
+            self._rescore(slice(row, row + 1))
+            for criterion in criteria:
+                self._notify('rating', (choice, criterion))
+        self._scored = True
+
+    def add_data(self, choice, data: 'dict[str, float]'):
+        row = self._choices.position(choice)
+        for criterion, value in data.items():
+            self.data_df.loc[choice, criterion] = value
+        # Derived criteria that read these follow, for this choice only
+        derived = self.derived.dependents(data)
+        for criterion in derived:
+            value = self.derived[criterion].evaluate(self.data_df.loc[[choice]])[0]
+            self.data_df.loc[choice, criterion] = value
+
+        changed = [*data, *derived]
+        for criterion in changed:
+            if criterion in self.breakpoints and criterion in self._criteria:
+                rating = self.breakpoints[criterion].interpolate(self.data_df.at[choice, criterion])
+                self._ratings[row, self._criteria.position(criterion)] = rating
+        self._rescore(slice(row, row + 1))
+        self._scored = True
+        for criterion in changed:
+            self._notify('data', (choice, criterion))
+
+    def set_constraint(self, criterion, bounds: 'dict[str, float]'):
+        # bounds has a 'min', a 'max' or both; empty removes the constraint
+        self.constraints.set(criterion, bounds)
+        self._notify('constraint', criterion)
+
+    def define_criterion(self, criterion, text):
+        # A continuous criterion whose data is an expression over other data
+        # columns, e.g. 'price / units'; raises ValueError if it cannot be one
+        self.derived.define(criterion, text)
+        self.mark_continuous(criterion)
+        self.derive([criterion])
+
+    def derive(self, criteria):
+        # Recomputes derived criteria among criteria, and those reading them,
+        # for every choice at once
+        derived = [c for c in criteria if c in self.derived]
+        for criterion in derived + self.derived.dependents(criteria):
+            self.data_df[criterion] = self.derived[criterion].evaluate(self.data_df)
+            self._dirty[criterion] = None
+        self.rescore_dirty()
+
+    def criterion_value_to_score(self, criterion, value_to_score: 'dict[float, float]'):
+        self.breakpoints[criterion] = Breakpoints(
+            list(value_to_score.keys()), list(value_to_score.values())
+        )
+        self._dirty[criterion] = None
+        self.rescore_dirty()
+
+    ## Structural edits
+    def add_choices(self, *choices):
+        for choice in choices:
+            if choice not in self._choices:
+                self.insert_choice(len(self._choices), choice)
+
+    def insert_choice(self, position, choice, ratings=np.nan):
+        n, m = self.shape
+        self._reserve(n + 1, m)
+        self._ratings[position + 1:n + 1, :m] = self._ratings[position:n, :m]
+        self._ratings[position, :m] = ratings
+        self._percentages[position + 1:n + 1] = self._percentages[position:n]
+
+        self._choices.insert(position, choice)
+        self._rescore(slice(position, position + 1))
+        self._notify('shape', ('choice', choice))
+
+    def remove_choice(self, position):
+        n, m = self.shape
+        self._ratings[position:n - 1, :m] = self._ratings[position + 1:n, :m]
+        self._ratings[n - 1, :m] = np.nan
+        self._percentages[position:n - 1] = self._percentages[position + 1:n]
+
+        choice = self._choices.remove(position)
+        if choice in self.data_df.index:
+            self.data_df = self.data_df.drop(index=choice)
+        # No row's ratings changed, but engines that look at whole columns care
+        self._rescore(slice(position, position))
+        self._notify('shape', ('choice', choice))
+
+    def choice_data(self, choice) -> 'dict[str, float]':
+        # What remove_choice drops besides the ratings; add_data puts it back
+        if choice not in self.data_df.index:
+            return {}
+        return self.data_df.loc[choice].dropna().to_dict()
+
+    def add_criterion(self, criterion, weight=np.nan):
+        if criterion not in self._criteria:
+            self.insert_criterion(len(self._criteria), criterion, weight)
+
+    def add_continuous_criterion(self, criterion, weight=np.nan):
+        self.add_criterion(criterion, weight)
+        self.mark_continuous(criterion)
+
+    def insert_criterion(self, position, criterion, weight=np.nan, ratings=np.nan):
+        n, m = self.shape
+        self._reserve(n, m + 1)
+        self._ratings[:n, position + 1:m + 1] = self._ratings[:n, position:m]
+        self._ratings[:n, position] = ratings
+        self._weights[position + 1:m + 1] = self._weights[position:m]
+        self._weights[position] = weight
+        self._continuous_mask[position + 1:m + 1] = self._continuous_mask[position:m]
+        self._continuous_mask[position] = criterion in self._continuous
+
+        self._criteria.insert(position, criterion)
+        self._rescore()
+        self._notify('shape', ('criterion', criterion))
+
+    def remove_criterion(self, position):
+        n, m = self.shape
+        self._ratings[:n, position:m - 1] = self._ratings[:n, position + 1:m]
+        self._ratings[:n, m - 1] = np.nan
+        self._weights[position:m - 1] = self._weights[position + 1:m]
+        self._weights[m - 1] = np.nan
+        self._continuous_mask[position:m - 1] = self._continuous_mask[position + 1:m]
+        self._continuous_mask[m - 1] = False
+
+        criterion = self._criteria.remove(position)
+        self._continuous.pop(criterion, None)
+        self.derived.remove(criterion)
+        self.breakpoints.pop(criterion, None)
+        self._dirty.pop(criterion, None)
+        if criterion in self.data_df.columns:
+            self.data_df = self.data_df.drop(columns=criterion)
+        self._rescore()
+        self._notify('shape', ('criterion', criterion))
+
+    def criterion_extras(self, criterion) -> 'dict':
+        # What remove_criterion drops besides the weight and ratings, for
+        # restore_criterion to put back
+        points = self.breakpoints.get(criterion)
+        data = self.data_df.get(criterion)
+        return {
+            'continuous': criterion in self._continuous,
+            'derived': self.derived[criterion].text if criterion in self.derived else None,
+            'breakpoints': None if points is None else (points.values.copy(), points.scores.copy()),
+            'data': {} if data is None else data.dropna().to_dict(),
+        }
+
+    def restore_criterion(self, criterion, extras):
+        # After insert_criterion, which put the weight and ratings back
+        if extras['continuous']:
+            self.mark_continuous(criterion)
+        if extras['derived'] is not None:
+            self.derived.define(criterion, extras['derived'])
+        if extras['breakpoints'] is not None:
+            self.breakpoints[criterion] = Breakpoints(*extras['breakpoints'])
+            self._notify('pairs', criterion)
+        for choice, value in extras['data'].items():
+            self.data_df.loc[choice, criterion] = value
+            self._notify('data', (choice, criterion))
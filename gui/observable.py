@@ -0,0 +1,53 @@
+from PySide2.QtCore import QObject, QTimer, Signal
+
+
+class Changes:
+    # What changed since the views were last told, by kind, each key once:
+    #   'weight': criterion
+    #   'rating', 'data': (choice, criterion)
+    #   'breakpoint': (criterion, index)
+    #   'pairs': criterion, a pair was inserted or removed, moving the
+    #            pairs after it
+    #   'column': criterion, every rating in it was re-interpolated
+    #   'shape': ('choice' or 'criterion', name) added or removed, or None
+    #            when everything was replaced
+    #   'constraint': criterion, its threshold was set or removed
+    def __init__(self):
+        self.keys: 'dict[str, dict]' = {}
+
+    def add(self, kind, key):
+        self.keys.setdefault(kind, {})[key] = None
+
+    def __getitem__(self, kind):
+        return list(self.keys.get(kind, ()))
+
+    def __bool__(self):
+        return bool(self.keys)
+
+
+class Notifier(QObject):
+    # The matrix is the one document model; the main window and the wizard
+    # edit it and subscribe to `changed`. Every edit made during one turn of
+    # the event loop reaches the views as a single batch.
+    changed = Signal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pending = Changes()
+        self.scheduled = False
+
+    def watch(self, matrix):
+        if self.notify not in matrix.observers:
+            matrix.observers.append(self.notify)
+
+    def notify(self, kind, key):
+        self.pending.add(kind, key)
+        if not self.scheduled:
+            self.scheduled = True
+            QTimer.singleShot(0, self.flush)
+
+    def flush(self):
+        changes, self.pending = self.pending, Changes()
+        self.scheduled = False
+        if changes:
+            self.changed.emit(changes)
@@ -0,0 +1,159 @@
+import numpy as np
+
+
+# Points checked at once by the blocked algorithm, and front points they
+# are checked against at once
+BLOCK = 512
+FRONT_BLOCK = 64
+
+
+def prepare(ratings):
+    # Higher is better; a missing rating is worse than any
+    points = np.array(ratings, dtype=float)
+    points[np.isnan(points)] = -np.inf
+    return points
+
+
+def dominance(a, b):
+    # (len(a), len(b)): whether each of a is at least as good as each of b
+    # everywhere, and better somewhere. Built a criterion at a time, which
+    # keeps to 2-d arrays and leaves no reduction over a short last axis
+    b = b.T
+    at_least = np.ones((len(a), b.shape[1]), dtype=bool)
+    better = np.zeros_like(at_least)
+    for j in range(len(b)):
+        column = np.ascontiguousarray(b[j])
+        at_least &= a[:, j, None] >= column
+        better |= a[:, j, None] > column
+    return at_least & better
+
+
+def dominates(point, points):
+    # Whether point is at least as good as each of points everywhere, and
+    # better somewhere
+    return (point >= points).all(axis=-1) & (point > points).any(axis=-1)
+
+
+def dominated_by(front, points, block=FRONT_BLOCK):
+    # For each of points, whether some point of front dominates it.
+    # Points already dominated are not checked again, and most fall to
+    # the strongest front points, which blocked() finds first
+    dominated = np.zeros(len(points), dtype=bool)
+    alive = np.arange(len(points))
+    for start in range(0, len(front), block):
+        if not len(alive):
+            break
+        hit = dominance(front[start:start + block], points[alive]).any(axis=0)
+        dominated[alive[hit]] = True
+        alive = alive[~hit]
+    return dominated
+
+
+def skyline_2d(points):
+    # Unique points in ascending lexicographic order. Walked backwards, a
+    # point is dominated once an earlier one reached its y: O(n)
+    y = points[::-1, 1]
+    dominated = np.zeros(len(points), dtype=bool)
+    dominated[1:] = np.maximum.accumulate(y)[:-1] >= y[1:]
+    return ~dominated[::-1]
+
+
+def skyline_3d(points, block=None):
+    # Unique integer points in ascending lexicographic order. Walked
+    # backwards, any dominating point comes first, so a point is dominated
+    # if an earlier one has y and z at least as high. Taken in blocks of
+    # about sqrt(n) points: the blocks before are summed up by the highest
+    # z at each y and above, and a block is compared with itself pairwise.
+    # O(n sqrt(n)), in array operations only
+    points = points[::-1]
+    y, z = points[:, 1], points[:, 2]
+    block = block or max(int(np.sqrt(len(points))), 1)
+    # [i, j]: whether j comes before i within a block
+    before = np.tri(block, k=-1, dtype=bool)
+    highest = np.full(int(y.max()) + 1, -1)
+    dominated = np.zeros(len(points), dtype=bool)
+    for start in range(0, len(points), block):
+        by, bz = y[start:start + block], z[start:start + block]
+        k = len(by)
+        above = np.maximum.accumulate(highest[::-1])[::-1]
+        pairs = (by >= by[:, None]) & (bz >= bz[:, None]) & before[:k, :k]
+        dominated[start:start + k] = (above[by] >= bz) | pairs.any(axis=1)
+        np.maximum.at(highest, by, bz)
+    return ~dominated[::-1]
+
+
+def blocked(points, block=BLOCK):
+    # Sort-filter skyline: a dominating point has a larger sum, so in order
+    # of decreasing sum a block's front is final once found within the
+    # block, and everything that front dominates is dropped from the rest
+    # at once, with array comparisons throughout
+    order = np.argsort(-points.sum(axis=1), kind='stable')
+    keep = np.zeros(len(points), dtype=bool)
+    while len(order):
+        rows, order = order[:block], order[block:]
+        chunk = points[rows]
+        front = ~dominated_by(chunk, chunk)
+        keep[rows[front]] = True
+        order = order[~dominated_by(chunk[front], points[order])]
+    return keep
+
+
+def non_dominated(points):
+    # Mask of the Pareto front of prepared points, (choices, criteria)
+    n, m = points.shape
+    if n == 0 or m == 0:
+        return np.ones(n, dtype=bool)
+
+    # Each criterion replaced by its rank, which keeps every comparison;
+    # equal points are then decided once
+    ranks = np.empty((n, m), dtype=np.int64)
+    for j in range(m):
+        ranks[:, j] = np.unique(points[:, j], return_inverse=True)[1].reshape(-1)
+    unique, inverse = np.unique(ranks, axis=0, return_inverse=True)
+
+    if m == 1:
+        keep = unique[:, 0] == unique[-1, 0]
+    elif m == 2:
+        keep = skyline_2d(unique)
+    elif m == 3:
+        # Most points fall to a few strong ones, and the sweep takes what
+        # is left, still in order
+        strongest = np.argsort(-unique.sum(axis=1))[:BLOCK]
+        rest = np.flatnonzero(~dominated_by(unique[strongest], unique))
+        keep = np.zeros(len(unique), dtype=bool)
+        keep[rest] = skyline_3d(unique[rest])
+    else:
+        keep = blocked(unique)
+    return keep[inverse.reshape(-1)]
+
+
+class ParetoFront:
+    # The choices that no other choice matches or beats on every criterion,
+    # whatever the weights
+    def __init__(self, ratings):
+        self.points = prepare(ratings)
+        self.front = non_dominated(self.points)
+
+    @property
+    def shape(self):
+        return self.points.shape
+
+    def rating_changed(self, row, ratings):
+        # Returns the rows that joined or left the front.
+        # Only rows the changed row dominates, before or after, can change:
+        # front rows its new ratings dominate leave it, and rows that its
+        # old ratings dominated may join, with the changed row itself
+        old = self.points[row].copy()
+        new = self.points[row] = prepare(ratings)
+        before = self.front.copy()
+        self.front[row] = False
+        self.front &= ~dominance(new[None], self.points)[0]
+
+        # Each front point once; ties are common with integer ratings
+        strong = np.unique(self.points[self.front], axis=0)
+        freed = np.flatnonzero(dominance(old[None], self.points)[0] & ~before)
+        freed = freed[~dominated_by(np.vstack([strong, new]), self.points[freed])]
+        if not dominated_by(strong, new[None])[0]:
+            freed = np.append(freed, row)
+        self.front[freed] = non_dominated(self.points[freed])
+        return np.flatnonzero(self.front != before)
@@ -0,0 +1,55 @@
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+import multiprocessing
+import threading
+
+from gui import compression, jsonstream
+
+
+def read(path):
+    # Streams the file into arrays; never holds the parsed JSON.
+    # Compressed files are recognised by their content.
+    # Touches no widgets, so it is safe off the UI thread.
+    return jsonstream.read_document(lambda: compression.open_text(path, 'r'))
+
+
+class Parsers:
+    # Parsing holds the GIL, json's scanner included, so files only parse
+    # side by side in separate processes. Documents come back pickled:
+    # arrays and name dicts, smaller than the files.
+    # Workers are spawned rather than forked, since the UI process runs Qt
+    # threads; this module imports nothing from Qt, so they start quickly.
+    def __init__(self, workers=None):
+        self.workers = workers
+        self.executor = None
+        # Files are submitted from several pool threads at once
+        self.lock = threading.Lock()
+        # Set by shutdown; files submitted later would start a pool nobody stops
+        self.closed = False
+
+    def submit(self, path) -> 'Future':
+        # Workers are started on first use and kept for later files
+        with self.lock:
+            if self.closed:
+                raise CancelledError
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self.executor.submit(read, path)
+
+    def read_all(self, paths):
+        # Documents in the order of paths; one file alone is not worth a process
+        if len(paths) == 1:
+            return [read(paths[0])]
+        return [future.result() for future in [self.submit(path) for path in paths]]
+
+    def shutdown(self):
+        with self.lock:
+            self.closed = True
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+# Shared by every tab
+parsers = Parsers()
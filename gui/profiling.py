@@ -0,0 +1,158 @@
+import json
+import os
+import time
+from functools import wraps
+from pathlib import Path
+
+from PySide2.QtCore import Qt, QTimer
+from PySide2.QtWidgets import (
+    QApplication,
+    QDockWidget,
+    QFileDialog,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+
+# Decided once at import time; when off, instrument() hands back the
+# undecorated function so there is no overhead at all
+ENABLED = os.environ.get('DECISION_MATRIX_PROFILE', '') not in ('', '0')
+
+# Bucket i counts calls that took less than 2**i microseconds
+BUCKETS = 32
+
+
+class Stats:
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.widgets = 0
+        self.histogram = [0] * BUCKETS
+
+    def record(self, seconds, widgets):
+        self.calls += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.widgets += widgets
+        bucket = min(int(seconds * 1e6).bit_length(), BUCKETS - 1)
+        self.histogram[bucket] += 1
+
+    def to_dict(self):
+        return {
+            'calls': self.calls,
+            'total_ms': self.total * 1e3,
+            'mean_ms': self.total * 1e3 / self.calls if self.calls else 0.0,
+            'max_ms': self.max * 1e3,
+            'widgets_allocated': self.widgets,
+            'histogram_us': {
+                f'<{2 ** i}': count
+                for i, count in enumerate(self.histogram) if count
+            },
+        }
+
+
+class Profiler:
+    def __init__(self):
+        self.stats: 'dict[str, Stats]' = {}
+
+    def record(self, name, seconds, widgets):
+        if name not in self.stats:
+            self.stats[name] = Stats()
+        self.stats[name].record(seconds, widgets)
+
+    def to_dict(self):
+        return {name: stats.to_dict() for name, stats in self.stats.items()}
+
+    def export(self, path):
+        with open(path, 'w') as f:
+            f.write(json.dumps(self.to_dict(), indent=2))
+
+    def reset(self):
+        self.stats.clear()
+
+
+profiler = Profiler()
+
+
+def instrument(fn):
+    if not ENABLED:
+        return fn
+
+    name = fn.__qualname__
+    # Qt passes every signal argument (e.g. `checked` for clicked) even if
+    # the slot takes fewer; the wrapper has to drop them like Qt would
+    code = fn.__code__
+    max_args = None if code.co_flags & 0x04 else code.co_argcount  # CO_VARARGS
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        widgets = len(QApplication.allWidgets())
+        start = time.perf_counter()
+        try:
+            return fn(*args[:max_args], **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            profiler.record(name, elapsed, len(QApplication.allWidgets()) - widgets)
+    return wrapper
+
+
+class PerformanceDock(QDockWidget):
+    columns = ('Function', 'Calls', 'Mean (ms)', 'Max (ms)', 'Widgets', 'Histogram (µs)')
+
+    def __init__(self, parent):
+        super().__init__('Performance', parent)
+        self.setAllowedAreas(Qt.AllDockWidgetAreas)
+
+        self.table = QTableWidget(0, len(self.columns))
+        self.table.setHorizontalHeaderLabels(self.columns)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+
+        export_button = QPushButton('&Export as JSON')
+        export_button.clicked.connect(self.export)
+        reset_button = QPushButton('&Reset')
+        reset_button.clicked.connect(self.reset)
+
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        layout.addWidget(self.table)
+        layout.addWidget(export_button)
+        layout.addWidget(reset_button)
+        self.setWidget(widget)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+
+    def refresh(self):
+        if not self.isVisible():
+            return
+        stats = profiler.to_dict()
+        self.table.setRowCount(len(stats))
+        for row, (name, info) in enumerate(sorted(stats.items())):
+            histogram = ' '.join(f'{k}:{v}' for k, v in info['histogram_us'].items())
+            values = (
+                name,
+                str(info['calls']),
+                f"{info['mean_ms']:.3f}",
+                f"{info['max_ms']:.3f}",
+                str(info['widgets_allocated']),
+                histogram,
+            )
+            for col, value in enumerate(values):
+                self.table.setItem(row, col, QTableWidgetItem(value))
+
+    def export(self):
+        path, _ = QFileDialog.getSaveFileName(
+            None, 'Export timings', str(Path.home()), 'JSON (*.json)'
+        )
+        if path == '':
+            return
+        profiler.export(path)
+
+    def reset(self):
+        profiler.reset()
+        self.refresh()
@@ -0,0 +1,103 @@
+import numpy as np
+
+
+def ranks(percentages):
+    # 1 for the best choice in each column; unscored choices come last
+    order = np.argsort(-np.nan_to_num(percentages, nan=-np.inf), axis=0, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, len(order) + 1)[:, None], axis=0)
+    return ranks
+
+
+class Scenarios:
+    # Named weight sets scored side by side with the weighted sum: every
+    # choice's total under every scenario is one
+    # (choices x criteria) @ (criteria x scenarios) product.
+    # The totals are kept; a new scenario is one more column, a rating edit
+    # one more row, and only structural edits score everything again.
+    def __init__(self, weights: 'dict[str, dict[str, float]]' = None):
+        self.weights: 'dict[str, dict[str, float]]' = {}
+        self._criteria: 'list[str]' = None  # What the arrays below line up with
+        self._choices: 'list[str]' = None
+        self._matrix = np.empty((0, 0))  # (criteria, scenarios)
+        self._totals = np.empty((0, 0))  # (choices, scenarios)
+        self._pending: 'list[str]' = []  # Added since the last score, in order
+        self._stale_rows: 'dict[str, None]' = {}
+        self._shifted = False  # Scored columns moved left by a removal
+        # What the last score changed: rows and columns scored again, or
+        # None when everything was
+        self.rescored: 'tuple[list[int], range]' = None
+        self.load(weights or {})
+
+    @property
+    def names(self):
+        return list(self.weights)
+
+    def load(self, weights):
+        self.weights = {name: dict(criteria) for name, criteria in weights.items()}
+        self.invalidate()
+
+    def invalidate(self):
+        self._criteria = None
+
+    def add(self, name, weights: 'dict[str, float]'):
+        # A name already in use is replaced, and moves to the end
+        if name in self.weights:
+            self.remove(name)
+        self.weights[name] = dict(weights)
+        self._pending.append(name)
+
+    def remove(self, name):
+        position = self.names.index(name)
+        del self.weights[name]
+        if name in self._pending:
+            self._pending.remove(name)
+        elif self._criteria is not None:
+            self._matrix = np.delete(self._matrix, position, axis=1)
+            self._totals = np.delete(self._totals, position, axis=1)
+            self._shifted = True
+
+    def changed(self, kind, key):
+        # An ArrayMatrix observer
+        if kind in ('rating', 'data'):
+            self._stale_rows[key[0]] = None
+        elif kind == 'column':
+            self.invalidate()
+
+    def weight_matrix(self, criteria, names):
+        # (criteria, scenarios); a weight missing from a scenario counts as 0,
+        # like a NaN weight in the matrix
+        positions = {criterion: i for i, criterion in enumerate(criteria)}
+        matrix = np.zeros((len(criteria), len(names)))
+        for j, name in enumerate(names):
+            for criterion, weight in self.weights[name].items():
+                if criterion in positions and not np.isnan(weight):
+                    matrix[positions[criterion], j] = weight
+        return matrix
+
+    def score(self, matrix):
+        # Percentages, (choices, scenarios), in the order of self.names
+        ratings = np.nan_to_num(matrix.ratings)
+        if self._criteria != matrix.all_criteria or self._choices != matrix.choices:
+            self._criteria = list(matrix.all_criteria)
+            self._choices = list(matrix.choices)
+            self._matrix = self.weight_matrix(self._criteria, self.names)
+            self._totals = ratings @ self._matrix
+            self.rescored = None
+        else:
+            rows = []
+            if self._stale_rows:
+                rows = [matrix.choice_position(c) for c in self._stale_rows if c in self._choices]
+                self._totals[rows] = ratings[rows] @ self._matrix
+            columns = range(self._matrix.shape[1], len(self.weights))
+            if self._pending:
+                added = self.weight_matrix(self._criteria, self._pending)
+                self._matrix = np.hstack([self._matrix, added])
+                self._totals = np.hstack([self._totals, ratings @ added])
+            self.rescored = None if self._shifted else (rows, columns)
+        self._pending = []
+        self._stale_rows = {}
+        self._shifted = False
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self._totals / (self._matrix.sum(axis=0) * 10) * 100
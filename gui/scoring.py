@@ -0,0 +1,14 @@
+import numpy as np
+
+
+def weighted_totals(weights, ratings):
+    # NaN (unrated or unweighted) counts as zero, like pandas' skipna sum.
+    # Leading axes broadcast, so a stack of matrices is scored at once
+    return np.nansum(ratings * weights, axis=-1)
+
+
+def percentages(weights, ratings):
+    # Every rating is out of 10
+    max_total = np.nansum(weights, axis=-1) * 10
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return weighted_totals(weights, ratings) / max_total * 100
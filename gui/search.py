@@ -0,0 +1,189 @@
+import bisect
+
+import numpy as np
+
+
+# Substrings are looked up by their trigrams; shorter queries match
+# prefixes only
+GRAM = 3
+# Trigrams are hashed into this many postings; names sharing a posting but
+# not the trigram are weeded out when matching
+BUCKETS = 1 << 16
+# Names whose trigrams are computed at once while loading
+CHUNK = 1 << 16
+# Keys added, or removed, before the sorted lists are merged, beyond one
+# in 16 of the long list
+MERGE = 1024
+
+
+def trigrams(texts):
+    # (buckets, rows): every trigram of every text, hashed from its three
+    # code points, and the position of its text
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    width = int(lengths.max(initial=0))
+    if width < GRAM:
+        return np.empty(0, dtype=np.uint16), np.empty(0, dtype=np.int64)
+    points = np.array(texts, dtype=f'U{width}').view(np.uint32).reshape(len(texts), width)
+    points = points.astype(np.uint64)
+    codes = points[:, :-2] << np.uint64(42) | points[:, 1:-1] << np.uint64(21) | points[:, 2:]
+    # Fibonacci hashing: the top bits of the product
+    buckets = (codes * np.uint64(0x9E3779B97F4A7C15) >> np.uint64(48)).astype(np.uint16)
+    inside = np.arange(width - GRAM + 1) < (lengths - GRAM + 1)[:, None]
+    rows = np.broadcast_to(np.arange(len(texts))[:, None], codes.shape)
+    return buckets[inside], rows[inside]
+
+
+def buckets_of(text):
+    # trigrams' buckets for a single text, without NumPy's per-call overhead
+    points = list(map(ord, text))
+    return {
+        ((a << 42 | b << 21 | c) * 0x9E3779B97F4A7C15 & 0xFFFFFFFFFFFFFFFF) >> 48
+        for a, b, c in zip(points, points[1:], points[2:])
+    }
+
+
+class NameSearch:
+    # Choice and criterion names, matched case-insensitively.
+    # Prefix queries bisect a sorted list of (folded name, kind, name) keys.
+    # Keys added later go to a short sorted list beside it and removed ones
+    # are remembered as dead, both folded in once the short list grows, so
+    # an edit never shifts the long list.
+    # For substrings, each trigram bucket has a posting of key ids, all in
+    # one array sorted by bucket then id; a query walks the shortest posting
+    # of its trigrams a chunk at a time, keeps the ids also in every other
+    # posting and checks the names of those.
+    # Ids added later go to small sets beside the array, and removed keys
+    # leave their ids behind as None until the index is rebuilt.
+    def __init__(self, names: 'Iterable[tuple[str, str]]' = ()):
+        self.load(names)
+
+    def load(self, names):
+        # names are (kind, name), kind being 'choice' or 'criterion'; like
+        # the matrix's, unique per kind
+        self.keys = sorted([(name.casefold(), kind, name) for kind, name in names])
+        self.recent: 'list[tuple]' = []
+        self.dead: 'set[tuple]' = set()
+        self.by_id: 'list[tuple]' = list(self.keys)
+        self.ids = {key: i for i, key in enumerate(self.by_id)}
+        self.added: 'dict[int, set[int]]' = {}
+
+        buckets, ids = [], []
+        for start in range(0, len(self.keys), CHUNK):
+            chunk_buckets, rows = trigrams([key[0] for key in self.keys[start:start + CHUNK]])
+            buckets.append(chunk_buckets)
+            ids.append((rows + start).astype(np.int32))
+        buckets = np.concatenate(buckets) if buckets else np.empty(0, dtype=np.uint16)
+        ids = np.concatenate(ids) if ids else np.empty(0, dtype=np.int32)
+
+        # A radix sort; stable, so each posting's ids stay ascending and a
+        # name's repeated trigrams end up next to each other
+        order = np.argsort(buckets, kind='stable')
+        buckets, ids = buckets[order], ids[order]
+        keep = np.ones(len(ids), dtype=bool)
+        keep[1:] = (buckets[1:] != buckets[:-1]) | (ids[1:] != ids[:-1])
+        self.posting_ids = ids[keep]
+        self.starts = np.zeros(BUCKETS + 1, dtype=np.int64)
+        np.cumsum(np.bincount(buckets[keep], minlength=BUCKETS), out=self.starts[1:])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, kind, name):
+        key = (name.casefold(), kind, name)
+        if key in self.ids:
+            return
+        if key in self.dead:
+            self.dead.discard(key)
+        else:
+            bisect.insort(self.recent, key)
+            if len(self.recent) > MERGE + len(self.keys) // 16:
+                self.merge()
+        self.ids[key] = len(self.by_id)
+        for bucket in buckets_of(key[0]):
+            self.added.setdefault(bucket, set()).add(len(self.by_id))
+        self.by_id.append(key)
+
+    def remove(self, kind, name):
+        key = (name.casefold(), kind, name)
+        if key not in self.ids:
+            return
+        i = bisect.bisect_left(self.recent, key)
+        if i < len(self.recent) and self.recent[i] == key:
+            del self.recent[i]
+        else:
+            self.dead.add(key)
+        self.by_id[self.ids.pop(key)] = None
+        if len(self.by_id) > 2 * len(self.ids) + 1024:
+            self.load((kind, name) for _, kind, name in self.ids)
+        elif len(self.dead) > MERGE + len(self.keys) // 16:
+            self.merge()
+
+    def merge(self):
+        # Two sorted runs, which the sort merges in one pass
+        keys = sorted(self.keys + self.recent)
+        if self.dead:
+            keys = [key for key in keys if key not in self.dead]
+        self.keys, self.recent, self.dead = keys, [], set()
+
+    def prefixed(self, text, limit):
+        found = []
+        start = bisect.bisect_left(self.keys, (text,))
+        for i in range(start, len(self.keys)):
+            key = self.keys[i]
+            if not key[0].startswith(text) or len(found) == limit:
+                break
+            if key not in self.dead:
+                found.append(key)
+        start = bisect.bisect_left(self.recent, (text,))
+        for key in self.recent[start:start + limit]:
+            if not key[0].startswith(text):
+                break
+            found.append(key)
+        return sorted(found)[:limit]
+
+    def containing(self, text, limit, exclude=()):
+        # A key containing text is in the posting of each of its trigrams
+        buckets = buckets_of(text)
+        found = []
+
+        def check(ids):
+            for i in ids:
+                key = self.by_id[i]
+                if key is not None and text in key[0] and key not in exclude:
+                    found.append(key)
+                    if len(found) == limit:
+                        return True
+
+        postings = sorted(
+            (self.posting_ids[self.starts[b]:self.starts[b + 1]] for b in buckets), key=len
+        )
+        shortest, others = postings[0], postings[1:]
+        # Chunks grow, so that a common trigram stops after a few hundred
+        # ids and a rare combination of common ones is still quick to walk
+        start, size = 0, 256
+        while start < len(shortest):
+            candidates = shortest[start:start + size]
+            for posting in others:
+                if not len(posting) or not len(candidates):
+                    candidates = candidates[:0]
+                    break
+                where = np.minimum(np.searchsorted(posting, candidates), len(posting) - 1)
+                candidates = candidates[posting[where] == candidates]
+            if check(candidates.tolist()):
+                return sorted(found)
+            start, size = start + size, min(size * 2, CHUNK)
+
+        added = sorted((self.added.get(b, set()) for b in buckets), key=len)
+        check(sorted(added[0].intersection(*added[1:])))
+        return sorted(found)
+
+    def search(self, text, limit=100):
+        # [(kind, name)]: names starting with text in order, then others
+        # containing it, at most limit in all
+        text = text.casefold()
+        if not text:
+            return []
+        found = self.prefixed(text, limit)
+        if len(text) >= GRAM and len(found) < limit:
+            found += self.containing(text, limit - len(found), exclude=set(found))
+        return [(kind, name) for _, kind, name in found]
@@ -0,0 +1,205 @@
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from urllib.parse import unquote_plus
+
+import numpy as np
+
+from gui import cache, engines, jsonstream
+from gui.model import ArrayMatrix
+
+
+logger = logging.getLogger(__name__)
+WHITESPACE = re.compile(r'\s*')
+DECODER = json.JSONDecoder()
+
+
+def rank(document, engine=engines.WeightedSum.name, results=None):
+    # The same steps as the GUI: ArrayMatrix, continuous criteria
+    # interpolated, then the selected engine; results is a cache.ResultCache
+    matrix = ArrayMatrix.from_document(document)
+    matrix.engine = engines.ENGINES[engine]()
+    key = cache.matrix_key(matrix) if results is not None else None
+    if key is not None and (cached := results.get(key)) is not None:
+        percentages, order = cached
+    else:
+        matrix._calculate_percentage()
+        percentages = matrix.percentages
+        order = np.argsort(-np.nan_to_num(percentages, nan=-np.inf), kind='stable')
+        if key is not None:
+            results.put(key, percentages)
+    return [
+        {'choice': matrix.choices[i], 'percentage': none_if_nan(percentages[i])}
+        for i in order
+    ]
+
+
+def none_if_nan(value):
+    return None if np.isnan(value) else float(value)
+
+
+def split_list(text):
+    # The text of each item of a JSON list, as sent: scored as is, an item
+    # has the hash and tie order it would have alone on /score
+    position = WHITESPACE.match(text).end()
+    if not text.startswith('[', position):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, 'Expected a list of documents')
+    position = WHITESPACE.match(text, position + 1).end()
+    items = []
+    if text.startswith(']', position):
+        return items, position + 1
+    while True:
+        try:
+            _, end = DECODER.raw_decode(text, position)
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, str(e))
+        items.append(text[position:end])
+        position = WHITESPACE.match(text, end).end()
+        separator = text[position:position + 1]
+        position = WHITESPACE.match(text, position + 1).end()
+        if separator == ']':
+            return items, position
+        if separator != ',':
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f'Expected , or ] at {position - 1}')
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ScoringService:
+    def __init__(self, cache_size=1024, results=None):
+        self.cache_size = cache_size
+        # On disk and shared with the GUI; the dict below is per process
+        self.results = results
+        # content hash -> ranking, least recently used first
+        self.cache: 'OrderedDict[str, list[dict]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Requests are scored on executor threads
+        self.lock = threading.Lock()
+
+    def score(self, text, engine):
+        if engine not in engines.ENGINES:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f'Unknown engine {engine!r}')
+        key = hashlib.blake2b(f'{engine}\0{text}'.encode(), digest_size=16).hexdigest()
+        with self.lock:
+            if key in self.cache:
+                self.hits += 1
+                self.cache.move_to_end(key)
+                return key, self.cache[key]
+            self.misses += 1
+
+        try:
+            document = jsonstream.read_document(lambda: io.StringIO(text))
+        except (ValueError, StopIteration) as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f'Not a saved matrix: {e}')
+        ranking = rank(document, engine, self.results)
+        with self.lock:
+            self.cache[key] = ranking
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return key, ranking
+
+    def handle(self, method, path, query, body):
+        # -> JSON-serialisable response
+        engine = query.get('engine', engines.WeightedSum.name)
+        if method == 'GET' and path == '/engines':
+            return list(engines.ENGINES)
+        if method == 'GET' and path == '/stats':
+            with self.lock:
+                return {'cached': len(self.cache), 'hits': self.hits, 'misses': self.misses}
+        if method == 'POST' and path == '/score':
+            # Body: one document in IO._write's schema
+            key, ranking = self.score(body, engine)
+            return {'hash': key, 'ranking': ranking}
+        if method == 'POST' and path == '/batch':
+            # Body: a JSON list of documents; each is cached on its own
+            documents, end = split_list(body)
+            if end != len(body):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, f'Extra data at {end}')
+            results = []
+            for document in documents:
+                key, ranking = self.score(document, engine)
+                results.append({'hash': key, 'ranking': ranking})
+            return results
+        raise HTTPError(HTTPStatus.NOT_FOUND, f'No {method} {path}')
+
+
+async def read_request(reader):
+    request_line = (await reader.readline()).decode('latin-1').split()
+    if len(request_line) != 3:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, 'Malformed request line')
+    method, target, _ = request_line
+
+    headers = {}
+    while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get('content-length', 0))
+        if length < 0:
+            raise ValueError(length)
+        body = await reader.readexactly(length)
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, 'Bad Content-Length')
+    except asyncio.IncompleteReadError as e:
+        raise HTTPError(
+            HTTPStatus.BAD_REQUEST, f'Body ended after {len(e.partial)} of {e.expected} bytes'
+        )
+
+    path, _, query_string = target.partition('?')
+    query = dict(
+        map(unquote_plus, pair.split('=', 1))
+        for pair in query_string.split('&') if '=' in pair
+    )
+    return method, path, query, body.decode()
+
+
+async def respond(writer, status, payload):
+    body = json.dumps(payload).encode()
+    writer.write(
+        f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+        'Content-Type: application/json\r\n'
+        f'Content-Length: {len(body)}\r\n'
+        'Connection: close\r\n\r\n'.encode() + body
+    )
+    await writer.drain()
+    writer.close()
+
+
+class Server:
+    def __init__(self, service):
+        self.service = service
+
+    async def connected(self, reader, writer):
+        try:
+            request = await read_request(reader)
+            # Scoring is CPU-bound; keep the event loop free for other clients
+            loop = asyncio.get_running_loop()
+            payload = await loop.run_in_executor(None, self.service.handle, *request)
+            await respond(writer, HTTPStatus.OK, payload)
+        except HTTPError as e:
+            await respond(writer, e.status, {'error': str(e)})
+        except Exception:
+            logger.exception('Request failed')
+            await respond(writer, HTTPStatus.INTERNAL_SERVER_ERROR, {'error': 'Internal error'})
+
+    async def start(self, host='127.0.0.1', port=8765):
+        return await asyncio.start_server(self.connected, host, port)
+
+
+async def serve(host='127.0.0.1', port=8765, cache_size=1024):
+    server = await Server(ScoringService(cache_size, cache.results)).start(host, port)
+    for sock in server.sockets:
+        logger.info('Serving on http://%s:%s', *sock.getsockname()[:2])
+    async with server:
+        await server.serve_forever()
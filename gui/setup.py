@@ -12,13 +12,14 @@ from PySide2.QtWidgets import (
     QLabel,
     QMenuBar,
     QAction,
+    QActionGroup,
     QMenu,
     QVBoxLayout,
     QHBoxLayout,
 )
 
+from gui import engines, heatmap, profiling
 from gui.wizard import WizardMixin
-from gui.io import io
 
 
 _translate = QCoreApplication.translate
@@ -68,8 +69,12 @@ class SetupUIMixin(WizardMixin):
         self.add_enter_button()
         self.add_combo_box()
         self.add_table()
+        self.add_search_box()
         self.setup_table()
         self.set_last_column_uneditable()
+        self.notifier.watch(self.matrix)
+        self.notifier.changed.connect(self.apply_changes)
+        self.matrix.observers.append(self.matrix_edited)
         self.add_matrix_tab_grid()
 
         # For continuous criteria tab only
@@ -80,6 +85,9 @@ class SetupUIMixin(WizardMixin):
         # For data tab only
         self.add_data_label()
 
+        # For scenario tab only
+        self.add_scenario_tab_grid()
+
         self.set_tab_key_order()
         QMetaObject.connectSlotsByName(MainWindow)
 
@@ -90,15 +98,18 @@ class SetupUIMixin(WizardMixin):
             '&File': {
                 '&Open': {
                     'shortcut': QKeySequence.Open,
-                    'signal': lambda: io.open_(self),
+                    'signal': lambda: self.io.open_(self),
                 },
                 '&Save': {
                     'shortcut': QKeySequence.Save,
-                    'signal': lambda: io.save(self.matrix),
+                    'signal': lambda: self.io.save(self.matrix),
                 },
                 'Save &as': {
                     'shortcut': QKeySequence.SaveAs,
-                    'signal': lambda: io.save_as(self.matrix),
+                    'signal': lambda: self.io.save_as(self.matrix),
+                },
+                'Score &large file': {
+                    'signal': lambda: self.io.score_large_file(self),
                 },
                 '&Quit': {
                     'shortcut': QKeySequence.Quit,
@@ -106,6 +117,20 @@ class SetupUIMixin(WizardMixin):
                     'signal': QCoreApplication.quit,
                 },
             },
+            '&Edit': {
+                '&Undo': {
+                    'shortcut': QKeySequence.Undo,
+                    'signal': self.undo,
+                },
+                '&Redo': {
+                    'shortcut': QKeySequence.Redo,
+                    'signal': self.redo,
+                },
+                '&Find': {
+                    'shortcut': QKeySequence.Find,
+                    'signal': self.focus_search_box,
+                },
+            },
             '&Matrix': {
                 '&Assistant': {
                     'shortcut': QKeySequence('Ctrl+A'),
@@ -117,12 +142,25 @@ class SetupUIMixin(WizardMixin):
                 'Delete selected &columns': {
                     'signal': self.delete_column,
                 },
+                'Compare/a&ggregate files': {
+                    'signal': lambda: self.io.aggregate_files(self),
+                },
                 '&Plot': {
                     'signal': lambda: print('todo'),
                 },
                 'Plot &interpolators': {
                     'signal': lambda: print('todo'),
                 },
+                'Set c&onstraint': {
+                    'signal': self.set_constraint,
+                },
+                'Heat&map overview': {
+                    'signal': self.show_heatmap_dock,
+                },
+                'Highlight &Pareto front': {
+                    'signal': self.toggle_pareto,
+                    'checkable': True,
+                },
             },
             '&Help': {
                 '&About': {
@@ -131,7 +169,28 @@ class SetupUIMixin(WizardMixin):
                 },
             },
         }
+        for name in engines.ENGINES:
+            all_menus['&Matrix'][f'Score by {name}'] = {
+                'signal': lambda checked, name=name: self.set_engine(name),
+                'group': 'engine',
+                'checked': name == self.matrix.engine.name,
+            }
+        if self.documents is not None:
+            all_menus['&File'] = {
+                '&New': {
+                    'shortcut': QKeySequence.New,
+                    'signal': lambda: self.documents.new_document(),
+                },
+                **all_menus['&File'],
+            }
+        if profiling.ENABLED:
+            all_menus['&Help']['Performance &overlay'] = {
+                'signal': self.show_performance_dock,
+            }
+
         menubar = QMenuBar(MainWindow)
+        # Actions in the same group are mutually exclusive choices
+        groups = {}
 
         for menu_name, actions in all_menus.items():
             # Menubar and its menus
@@ -153,12 +212,33 @@ class SetupUIMixin(WizardMixin):
                 if shortcut:
                     action.setShortcut(shortcut)
 
+                group = action_info.get('group', None)
+                if group:
+                    action.setCheckable(True)
+                    action.setChecked(action_info.get('checked', False))
+                    groups.setdefault(group, QActionGroup(MainWindow)).addAction(action)
+                elif action_info.get('checkable', False):
+                    action.setCheckable(True)
+
                 signal = action_info.get('signal', None)
                 if signal:
                     action.triggered.connect(signal)
 
         MainWindow.setMenuBar(menubar)
 
+    def show_performance_dock(self):
+        if not self.performance_dock:
+            self.performance_dock = profiling.PerformanceDock(self.main_window)
+            self.main_window.addDockWidget(Qt.BottomDockWidgetArea, self.performance_dock)
+        self.performance_dock.show()
+
+    def show_heatmap_dock(self):
+        if not self.heatmap_dock:
+            self.heatmap_dock = heatmap.HeatmapDock(self.main_window, self.matrix)
+            self.heatmap_dock.view.clicked.connect(self.scroll_to_cell)
+            self.main_window.addDockWidget(Qt.RightDockWidgetArea, self.heatmap_dock)
+        self.heatmap_dock.show()
+
     def add_master_tabs(self):
         self.master_tab_widget = QTabWidget(self.centralwidget)
         self.matrix_tab = QWidget()
@@ -167,6 +247,9 @@ class SetupUIMixin(WizardMixin):
         self.master_tab_widget.addTab(self.matrix_tab, "Matrix")
         self.master_tab_widget.addTab(self.cc_tab, "Continuous criteria")
         self.master_tab_widget.addTab(self.data_tab, 'Data')
+        self.scenario_tab = QWidget()
+        self.master_tab_widget.addTab(self.scenario_tab, 'Scenarios')
+        self.master_tab_widget.currentChanged.connect(self.scenario_tab_shown)
 
     def add_master_grid(self):
         self.app_grid_layout = QGridLayout(self.centralwidget)
@@ -197,6 +280,13 @@ class SetupUIMixin(WizardMixin):
         self.matrix_widget.verticalHeader().setVisible(True)
         self.matrix_widget.setSortingEnabled(False)
 
+    def add_search_box(self):
+        self.search_box = QLineEdit(self.matrix_tab)
+        self.search_box.setPlaceholderText('Find a choice or criterion')
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.textChanged.connect(self.search_changed)
+        self.search_box.returnPressed.connect(self.next_match)
+
     def setup_table(self):
         self.matrix_widget.setColumnCount(1)
         self.matrix_widget.setHorizontalHeaderItem(0, QTableWidgetItem())
@@ -212,6 +302,7 @@ class SetupUIMixin(WizardMixin):
         self.grid_layout.addWidget(self.lineEdit, 0, 1, 1, 1)
         self.grid_layout.addWidget(self.pushButton, 0, 2, 1, 1)
         self.grid_layout.addWidget(self.matrix_widget, 1, 0, 1, 3)
+        self.grid_layout.addWidget(self.search_box, 2, 0, 1, 3)
 
     def add_criterion_button(self):
         self.criterion_button = QPushButton('Add')
@@ -237,11 +328,34 @@ class SetupUIMixin(WizardMixin):
         label = QLabel('There are no continuous criteria yet, add one in the second tab')
         self.data_grid.addWidget(label)
 
+    def add_scenario_tab_grid(self):
+        self.line_edit_scenario = QLineEdit(self.scenario_tab)
+        self.line_edit_scenario.setPlaceholderText('Scenario name')
+        self.line_edit_scenario.returnPressed.connect(self.add_scenario)
+        add_button = QPushButton('Save current &weights')
+        add_button.clicked.connect(self.add_scenario)
+        use_button = QPushButton('&Use selected')
+        use_button.clicked.connect(self.use_scenario)
+        delete_button = QPushButton('&Delete selected')
+        delete_button.clicked.connect(self.delete_scenario)
+
+        # Choices down, one column per scenario
+        self.scenario_widget = QTableWidget(self.scenario_tab)
+        self.scenario_widget.setEditTriggers(QTableWidget.NoEditTriggers)
+
+        grid = QGridLayout(self.scenario_tab)
+        grid.addWidget(self.line_edit_scenario, 0, 0)
+        grid.addWidget(add_button, 0, 1)
+        grid.addWidget(use_button, 0, 2)
+        grid.addWidget(delete_button, 0, 3)
+        grid.addWidget(self.scenario_widget, 1, 0, 1, 4)
+
     def set_tab_key_order(self):
         QWidget.setTabOrder(self.master_tab_widget, self.combo_box)
         QWidget.setTabOrder(self.combo_box, self.lineEdit)
         QWidget.setTabOrder(self.lineEdit, self.pushButton)
         QWidget.setTabOrder(self.pushButton, self.matrix_widget)
+        QWidget.setTabOrder(self.matrix_widget, self.search_box)
 
         QWidget.setTabOrder(self.line_edit_cc_tab, self.criterion_button)
 
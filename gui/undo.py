@@ -0,0 +1,206 @@
+from collections import deque
+
+import numpy as np
+
+
+class UndoStack:
+    def __init__(self, limit=1000, max_bytes=32 * 1024 * 1024):
+        self.limit = limit
+        self.max_bytes = max_bytes
+        self.undo_commands = deque()
+        self.redo_commands = []
+        self.nbytes = 0
+        # Set while a command is being applied, so the callbacks it
+        # triggers do not record themselves again
+        self.applying = False
+
+    def push(self, command):
+        if self.applying:
+            return
+        self.undo_commands.append(command)
+        self.nbytes += command.nbytes
+        self.redo_commands.clear()
+
+        # Forget the oldest commands first
+        while self.undo_commands and (
+            len(self.undo_commands) > self.limit or self.nbytes > self.max_bytes
+        ):
+            self.nbytes -= self.undo_commands.popleft().nbytes
+
+    def undo(self, ui):
+        if not self.undo_commands:
+            return
+        command = self.undo_commands.pop()
+        self.nbytes -= command.nbytes
+        self.apply(command.undo, ui)
+        self.redo_commands.append(command)
+
+    def redo(self, ui):
+        if not self.redo_commands:
+            return
+        command = self.redo_commands.pop()
+        self.apply(command.redo, ui)
+        self.undo_commands.append(command)
+        self.nbytes += command.nbytes
+
+    def apply(self, fn, ui):
+        self.applying = True
+        try:
+            fn(ui)
+        finally:
+            self.applying = False
+
+    def clear(self):
+        self.undo_commands.clear()
+        self.redo_commands.clear()
+        self.nbytes = 0
+
+
+class Command:
+    # Fixed overhead of a command, roughly
+    nbytes = 64
+
+    def undo(self, ui):
+        raise NotImplementedError
+
+    def redo(self, ui):
+        raise NotImplementedError
+
+
+class CommandGroup(Command):
+    def __init__(self, commands):
+        self.commands = commands
+        self.nbytes = sum(command.nbytes for command in commands)
+
+    def undo(self, ui):
+        for command in reversed(self.commands):
+            command.undo(ui)
+
+    def redo(self, ui):
+        for command in self.commands:
+            command.redo(ui)
+
+
+class CellEdit(Command):
+    # A rating (row > 0) or a weight (row 0) in the matrix table
+    def __init__(self, row, column, old, new):
+        self.row = row
+        self.column = column
+        self.old = old
+        self.new = new
+
+    def undo(self, ui):
+        ui.restore_cell(self.row, self.column, self.old)
+
+    def redo(self, ui):
+        ui.restore_cell(self.row, self.column, self.new)
+
+
+class ValueScoreEdit(Command):
+    def __init__(self, criterion, index, old, new):
+        self.criterion = criterion
+        self.index = index
+        # (value, score) pairs
+        self.old = old
+        self.new = new
+
+    def undo(self, ui):
+        ui.cc_tab_page.restore_pair(self.criterion, self.index, *self.old)
+
+    def redo(self, ui):
+        ui.cc_tab_page.restore_pair(self.criterion, self.index, *self.new)
+
+
+class PairDelete(Command):
+    def __init__(self, criterion, index, pair):
+        self.criterion = criterion
+        self.index = index
+        # (value, score)
+        self.pair = pair
+
+    def undo(self, ui):
+        ui.cc_tab_page.insert_pair(self.criterion, self.index, *self.pair)
+
+    def redo(self, ui):
+        ui.cc_tab_page.remove_pair(self.criterion, self.index)
+
+
+class DataEdit(Command):
+    def __init__(self, choice, criterion, old, new):
+        self.choice = choice
+        self.criterion = criterion
+        self.old = old
+        self.new = new
+
+    def undo(self, ui):
+        ui.data_tab_page.restore_value(self.choice, self.criterion, self.old)
+
+    def redo(self, ui):
+        ui.data_tab_page.restore_value(self.choice, self.criterion, self.new)
+
+
+class RowDelete(Command):
+    def __init__(self, position, name, values, data=None):
+        self.position = position
+        self.name = name
+        # The choice's ratings
+        self.values = np.asarray(values, dtype=float)
+        # Its continuous criteria's data, criterion -> value
+        self.data = data or {}
+        self.nbytes = Command.nbytes + self.values.nbytes + 16 * len(self.data)
+
+    def undo(self, ui):
+        ui.insert_choice(self.position, self.name, self.values, self.data)
+
+    def redo(self, ui):
+        ui.remove_choice(self.position)
+
+
+class RowAdd(RowDelete):
+    def __init__(self, position, name, columns):
+        super().__init__(position, name, np.full(columns, np.nan))
+
+    def undo(self, ui):
+        super().redo(ui)
+
+    def redo(self, ui):
+        super().undo(ui)
+
+
+class ColumnDelete(Command):
+    def __init__(self, position, name, values, extras=None):
+        self.position = position
+        self.name = name
+        # The criterion's weight, then its ratings
+        self.values = np.asarray(values, dtype=float)
+        # A continuous criterion's breakpoints, data and so on; see
+        # ArrayMatrix.criterion_extras
+        self.extras = extras
+        self.nbytes = Command.nbytes + self.values.nbytes
+        if extras and extras['breakpoints'] is not None:
+            self.nbytes += sum(array.nbytes for array in extras['breakpoints'])
+        if extras:
+            self.nbytes += 16 * len(extras['data'])
+
+    def undo(self, ui):
+        ui.insert_criterion(self.position, self.name, self.values, self.extras)
+
+    def redo(self, ui):
+        ui.remove_criterion(self.position)
+
+
+class ColumnAdd(ColumnDelete):
+    def __init__(self, position, name, rows):
+        super().__init__(position, name, np.full(rows, np.nan))
+
+    def undo(self, ui):
+        # Whatever the criterion has since gained, continuity and a
+        # derived expression included, comes back on redo
+        super().__init__(
+            self.position, self.name, ui.column_values(self.position),
+            ui.matrix.criterion_extras(self.name),
+        )
+        super().redo(ui)
+
+    def redo(self, ui):
+        super().undo(ui)
@@ -0,0 +1,68 @@
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from PySide2.QtCore import QObject, QTimer
+
+
+logger = logging.getLogger(__name__)
+
+
+def matrix_dimensions(ui):
+    # Runs on the watchdog thread: only the name lists' lengths are read,
+    # never the DataFrame, which would be built while the UI thread edits
+    return ui.matrix.shape
+
+
+class StallWatchdog(QObject):
+    def __init__(self, threshold_ms=500, dimensions=None, parent=None):
+        super().__init__(parent)
+        self.threshold = threshold_ms / 1000
+        # Called from the watchdog thread; must only read state
+        self.dimensions = dimensions
+        self.main_thread_id = threading.main_thread().ident
+        self.last_beat = time.monotonic()
+        self.stalled = False
+        self.stopped = threading.Event()
+
+        # The heartbeat only fires while the event loop is processing events
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.beat)
+        self.thread = threading.Thread(target=self.watch, name='stall-watchdog', daemon=True)
+
+    def start(self):
+        self.last_beat = time.monotonic()
+        self.timer.start(max(int(self.threshold * 1000) // 4, 10))
+        self.thread.start()
+
+    def stop(self):
+        self.timer.stop()
+        self.stopped.set()
+        self.thread.join()
+
+    def beat(self):
+        now = time.monotonic()
+        if self.stalled:
+            logger.warning('Event loop resumed after %.0f ms', (now - self.last_beat) * 1000)
+            self.stalled = False
+        self.last_beat = now
+
+    def watch(self):
+        while not self.stopped.wait(self.threshold / 4):
+            stalled_for = time.monotonic() - self.last_beat
+            if stalled_for > self.threshold and not self.stalled:
+                # Only report once per stall; beat() re-arms it
+                self.stalled = True
+                self.report(stalled_for)
+
+    def report(self, stalled_for):
+        frame = sys._current_frames().get(self.main_thread_id)
+        stack = ''.join(traceback.format_stack(frame)) if frame else '<unavailable>\n'
+        dimensions = self.dimensions() if self.dimensions else ('?', '?')
+        logger.warning(
+            'Event loop stalled for %.0f ms with %s choices x %s criteria; '
+            'main thread stack:\n%s',
+            stalled_for * 1000, *dimensions, stack
+        )
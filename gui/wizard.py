@@ -2,7 +2,6 @@ import weakref
 from functools import partial
 from enum import IntEnum, auto
 
-import numpy as np
 from matrix import Matrix
 from PySide2.QtCore import Qt
 from PySide2.QtWidgets import (
@@ -22,11 +21,10 @@ from PySide2.QtWidgets import (
     QVBoxLayout,
     QFormLayout,
     QHBoxLayout,
-    QTableWidgetItem,
     QTableWidgetSelectionRange,
 )
 
-from gui.core import AbstractDataTab, AbstractValueScoreLayout
+from gui.core import AbstractDataTab, AbstractValueScoreLayout, set_quietly
 
 
 def clear_layout(layout):
@@ -80,6 +78,14 @@ class Wizard(QWizard):
         self.setPage(Page.Ratings, RatingPage(self))
         self.setPage(Page.Conclusion, ConclusionPage(self))
 
+        # Pages edit the matrix only; the main window and the pages below
+        # catch up from its change notifications
+        parent.notifier.watch(parent.matrix)
+        for page in (
+            Page.Weights, Page.ContinuousWeights, Page.ValueScores, Page.Data, Page.Ratings
+        ):
+            parent.notifier.changed.connect(self.page(page).refresh)
+
 
 class EnableNextOnBackMixin:
     def cleanupPage(self):
@@ -144,9 +150,9 @@ class AbstractMultiInputPage(EnableNextOnBackMixin, QWizardPage):
     def add_item(self):
         if not (name := self.line_edit.text()):
             return
-        item = QListWidgetItem(name)
+        # The list shows the name the matrix took, renamed if it was taken
+        item = QListWidgetItem(self.matrix_add(name))
         self.list.addItem(item)
-        self.matrix_add(name)
         self.line_edit.clear()
         self.line_edit.setFocus()
         self.parent_wizard.next_button.setEnabled(True)
@@ -178,18 +184,18 @@ class ChoicesPage(AbstractMultiInputPage):
         # What are you trying to choose between?
 
     def initializePage(self):
-        for choice in self.parent_wizard.main_parent.matrix.df.index[1:]:
+        for choice in self.parent_wizard.main_parent.matrix.choices:
             self.list.addItem(QListWidgetItem(choice))
         super().initializePage()
 
     def matrix_add(self, name):
         self.parent_wizard.main_parent.lineEdit.setText(name)
-        self.parent_wizard.main_parent.add_row()
+        return self.parent_wizard.main_parent.add_row()
 
     def matrix_remove(self, index):
-        idx = self.parent_wizard.main_parent.matrix.df.index[index + 1]  # Weight is first row
-        self.parent_wizard.main_parent.matrix.df.drop(idx, inplace=True)
-        self.parent_wizard.main_parent.matrix_widget.removeRow(index + 1)
+        main_parent = self.parent_wizard.main_parent
+        # Weight is first row
+        main_parent.undo_stack.push(main_parent.delete_choice(index + 1))
 
 
 class CriteriaPage(AbstractMultiInputPage):
@@ -211,14 +217,14 @@ class CriteriaPage(AbstractMultiInputPage):
             self.parent_wizard.next_button.setEnabled(True)
 
     def matrix_add(self, name):
-        self.parent_wizard.main_parent.matrix.add_criterion(name, weight=np.nan)
         self.parent_wizard.main_parent.lineEdit.setText(name)
-        self.parent_wizard.main_parent.add_column()
+        return self.parent_wizard.main_parent.add_column()
 
     def matrix_remove(self, index):
-        idx = self.parent_wizard.main_parent.matrix.df.columns[index]
-        self.parent_wizard.main_parent.matrix.df.drop(idx, axis='columns', inplace=True)
-        self.parent_wizard.main_parent.matrix_widget.removeColumn(index)
+        main_parent = self.parent_wizard.main_parent
+        # The list leaves out continuous criteria, the table does not
+        col = main_parent.matrix.criterion_position(main_parent.matrix.criteria[index])
+        main_parent.undo_stack.push(main_parent.delete_criterion(col))
 
     def nextId(self):
         if self.list.count() >= 1:
@@ -292,6 +298,9 @@ class ContinuousCriteriaPage(EnableNextOnBackMixin, QWizardPage):
         # Duplicated
         if not (name := self.line_edit.text()):
             return
+        self.parent_wizard.main_parent.line_edit_cc_tab.setText(name)
+        if not (name := self.parent_wizard.main_parent.add_continuous_criteria()):
+            return
         item = QListWidgetItem(name)
         self.list_widget.addItem(item)
         self.line_edit.clear()
@@ -299,12 +308,6 @@ class ContinuousCriteriaPage(EnableNextOnBackMixin, QWizardPage):
         self.parent_wizard.next_button.setEnabled(True)
         self.delete_button.setEnabled(True)
 
-        self.parent_wizard.main_parent.line_edit_cc_tab.setText(name)
-        self.parent_wizard.main_parent.matrix.add_continuous_criterion(
-            name, weight=float('nan')
-        )
-        self.parent_wizard.main_parent.add_continuous_criteria()
-
     def delete_item(self):
         # Completely copied (except list -> list_widget)
         if (index := self.list_widget.currentRow()) is None or index == -1:
@@ -316,9 +319,11 @@ class ContinuousCriteriaPage(EnableNextOnBackMixin, QWizardPage):
             self.parent_wizard.next_button.setDisabled(True)
 
     def matrix_remove(self, index):
-        idx = self.parent_wizard.main_parent.matrix.continuous_criteria.pop(index)
-        self.parent_wizard.main_parent.matrix.df.drop(idx, axis='columns', inplace=True)
-        self.parent_wizard.main_parent.matrix_widget.removeColumn(index)
+        idx = self.parent_wizard.main_parent.matrix.continuous_criteria[index]
+        col = self.parent_wizard.main_parent.matrix.criterion_position(idx)
+        # Also unmarks it as continuous
+        self.parent_wizard.main_parent.matrix.remove_criterion(col)
+        self.parent_wizard.main_parent.matrix_widget.removeColumn(col)
 
         # FIXME: deleting item then adding it again doesn't add it in the tab
         # Remove the section in the value-score tab
@@ -340,15 +345,22 @@ class AbstractSliderPage(EnableNextOnBackMixin, QWizardPage):
         self.grid = QGridLayout(self)
         self.setLayout(self.grid)
         self.collection: 'func[] -> Iterable[str]'
+        # The names shown, in order, and the row of each
+        self.names: 'list[str]' = []
+        self.rows: 'dict[str, int]' = {}
+        self.sliders = []
+        self.spin_boxes = []
 
     def initializePage(self):
         self.parent_wizard.next_button.setDisabled(True)
         self.sliders = []
         self.spin_boxes = []
+        self.names = list(self.collection())
+        self.rows = {name: i for i, name in enumerate(self.names)}
 
         # FIXME: backing too much the returning breaks this
         # Seems to remember values, but visually breaks
-        for i, name in enumerate(self.collection()):
+        for i, name in enumerate(self.names):
             self.grid.addWidget(QLabel(str(name)), i, 0)
 
             spin_box = QSpinBox()
@@ -371,8 +383,8 @@ class AbstractSliderPage(EnableNextOnBackMixin, QWizardPage):
 
         self.fix_tab_order()
 
-        for idx, criterion in enumerate(self.collection()):
-            value = self.parent_wizard.main_parent.matrix.df.loc['Weight', criterion]
+        for idx, criterion in enumerate(self.names):
+            value = self.parent_wizard.main_parent.matrix.weight(criterion)
             if str(value) != 'nan':
                 self.spin_boxes[idx].setValue(value)
 
@@ -397,6 +409,14 @@ class AbstractSliderPage(EnableNextOnBackMixin, QWizardPage):
     def matrix_action(self, index, value):
         raise NotImplementedError
 
+    def refresh(self, changes):
+        for criterion in changes['weight']:
+            if (index := self.rows.get(criterion)) is not None and index < len(self.spin_boxes):
+                set_quietly(
+                    self.parent_wizard.main_parent.matrix.weight(criterion),
+                    self.spin_boxes[index], self.sliders[index],
+                )
+
 
 class WeightsPage(AbstractSliderPage):
     def __init__(self, parent):
@@ -409,10 +429,9 @@ class WeightsPage(AbstractSliderPage):
         # Rate their relative importance
 
     def matrix_action(self, index, value):
-        self.parent_wizard.main_parent.matrix.df.iloc[0, index] = value
-        self.parent_wizard.main_parent.matrix_widget.setItem(
-            0, index, QTableWidgetItem(str(value))
-        )
+        # Through the main window, so that it can be undone
+        main_parent = self.parent_wizard.main_parent
+        main_parent.edit_cell(0, main_parent.matrix.criterion_position(self.names[index]), value)
 
     def nextId(self):
         if self.field('basic'):
@@ -427,12 +446,8 @@ class ContinuousCriteriaWeightsPage(AbstractSliderPage):
         self.setTitle('Continuous criteria weights')
 
     def matrix_action(self, index, value):
-        criterion = self.parent_wizard.main_parent.matrix.continuous_criteria[index]
-        self.parent_wizard.main_parent.matrix.df.loc['Weight', criterion] = value
-        col = index + len(list(self.parent_wizard.main_parent.matrix.criteria))
-        self.parent_wizard.main_parent.matrix_widget.setItem(
-            0, col, QTableWidgetItem(str(value))
-        )
+        main_parent = self.parent_wizard.main_parent
+        main_parent.edit_cell(0, main_parent.matrix.criterion_position(self.names[index]), value)
 
 
 class RatingPage(EnableNextOnBackMixin, QWizardPage):
@@ -444,6 +459,8 @@ class RatingPage(EnableNextOnBackMixin, QWizardPage):
         self.setLayout(self.grid)
         self.spin_boxes: dict[str, list[QSpinBox]] = {}
         self.sliders: dict[str, list[QSlider]] = {}
+        # Criterion -> its row in each choice's box
+        self.rows: 'dict[str, int]' = {}
 
     def initializePage(self):
         self.parent_wizard.next_button.setDisabled(True)
@@ -460,14 +477,16 @@ class RatingPage(EnableNextOnBackMixin, QWizardPage):
         #        |-...
         # TODO: consider extracting out common code with
         # AbstractSliderPage
-        for choice in self.parent_wizard.main_parent.matrix.df.index[1:]:
+        criteria = self.parent_wizard.main_parent.matrix.criteria
+        self.rows = {criterion: row for row, criterion in enumerate(criteria)}
+        for choice in self.parent_wizard.main_parent.matrix.choices:
             groupbox = QGroupBox(choice)
             vertical_layout = QVBoxLayout(groupbox)
             self.grid.addWidget(groupbox)
             self.spin_boxes[choice] = []
             self.sliders[choice] = []
 
-            for row, criterion in enumerate(self.parent_wizard.main_parent.matrix.criteria):
+            for row, criterion in enumerate(criteria):
                 rating_spin_box = QSpinBox()
                 rating_spin_box.setRange(0, 10)
                 self.spin_boxes[choice].append(rating_spin_box)
@@ -503,12 +522,21 @@ class RatingPage(EnableNextOnBackMixin, QWizardPage):
         self.parent_wizard.next_button.setEnabled(True)
 
     def value_changed(self, choice, criterion, value):
-        self.parent_wizard.main_parent.matrix.rate_choices({choice: {criterion: value}})
+        matrix = self.parent_wizard.main_parent.matrix
+        # Table rows start with the weights
+        self.parent_wizard.main_parent.edit_cell(
+            matrix.choice_position(choice) + 1, matrix.criterion_position(criterion), value
+        )
         self.parent_wizard.next_button.setEnabled(True)
-        item = QTableWidgetItem(str(value))
-        row = self.parent_wizard.main_parent.matrix.df.index.get_loc(choice)
-        col = self.parent_wizard.main_parent.matrix.df.columns.get_loc(criterion)
-        self.parent_wizard.main_parent.matrix_widget.setItem(row, col, item)
+
+    def refresh(self, changes):
+        matrix = self.parent_wizard.main_parent.matrix
+        for choice, criterion in changes['rating']:
+            if choice in self.spin_boxes and (row := self.rows.get(criterion)) is not None:
+                rating = matrix.ratings[
+                    matrix.choice_position(choice), matrix.criterion_position(criterion)
+                ]
+                set_quietly(rating, self.spin_boxes[choice][row], self.sliders[choice][row])
 
 
 class ValueScorePage(EnableNextOnBackMixin, AbstractValueScoreLayout, QWizardPage):
@@ -528,15 +556,25 @@ class ValueScorePage(EnableNextOnBackMixin, AbstractValueScoreLayout, QWizardPag
         if self.has_score:
             self.parent_wizard.next_button.setEnabled(True)
         super().value_changed(criterion, index, value)
-        (self.parent_wizard.main_parent
-            .cc_tab_page.value_spin_boxes[criterion][index].setValue(value))
 
     def score_changed(self, criterion, index, score):
         if self.has_value:
             self.parent_wizard.next_button.setEnabled(True)
         super().score_changed(criterion, index, score)
-        (self.parent_wizard.main_parent
-            .cc_tab_page.score_spin_boxes[criterion][index].setValue(score))
+
+    def update_matrix(self, value, score, criterion, index):
+        self.parent_wizard.main_parent.record_pair_edit(criterion, index, (value, score))
+        super().update_matrix(value, score, criterion, index)
+
+    def delete(self, criterion, idx):
+        self.parent_wizard.main_parent.record_pair_delete(criterion, idx)
+        super().delete(criterion, idx)
+
+    def refresh(self, changes):
+        for criterion, index in changes['breakpoint']:
+            self.show_pair(criterion, index)
+        for criterion in changes['pairs']:
+            self.show_pairs(criterion)
 
     def nextId(self):
         # If the only criteria that exist is continuous, skip the ratings page
@@ -559,19 +597,30 @@ class DataPage(EnableNextOnBackMixin, AbstractDataTab, QWizardPage):
         self.matrix = self.parent_wizard.main_parent.matrix
 
     def initializePage(self):
-        for choice in self.matrix.df.index[1:]:
+        for choice in self.matrix.choices:
             # Every choice gets a groupbox
             groupbox = QGroupBox(choice)
             QVBoxLayout(groupbox)
             for criterion in self.matrix.continuous_criteria:
+                if criterion in self.matrix.derived:
+                    continue
                 inner_grid = QHBoxLayout()
                 self.add_row(inner_grid, choice, criterion)
                 groupbox.layout().addLayout(inner_grid)
                 self.grid.addWidget(groupbox)
 
-    def sync(self, choice, criterion, value):
-        (self.parent_wizard.main_parent.data_tab_page
-                .spin_boxes[choice][criterion].setValue(value))
+    def matrix_action(self, choice, criterion_, value_):
+        self.parent_wizard.main_parent.record_data_edit(choice, criterion_, value_)
+        super().matrix_action(choice, criterion_, value_)
+
+    def refresh(self, changes):
+        df = self.matrix.data_df
+        for choice, criterion in changes['data']:
+            if criterion in self.spin_boxes.get(choice, ()):
+                set_quietly(
+                    df.at[choice, criterion],
+                    self.spin_boxes[choice][criterion], self.sliders[choice][criterion],
+                )
 
 
 class ConclusionPage(QWizardPage):
@@ -0,0 +1,67 @@
+import queue
+
+import numpy as np
+from PySide2.QtCore import QThread, Signal
+
+from gui import engines
+
+
+class ComputeWorker(QThread):
+    # (version, percentages of every choice)
+    result_ready = Signal(int, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.commands = queue.Queue()
+        # The worker's own copy of the numeric state; never shared with the GUI
+        self.weights = np.empty(0)
+        self.ratings = np.empty((0, 0))
+        self.engine = engines.WeightedSum()
+        self.percentages = np.empty(0)
+
+    def submit(self, version, command, *args):
+        self.commands.put((version, command, args))
+
+    def stop(self):
+        self.commands.put(None)
+        self.wait()
+
+    def run(self):
+        while (item := self.commands.get()) is not None:
+            version = self.apply(item)
+
+            # Apply everything that queued up in the meantime, then compute once
+            while True:
+                try:
+                    item = self.commands.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    return
+                version = self.apply(item)
+
+            self.result_ready.emit(version, self.percentages.copy())
+
+    def apply(self, item):
+        version, command, args = item
+        getattr(self, command)(*args)
+        return version
+
+    ## Commands
+    def reset(self, weights, ratings, engine=engines.WeightedSum.name):
+        self.weights = np.array(weights, dtype=float)
+        self.ratings = np.array(ratings, dtype=float)
+        self.engine = engines.ENGINES[engine]()
+        self.percentages = self.engine.score(self.weights, self.ratings)
+
+    def rating(self, row, column, value):
+        old = self.ratings[row, column]
+        self.ratings[row, column] = value
+        index, scores = self.engine.rating_changed(self.weights, self.ratings, row, column, old)
+        self.percentages[index] = scores
+
+    def weight(self, column, value):
+        old = self.weights[column]
+        self.weights[column] = value
+        index, scores = self.engine.weight_changed(self.weights, self.ratings, column, old)
+        self.percentages[index] = scores
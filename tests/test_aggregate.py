@@ -0,0 +1,42 @@
+import io
+import json
+
+import numpy as np
+
+from gui import aggregate, jsonstream
+
+
+def document(weights, ratings):
+    matrix = {
+        criterion: {'Weight': weight, **{choice: r[criterion] for choice, r in ratings.items() if criterion in r}}
+        for criterion, weight in weights.items()
+    }
+    text = json.dumps({'matrix': matrix, 'value_score_df': {}, 'data_df': {}})
+    return jsonstream.read_document(lambda: io.StringIO(text))
+
+
+def test_aggregate():
+    first = document({'taste': 1.0, 'price': 1.0}, {'apple': {'taste': 10, 'price': 0}, 'kiwi': {'taste': 5, 'price': 5}})
+    # Different order, an extra choice and a missing criterion
+    second = document({'price': 3.0, 'taste': 1.0}, {'pear': {'price': 4, 'taste': 4}, 'apple': {'price': 10, 'taste': 10}})
+
+    choices, criteria, stack = aggregate.align([first, second])
+    assert choices == ['apple', 'kiwi', 'pear']
+    assert criteria == ['taste', 'price']
+    assert stack.shape == (2, 4, 2)
+    assert np.isnan(stack[1, 2]).all()  # kiwi is not in the second matrix
+
+    result = aggregate.Aggregate(choices, criteria, stack, 'Mean')
+    assert np.array_equal(result.weights, [1.0, 2.0])
+    assert np.array_equal(result.ratings, [[10, 5], [5, 5], [4, 4]])
+
+    result = aggregate.Aggregate(choices, criteria, stack, 'Geometric mean')
+    assert np.allclose(result.weights, [1.0, np.sqrt(3)])
+    assert result.ratings[0, 1] == 0  # A zero rating gives zero
+
+    # apple: 50% in the first matrix, 100% in the second
+    assert np.allclose(result.percentages[:, 0], [50, 100])
+    assert np.isclose(result.spread[0], 25)
+    assert np.isnan(result.percentages[1, 1])
+    assert result.spread[1] == 0
+    assert result.summary().splitlines()[3].startswith('apple: 25.00')
@@ -0,0 +1,45 @@
+import os
+
+import numpy as np
+
+from gui import cache
+from gui.model import ArrayMatrix
+
+
+def make_matrix():
+    m = ArrayMatrix()
+    m.add_choices('apple', 'orange')
+    m.add_criterion('taste', weight=4)
+    m.add_criterion('color', weight=7)
+    m.rate_choices({'apple': {'taste': 3, 'color': 6}})
+    return m
+
+
+def test_matrix_key():
+    m = make_matrix()
+    key = cache.matrix_key(m)
+    assert key == cache.matrix_key(make_matrix())
+
+    m.update_rating('orange', 'taste', 1)
+    assert cache.matrix_key(m) != key
+
+
+def test_result_cache_evicts_least_recently_used(tmp_path):
+    results = cache.ResultCache(tmp_path, max_bytes=10_000)
+    assert results.get('missing') is None
+
+    results.put('a', [10.0, np.nan, 30.0])
+    percentages, ranking = results.get('a')
+    assert np.array_equal(percentages, [10.0, np.nan, 30.0], equal_nan=True)
+    assert list(ranking) == [2, 0, 1]
+
+    size = results.path('a').stat().st_size
+    results.max_bytes = size * 2
+    results.put('b', [1.0])
+    # 'a' is used more recently than 'b', so 'b' goes first
+    os.utime(results.path('b'), (0, 0))
+    results.get('a')
+    results.put('c', [2.0])
+    assert results.get('b') is None
+    assert results.get('a') is not None
+    assert results.get('c') is not None
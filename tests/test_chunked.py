@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from gui import chunked, headless
+
+
+def make_csv(path):
+    df = pd.DataFrame(
+        {'taste': [6, 9, 1, 7, 3], 'price': [5, 1, 2, 10, 8]},
+        index=['apple', 'orange', 'pear', 'kiwi', 'plum'],
+    )
+    df.to_csv(path)
+    return df
+
+
+def test_chunks_match_one_pass(tmp_path):
+    path = tmp_path / 'choices.csv'
+    df = make_csv(path)
+    weights = {'taste': 4.0, 'price': 7.0}
+    breakpoints = {'price': ([0, 10], [10, 0])}  # cheaper is better
+
+    result = chunked.score_file(path, weights, breakpoints, top_k=2, chunksize=2)
+
+    ratings = np.column_stack([df['taste'], 10 - df['price']])
+    expected = (ratings @ [4, 7]) / 110 * 100
+    order = np.argsort(-expected)
+    assert [name for name, _ in result.top] == list(df.index[order[:2]])
+    assert np.allclose([score for _, score in result.top], expected[order[:2]])
+    assert result.count == 5
+    assert np.isclose(result.mean, expected.mean())
+    assert np.isclose(result.std, expected.std())
+    assert result.min == expected.min()
+    assert result.max == expected.max()
+
+
+def test_headless_score_large(tmp_path, capsys):
+    path = tmp_path / 'choices.csv'
+    make_csv(path)
+    document = tmp_path / 'matrix.json'
+    document.write_text(
+        '{"matrix": {"taste": {"Weight": 1.0}, "Percentage": {"Weight": null}},'
+        ' "value_score_df": {}, "data_df": {}}'
+    )
+
+    headless.main(['score-large', str(document), str(path), '--top', '1'])
+    out = capsys.readouterr().out
+    assert '5 choices scored' in out
+    assert '1. orange: 90.00%' in out
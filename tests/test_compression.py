@@ -0,0 +1,30 @@
+import json
+
+import numpy as np
+import pytest
+
+from gui import compression, jsonstream
+
+
+@pytest.mark.parametrize('name', list(compression.CODECS))
+def test_round_trip(tmp_path, name):
+    codec = compression.CODECS[name]
+    if not codec.available:
+        pytest.skip(f'{name} is not installed')
+    data = {
+        'matrix': {'taste': {'Weight': 4.0, 'apple': 6.0}, 'price': {'Weight': 7.0, 'apple': float('nan')}},
+        'value_score_df': {},
+        'data_df': {},
+    }
+    path = tmp_path / ('matrix' + codec.suffix)
+    with compression.open_text(path, 'w') as f:
+        f.writelines(json.JSONEncoder(indent=2).iterencode(data))
+
+    assert compression.codec_for_path(path) is codec
+    # Detected from the content even when renamed
+    renamed = path.rename(tmp_path / 'matrix')
+    assert compression.detect(renamed) is codec
+
+    document = jsonstream.read_document(lambda: compression.open_text(renamed, 'r'))
+    assert document.criteria == ['taste', 'price']
+    assert np.array_equal(document.ratings, [[6.0, np.nan]], equal_nan=True)
@@ -0,0 +1,79 @@
+import io
+import json
+
+import numpy as np
+import pytest
+
+from gui import constraints, jsonstream
+from gui.model import ArrayMatrix
+
+
+def make_matrix():
+    m = ArrayMatrix()
+    m.add_choices('apple', 'orange', 'pear')
+    m.add_criterion('taste', weight=4)
+    m.rate_choices({'apple': {'taste': 6}, 'orange': {'taste': 9}, 'pear': {'taste': 2}})
+    m.add_continuous_criterion('price', weight=7)
+    for choice, price in (('apple', 5), ('orange', 12), ('pear', 3)):
+        m.add_data(choice, {'price': price})
+    return m
+
+
+def test_parse():
+    assert constraints.parse('>= 3') == {'min': 3}
+    assert constraints.parse('<=500') == {'max': 500}
+    assert constraints.parse('3..500') == {'min': 3, 'max': 500}
+    assert constraints.describe({'min': 3, 'max': 500}) == '3..500'
+    for text in ('3', '> 3', '5..3'):
+        with pytest.raises(ValueError):
+            constraints.parse(text)
+
+
+def test_continuous_criteria_are_checked_on_their_data():
+    m = make_matrix()
+    m.set_constraint('price', {'max': 10})
+    assert list(m.constraints.passing(m)) == [True, False, True]
+    m.set_constraint('taste', {'min': 5})
+    assert list(m.constraints.passing(m)) == [True, False, False]
+
+    # One threshold moves: one column re-evaluated, the others kept
+    m.set_constraint('price', {'max': 20})
+    assert list(m.constraints.passing(m)) == [True, True, False]
+    m.set_constraint('taste', {})
+    assert m.constraints.passing(m).all()
+    # Nothing was removed
+    assert m.choices == ['apple', 'orange', 'pear']
+
+
+def test_edits_recheck_one_cell():
+    m = make_matrix()
+    m.set_constraint('price', {'max': 10})
+    m.set_constraint('taste', {'min': 5})
+    m.constraints.passing(m)
+
+    m.add_data('orange', {'price': 8})
+    m.update_rating('pear', 'taste', 7)
+    assert list(m.constraints.passing(m)) == [True, True, True]
+    # A missing value fails nothing
+    m.update_rating('apple', 'taste', np.nan)
+    assert m.constraints.passing(m)[0]
+
+    m.add_choices('plum')
+    m.update_rating('plum', 'taste', 1)
+    assert list(m.constraints.passing(m)) == [True, True, True, False]
+
+
+def test_whole_columns_are_sliced():
+    m = make_matrix()
+    values = m.constraints.values(m, 'taste', m.choices)
+    assert list(values) == [6, 9, 2]
+    assert np.shares_memory(values, m.ratings)
+    assert list(m.constraints.values(m, 'taste', ['pear', 'apple'])) == [2, 6]
+
+
+def test_constraints_are_saved():
+    m = make_matrix()
+    m.set_constraint('price', {'min': 1, 'max': 10})
+    text = json.dumps({'matrix': m.df.to_dict(), 'constraints': m.constraints.bounds})
+    document = jsonstream.read_document(lambda: io.StringIO(text))
+    assert document.constraints() == {'price': {'min': 1, 'max': 10}}
@@ -0,0 +1,46 @@
+import json
+
+from gui import cache
+from gui.documents import DocumentTabs
+
+
+def write_document(path, choices):
+    data = {
+        'matrix': {
+            'taste': {'Weight': 4.0, **{choice: 5.0 for choice in choices}},
+            'price': {'Weight': 7.0, **{choice: 3.0 for choice in choices}},
+        },
+        'value_score_df': {},
+        'data_df': {},
+    }
+    path.write_text(json.dumps(data, indent=2))
+
+
+def test_open_files_in_tabs(qtbot, tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, 'results', cache.ResultCache(tmp_path / 'cache'))
+    documents = DocumentTabs()
+    qtbot.addWidget(documents)
+    first = documents.new_document()
+
+    paths = []
+    for name, choices in (('fruit', ['apple', 'orange']), ('veg', ['leek'])):
+        path = tmp_path / f'{name}.json'
+        write_document(path, choices)
+        paths.append(str(path))
+
+    documents.open_files(paths)
+    qtbot.waitUntil(lambda: not documents.tasks)
+
+    # The empty tab is reused, the second file gets a new one
+    assert documents.count() == 2
+    uis = {documents.tabText(i): documents.uis[documents.widget(i)] for i in range(2)}
+    assert set(uis) == {'fruit.json', 'veg.json'}
+    assert first in uis.values()
+    assert uis['fruit.json'].matrix.choices == ['apple', 'orange']
+    assert uis['veg.json'].matrix.choices == ['leek']
+    assert uis['veg.json'].io.path == paths[1]
+    assert uis['veg.json'].matrix_widget.rowCount() == 2
+
+    documents.close_document(0)
+    documents.close_document(0)
+    assert documents.count() == 1  # There is always one tab
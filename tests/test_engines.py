@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from gui import engines, scoring
+
+
+def random_matrix(rng, choices=50, criteria=6):
+    ratings = rng.integers(0, 11, size=(choices, criteria)).astype(float)
+    ratings[rng.random(ratings.shape) < 0.1] = np.nan
+    weights = rng.integers(1, 10, size=criteria).astype(float)
+    return weights, ratings
+
+
+@pytest.mark.parametrize('name', list(engines.ENGINES))
+def test_incremental_matches_full(name):
+    rng = np.random.default_rng(0)
+    weights, ratings = random_matrix(rng)
+    engine = engines.ENGINES[name]()
+    scores = engine.score(weights, ratings)
+
+    for _ in range(200):
+        if rng.random() < 0.8:
+            row, column = rng.integers(len(ratings)), rng.integers(ratings.shape[1])
+            old = ratings[row, column]
+            ratings[row, column] = rng.choice([np.nan, *range(11)])
+            index, values = engine.rating_changed(weights, ratings, row, column, old)
+        else:
+            column = rng.integers(len(weights))
+            old = weights[column]
+            weights[column] = rng.integers(1, 10)
+            index, values = engine.weight_changed(weights, ratings, column, old)
+        scores[index] = values
+
+    expected = engines.ENGINES[name]().score(weights, ratings)
+    assert np.allclose(scores, expected, equal_nan=True)
+
+
+def test_weighted_sum_is_the_percentage():
+    rng = np.random.default_rng(1)
+    weights, ratings = random_matrix(rng)
+    assert np.array_equal(
+        engines.WeightedSum().score(weights, ratings),
+        scoring.percentages(weights, ratings),
+        equal_nan=True,
+    )
+
+
+def test_known_values():
+    weights = np.array([1.0, 1.0])
+    ratings = np.array([[10.0, 10.0], [5.0, 0.0], [0.0, 0.0]])
+
+    assert np.allclose(engines.WeightedProduct().score(weights, ratings), [100, 0, 0])
+    # Best everywhere and worst everywhere
+    topsis = engines.Topsis().score(weights, ratings)
+    assert np.allclose(topsis[[0, 2]], [100, 0])
+    ahp = engines.Ahp().score(weights, ratings)
+    assert np.isclose(ahp.sum(), 100)
+    assert np.allclose(ahp, [(10 / 15 + 1) / 2 * 100, 5 / 15 / 2 * 100, 0])
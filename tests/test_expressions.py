@@ -0,0 +1,74 @@
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from gui import jsonstream
+from gui.expressions import DerivedCriteria, Expression
+from gui.model import ArrayMatrix
+
+
+def make_matrix():
+    m = ArrayMatrix()
+    m.add_choices('apple', 'orange')
+    m.add_criterion('taste', weight=4)
+    m.add_data('apple', {'price': 6, 'units': 3})
+    m.add_data('orange', {'price': 8, 'units': 2})
+    m.add_continuous_criterion('cost', weight=5)
+    m.criterion_value_to_score('cost', {0: 10, 10: 0})
+    return m
+
+
+def test_expression_is_vectorized():
+    e = Expression('`unit price` * units / max(weight, 1) - 2 ** 2')
+    assert e.inputs == ['unit price', 'units', 'weight']
+    frame = pd.DataFrame({'unit price': [1.0, 2.0], 'units': [3.0, 4.0], 'weight': [0.0, 8.0]})
+    assert np.array_equal(e.evaluate(frame), [-1.0, -3.0])
+    # Missing columns read as NaN
+    assert np.isnan(Expression('missing + 1').evaluate(frame)).all()
+
+
+@pytest.mark.parametrize('text', ['x +', '__import__("os")', 'x.y', '"a"', '3', 'x if y else z', 'f(x)'])
+def test_only_arithmetic_on_data(text):
+    with pytest.raises(ValueError):
+        Expression(text)
+
+
+def test_dependents_come_after_their_inputs():
+    derived = DerivedCriteria({'a': 'x + 1', 'b': 'a * 2', 'c': 'b + x'})
+    assert derived.dependents(['x']) == ['a', 'b', 'c']
+    assert derived.dependents(['b']) == ['c']
+    with pytest.raises(ValueError):
+        derived.define('x', 'c + 1')
+    assert 'x' not in derived
+
+
+def test_derived_criterion_is_scored_like_data():
+    m = make_matrix()
+    m.define_criterion('cost', 'price / units')
+    assert list(m.data_df['cost']) == [2, 4]
+    assert list(m.ratings[:, 1]) == [8, 6]
+
+    # Only the edited choice is computed again
+    heard = []
+    m.observers.append(lambda kind, key: heard.append((kind, key)))
+    m.add_data('orange', {'units': 8})
+    assert m.data_df.at['orange', 'cost'] == 1
+    assert list(m.ratings[:, 1]) == [8, 9]
+    assert ('data', ('orange', 'cost')) in heard
+    assert ('data', ('apple', 'cost')) not in heard
+
+
+def test_derived_criteria_are_saved():
+    m = make_matrix()
+    m.define_criterion('cost', 'price / units')
+    text = json.dumps({
+        'matrix': m.df.to_dict(),
+        'data_df': m.data_df.to_dict(orient='index'),
+        'derived': m.derived.texts,
+    })
+    document = jsonstream.read_document(lambda: io.StringIO(text))
+    assert document.derived() == {'cost': 'price / units'}
+    assert ArrayMatrix.from_document(document).derived.texts == {'cost': 'price / units'}
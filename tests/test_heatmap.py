@@ -0,0 +1,50 @@
+import numpy as np
+from PySide2.QtCore import QPoint, Qt
+from PySide2.QtWidgets import QMainWindow
+
+from gui import heatmap, main
+
+
+def test_only_changed_tiles_are_dirty():
+    ratings = np.full((200, 70), 5.0)
+    ratings[0, 0] = np.nan
+    percentages = np.full(200, 50.0)
+    image = heatmap.HeatmapImage()
+    assert len(image.build(ratings, percentages)) == 4 * 2
+    # Rows padded to 4 bytes, the Percentage column last
+    assert image.pixels.shape == (200, 72)
+    assert image.pixels[0, 0] == heatmap.MISSING
+    assert image.pixels[1, 0] == image.pixels[1, 70] == 127
+
+    ratings[150, 65] = 10
+    assert image.update(ratings, percentages, [(150, 65), (5, 5)]) == [(2, 1)]
+    assert image.pixels[150, 65] == 254
+    percentages[10] = 100
+    assert image.update(ratings, percentages) == [(0, 1)]
+    ratings[:, 2] = 0
+    assert image.update(ratings, percentages, columns=[2]) == [(0, 0), (1, 0), (2, 0), (3, 0)]
+    assert image.update(ratings, percentages) == []
+
+
+def test_click_scrolls_the_table(qtbot):
+    MainWindow = QMainWindow()
+    ui = main.Ui_MainWindow()
+    qtbot.addWidget(MainWindow)
+    ui.setupUi(MainWindow)
+    MainWindow.show()
+    for choice in ('apple', 'orange'):
+        qtbot.keyClicks(ui.lineEdit, choice)
+        qtbot.keyClick(ui.lineEdit, Qt.Key_Enter)
+    qtbot.mouseClick(ui.combo_box, Qt.LeftButton)
+    qtbot.keyClick(ui.combo_box, Qt.Key_Down)
+    qtbot.keyClick(ui.combo_box, Qt.Key_Enter)
+    qtbot.keyClicks(ui.lineEdit, 'taste')
+    qtbot.keyClick(ui.lineEdit, Qt.Key_Enter)
+
+    ui.show_heatmap_dock()
+    view = ui.heatmap_dock.view
+    assert ui.heatmap_dock.image.shape == (2, 2)
+    # Bottom right: orange's percentage
+    qtbot.mouseClick(view, Qt.LeftButton, pos=QPoint(view.width() - 1, view.height() - 1))
+    assert ui.matrix_widget.currentRow() == 2
+    assert ui.matrix_widget.currentColumn() == ui.matrix_widget.columnCount() - 1
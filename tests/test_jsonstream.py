@@ -0,0 +1,101 @@
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from gui import jsonstream
+
+
+def make_document():
+    matrix = pd.DataFrame(
+        {'taste': [4.0, 6.0, 9.0], 'price': [7.0, np.nan, 3.0], 'Percentage': [np.nan, 50.0, 60.0]},
+        index=['Weight', 'apple', 'orange'],
+    )
+    value_score_df = pd.DataFrame({'price': [0.0, 10.0], 'price_score': [10.0, 0.0]})
+    data_df = pd.DataFrame({'price': [5.0, np.nan]}, index=['apple', 'orange'])
+    return {
+        'matrix': matrix.to_dict(),
+        'notes': {'author': 'me', 'tags': ['a', {'b': [1, 2]}]},
+        'value_score_df': value_score_df.to_dict(),
+        'data_df': data_df.to_dict(orient='index'),
+    }
+
+
+def test_read_document():
+    text = json.dumps(make_document(), indent=2)
+    # A tiny chunk size puts tokens across chunk boundaries
+    document = jsonstream.read_document(lambda: io.StringIO(text))
+    small = jsonstream.read_document(lambda: io.StringIO(text), chunk_size=3)
+
+    for doc in (document, small):
+        assert doc.criteria == ['taste', 'price']
+        assert doc.choices == ['apple', 'orange']
+        assert doc.continuous_criteria == ['price']
+        assert np.array_equal(doc.weights, [4.0, 7.0])
+        assert np.array_equal(doc.ratings, [[6.0, np.nan], [9.0, 3.0]], equal_nan=True)
+        assert doc.value_score_frame().equals(
+            pd.DataFrame({'price': [0.0, 10.0], 'price_score': [10.0, 0.0]})
+        )
+        values, scores = doc.breakpoints()['price']
+        assert np.array_equal(values, [0.0, 10.0])
+        assert np.array_equal(scores, [10.0, 0.0])
+        assert np.isnan(doc.data_frame().loc['orange', 'price'])
+
+
+def test_values_across_chunks():
+    text = '{"a\\"b": [NaN, -1.5e3, null, true, 12], "c": {"d": 1e2}}'
+    for chunk_size in (1, 2, 5, 1 << 16):
+        stream = jsonstream.Stream(io.StringIO(text), chunk_size)
+        keys = stream.keys()
+        assert next(keys) == 'a"b'
+        assert np.array_equal(
+            np.array(stream.value(), dtype=float), [np.nan, -1500.0, np.nan, 1.0, 12.0], equal_nan=True
+        )
+        assert next(keys) == 'c'
+        assert stream.value() == {'d': 100.0}
+        assert list(keys) == []
+
+
+def test_invalid_documents():
+    for text in (
+        '{"matrix": {"taste": {"apple": "sweet"}}}',
+        '{"matrix": {"taste": [1]}}',
+        '{"matrix": {"taste": {"apple": 1,}}}',
+        '{"matrix" {}}',
+    ):
+        with pytest.raises(ValueError):
+            jsonstream.read_document(lambda: io.StringIO(text))
+
+
+def test_long_objects_in_pieces(monkeypatch):
+    monkeypatch.setattr(jsonstream, 'PIECE', 64)
+    ratings = {f'choice {i}': float(i % 11) for i in range(300)}
+    data = {
+        'matrix': {'taste': {'Weight': 4.0, **ratings}, 'price': {'Weight': 7.0, **ratings}},
+        'value_score_df': {},
+        'data_df': {'choice 1': {'price': 5.0}},
+    }
+    # Written with newlines the objects are split into pieces, without
+    # them they are decoded whole
+    for text in (json.dumps(data, indent=2), json.dumps(data)):
+        for chunk_size in (7, 1 << 16):
+            document = jsonstream.read_document(lambda: io.StringIO(text), chunk_size)
+            assert document.choices == list(ratings)
+            assert np.array_equal(document.weights, [4.0, 7.0])
+            assert np.array_equal(document.ratings[:, 1], list(ratings.values()))
+            assert document.data_frame().loc['choice 1', 'price'] == 5.0
+
+
+def test_tables_grow_in_place():
+    text = json.dumps({'data_df': {
+        'a': {'x': 1.0}, 'b': {'y': 2.0}, 'c': {'x': 3.0, 'z': 4.0}, 'd': {'w': 5.0},
+    }})
+    frame = jsonstream.read_document(lambda: io.StringIO(text)).data_frame()
+    expected = pd.DataFrame(
+        [[1.0, np.nan, np.nan, np.nan], [np.nan, 2.0, np.nan, np.nan],
+         [3.0, np.nan, 4.0, np.nan], [np.nan, np.nan, np.nan, 5.0]],
+        index=list('abcd'), columns=list('xyzw'),
+    )
+    assert frame.equals(expected)
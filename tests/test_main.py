@@ -2,7 +2,8 @@ from unittest.mock import Mock
 from PySide2.QtCore import Qt
 from PySide2.QtWidgets import (
     QMainWindow,
-    QTableWidgetItem
+    QTableWidgetItem,
+    QTableWidgetSelectionRange,
 )
 
 from matrix import Matrix
@@ -181,3 +182,252 @@ def test_add_continuous_criteria(qtbot):
     qtbot.mouseClick(ui.criterion_button, Qt.LeftButton)  # Button works as well
     assert 'size' in ui.matrix.continuous_criteria
 
+
+
+def test_undo_redo(qtbot):
+    MainWindow = QMainWindow()
+    ui = main.Ui_MainWindow()
+    qtbot.addWidget(MainWindow)
+    ui.setupUi(MainWindow)
+    MainWindow.show()
+
+    # Setup
+    qtbot.keyClicks(ui.lineEdit, 'apple')
+    qtbot.mouseClick(ui.pushButton, Qt.LeftButton)
+
+    qtbot.mouseClick(ui.combo_box, Qt.LeftButton)
+    qtbot.keyClick(ui.combo_box, Qt.Key_Down)
+    qtbot.keyClick(ui.combo_box, Qt.Key_Enter)
+
+    qtbot.keyClicks(ui.lineEdit, 'taste')
+    qtbot.mouseClick(ui.pushButton, Qt.LeftButton)
+
+    ui.matrix_widget.setItem(0, 0, QTableWidgetItem('4'))
+    ui.matrix_widget.setItem(1, 0, QTableWidgetItem('6'))
+    ui.matrix_widget.setItem(1, 0, QTableWidgetItem('9'))
+    assert ui.matrix_widget.item(1, 1).text() == '90.0%'
+
+    # Tests
+    ui.undo()
+    assert ui.matrix.df.loc['apple', 'taste'] == 6
+    assert ui.matrix_widget.item(1, 0).text() == '6'
+    assert ui.matrix_widget.item(1, 1).text() == '60.0%'
+
+    ui.redo()
+    assert ui.matrix.df.loc['apple', 'taste'] == 9
+    assert ui.matrix_widget.item(1, 1).text() == '90.0%'
+
+    # Undo everything: both ratings, the weight, the column and the row
+    for _ in range(5):
+        ui.undo()
+    assert ui.matrix_widget.rowCount() == 1
+    assert ui.matrix_widget.columnCount() == 1
+    assert 'apple' not in ui.matrix.df.index
+    assert 'taste' not in ui.matrix.df.columns
+
+    ui.redo()
+    assert ui.matrix_widget.verticalHeaderItem(1).text() == 'apple'
+    assert 'apple' in ui.matrix.df.index
+
+
+def test_value_score_rows_are_reused(qtbot):
+    MainWindow = QMainWindow()
+    ui = main.Ui_MainWindow()
+    qtbot.addWidget(MainWindow)
+    ui.setupUi(MainWindow)
+    ui.line_edit_cc_tab.setText('price')
+    ui.add_continuous_criteria()
+    page = ui.cc_tab_page
+    page.add_row('price')
+    for index, (value, score) in enumerate([(1, 10), (5, 5), (10, 1)]):
+        page.value_spin_boxes['price'][index].setValue(value)
+        page.score_spin_boxes['price'][index].setValue(score)
+
+    second = page.editors['price'][1]
+    page.delete('price', 1)
+    # The last pair moved up a row
+    df = ui.matrix.value_score_df
+    assert list(df['price'][:2]) == [1, 10]
+    assert list(df['price_score'][:2]) == [10, 1]
+    assert page.editors['price'][1].index == 1
+    assert page.value_spin_boxes['price'][1].value() == 10
+    assert page.pool.free == [second]
+
+    page.add_row('price')
+    assert page.editors['price'][2] is second
+    assert second.value_spin_box.value() == 0
+    assert page.pool.free == []
+
+
+def test_pareto_front_is_shaded(qtbot):
+    MainWindow = QMainWindow()
+    ui = main.Ui_MainWindow()
+    qtbot.addWidget(MainWindow)
+    ui.setupUi(MainWindow)
+    MainWindow.show()
+
+    for choice in ('apple', 'orange', 'pear'):
+        qtbot.keyClicks(ui.lineEdit, choice)
+        qtbot.keyClick(ui.lineEdit, Qt.Key_Enter)
+    qtbot.mouseClick(ui.combo_box, Qt.LeftButton)
+    qtbot.keyClick(ui.combo_box, Qt.Key_Down)
+    qtbot.keyClick(ui.combo_box, Qt.Key_Enter)
+    for criterion in ('taste', 'color'):
+        qtbot.keyClicks(ui.lineEdit, criterion)
+        qtbot.keyClick(ui.lineEdit, Qt.Key_Enter)
+    for row, ratings in enumerate([(6, 5), (9, 3), (5, 4)], 1):
+        for column, rating in enumerate(ratings):
+            ui.matrix_widget.setItem(row, column, QTableWidgetItem(str(rating)))
+
+    def shaded(row):
+        return ui.matrix_widget.item(row, 0).background().style() != Qt.NoBrush
+
+    ui.toggle_pareto(True)
+    assert [shaded(row) for row in (1, 2, 3)] == [False, False, True]
+
+    # Pear beats apple now; only the rows that changed are shaded again
+    ui.matrix_widget.setItem(3, 0, QTableWidgetItem('7'))
+    ui.matrix_widget.setItem(3, 1, QTableWidgetItem('5'))
+    qtbot.waitUntil(lambda: shaded(1))
+    assert [shaded(row) for row in (1, 2, 3)] == [True, False, False]
+
+    ui.toggle_pareto(False)
+    assert not any(shaded(row) for row in (1, 2, 3))
+
+
+def test_scenario_cells_are_updated_in_place(qtbot):
+    MainWindow = QMainWindow()
+    ui = main.Ui_MainWindow()
+    qtbot.addWidget(MainWindow)
+    ui.setupUi(MainWindow)
+    ui.matrix.add_choices('apple', 'orange', 'pear')
+    ui.matrix.add_criterion('taste', weight=4)
+    ui.matrix.add_criterion('price', weight=7)
+    ui.matrix.rate_choices({
+        'apple': {'taste': 6, 'price': 5},
+        'orange': {'taste': 9, 'price': 3},
+        'pear': {'taste': 2, 'price': 10},
+    })
+    for name in ('current', 'cheap'):
+        ui.line_edit_scenario.setText(name)
+        ui.add_scenario()
+    widget = ui.scenario_widget
+    items = [[widget.item(row, column) for column in range(2)] for row in range(3)]
+    assert items[2][0].text() == '70.91% (#1)'
+
+    # Pear drops to the bottom: its cells and the ranks it passed change,
+    # in the items already there
+    ui.matrix.update_rating('pear', 'price', 0)
+    ui.update_scenario_display()
+    assert [[widget.item(row, column) for column in range(2)] for row in range(3)] == items
+    assert [widget.item(row, 0).text() for row in range(3)] == [
+        '53.64% (#1)', '51.82% (#2)', '7.27% (#3)',
+    ]
+
+
+def test_search_box_jumps_to_matches(qtbot):
+    MainWindow = QMainWindow()
+    ui = main.Ui_MainWindow()
+    qtbot.addWidget(MainWindow)
+    ui.setupUi(MainWindow)
+    MainWindow.show()
+    for choice in ('apple', 'orange', 'pineapple'):
+        qtbot.keyClicks(ui.lineEdit, choice)
+        qtbot.keyClick(ui.lineEdit, Qt.Key_Enter)
+
+    qtbot.keyClicks(ui.search_box, 'apple')
+    assert ui.matches == [('choice', 'apple'), ('choice', 'pineapple')]
+    assert ui.matrix_widget.currentRow() == 1
+    assert ui.matrix_widget.verticalHeaderItem(3).font().bold()
+    assert not ui.matrix_widget.verticalHeaderItem(2).font().bold()
+    qtbot.keyClick(ui.search_box, Qt.Key_Enter)
+    assert ui.matrix_widget.currentRow() == 3
+
+    # Added later, found without indexing everything again
+    ui.lineEdit.setText('apple pie')
+    ui.add_row()
+    qtbot.waitUntil(lambda: ('choice', 'apple pie') in ui.matches)
+
+
+def test_background_scores_follow_data_edits(qtbot, monkeypatch):
+    # Every edit goes through the worker
+    monkeypatch.setattr(main, 'BACKGROUND_CELLS', 0)
+    MainWindow = QMainWindow()
+    ui = main.Ui_MainWindow()
+    qtbot.addWidget(MainWindow)
+    ui.setupUi(MainWindow)
+    for choice in ('apple', 'orange'):
+        ui.lineEdit.setText(choice)
+        ui.add_row()
+    ui.combo_box.setCurrentIndex(1)
+    ui.lineEdit.setText('taste')
+    ui.add_column()
+    ui.line_edit_cc_tab.setText('price')
+    ui.add_continuous_criteria()
+    ui.matrix.criterion_value_to_score('price', {0: 0, 10: 10})
+
+    ui.matrix_widget.setItem(0, 0, QTableWidgetItem('4'))
+    ui.matrix_widget.setItem(1, 0, QTableWidgetItem('5'))
+    qtbot.waitUntil(lambda: ui.matrix_widget.item(1, 2).text() == '50.0%')
+    # Not sent to the worker, which must not score from its old copy
+    ui.data_tab_page.sliders['apple']['price'].setValue(8)
+    ui.matrix_widget.setItem(0, 1, QTableWidgetItem('6'))
+    qtbot.waitUntil(lambda: ui.matrix_widget.item(1, 2).text() == '68.0%')
+    qtbot.wait(50)
+    assert ui.matrix_widget.item(1, 2).text() == '68.0%'
+    assert ui.matrix.percentages[0] == 68
+
+
+def test_undoing_a_row_delete_restores_its_data(qtbot, monkeypatch):
+    MainWindow = QMainWindow()
+    ui = main.Ui_MainWindow()
+    qtbot.addWidget(MainWindow)
+    ui.setupUi(MainWindow)
+    for choice in ('apple', 'orange'):
+        ui.lineEdit.setText(choice)
+        ui.add_row()
+    ui.line_edit_cc_tab.setText('price')
+    ui.add_continuous_criteria()
+    ui.matrix_widget.setItem(0, 0, QTableWidgetItem('5'))
+    ui.matrix.criterion_value_to_score('price', {0: 0, 10: 10})
+    ui.data_tab_page.sliders['apple']['price'].setValue(7)
+    assert ui.matrix.percentages[0] == 70
+
+    # Apple's row, without the confirmation
+    monkeypatch.setattr(
+        ui, 'delete_row_or_column', lambda *args: [QTableWidgetSelectionRange(1, 0, 1, 0)]
+    )
+    ui.delete_row()
+    assert ui.matrix.choices == ['orange']
+    assert 'apple' not in ui.matrix.data_df.index
+    assert 'apple' not in ui.data_tab_page.sliders
+
+    ui.undo()
+    assert ui.matrix.choices == ['apple', 'orange']
+    assert ui.matrix.data_df.at['apple', 'price'] == 7
+    assert ui.matrix.percentages[0] == 70
+    qtbot.waitUntil(lambda: ui.data_tab_page.sliders['apple']['price'].value() == 7)
+    assert ui.matrix_widget.item(1, 1).text() == '70.0%'
+
+
+def test_undone_continuous_criteria_come_back_on_redo(qtbot):
+    MainWindow = QMainWindow()
+    ui = main.Ui_MainWindow()
+    qtbot.addWidget(MainWindow)
+    ui.setupUi(MainWindow)
+    ui.lineEdit.setText('apple')
+    ui.add_row()
+    ui.line_edit_cc_tab.setText('price')
+    ui.add_continuous_criteria()
+    ui.line_edit_cc_tab.setText('double = price * 2')
+    ui.add_continuous_criteria()
+
+    for criterion in ('double', 'price'):
+        ui.undo()
+        assert criterion not in ui.matrix.all_criteria
+    for criterion in ('price', 'double'):
+        ui.redo()
+        assert criterion in ui.matrix.continuous_criteria
+        column = ui.matrix.criterion_position(criterion)
+        assert not ui.matrix_widget.item(1, column).flags() & Qt.ItemIsEditable
+    assert ui.matrix.derived['double'].text == 'price * 2'
@@ -0,0 +1,237 @@
+import numpy as np
+import pytest
+
+from gui.model import ArrayMatrix, NameIndex
+
+
+def make_matrix():
+    m = ArrayMatrix()
+    m.add_choices('apple', 'orange')
+    m.add_criterion('taste', weight=4)
+    m.add_criterion('color', weight=7)
+    return m
+
+
+def test_frame_is_a_view():
+    m = make_matrix()
+    assert list(m.df.index) == ['Weight', 'apple', 'orange']
+    assert list(m.df.columns) == ['taste', 'color']
+
+    m.update_rating('apple', 'taste', 3)
+    m.update_rating('apple', 'color', 6)
+    assert list(m.df.columns) == ['taste', 'color', 'Percentage']
+    assert m.df.loc['apple', 'Percentage'] == 49.09090909090909
+    assert m.df.loc['orange', 'Percentage'] == 0
+
+
+def test_edits_are_array_writes():
+    m = make_matrix()
+    m.set_rating_at(1, 0, 9)
+    assert m.ratings[1, 0] == 9
+    assert m.percentages[1] == 9 * 4 / 110 * 100
+
+    m.set_weight_at(0, 0)
+    assert m.percentages[1] == 0
+    assert m.weight('taste') == 0
+
+
+def test_insert_and_remove_keep_positions():
+    m = make_matrix()
+    for i in range(10):
+        m.add_choices(f'choice {i}')
+    m.update_rating('choice 5', 'color', 2)
+    m.remove_choice(m.choice_position('apple'))
+    assert m.choice_position('choice 5') == 6
+    assert m.ratings[6, 1] == 2
+
+    m.insert_choice(0, 'apple', [1, 2])
+    assert m.choices[:2] == ['apple', 'orange']
+    assert m.choice_position('choice 5') == 7
+    assert list(m.ratings[0]) == [1, 2]
+
+    m.remove_criterion(m.criterion_position('taste'))
+    assert m.all_criteria == ['color']
+    assert m.criterion_position('color') == 0
+    assert m.ratings[7, 0] == 2
+
+    m.insert_criterion(0, 'taste', 4, np.arange(len(m.choices)))
+    assert m.all_criteria == ['taste', 'color']
+    assert m.ratings[7, 1] == 2
+    assert m.ratings[7, 0] == 7
+
+
+def test_load_frame_round_trip():
+    m = make_matrix()
+    m.rate_choices({'apple': {'taste': 6, 'color': 5}, 'orange': {'taste': 9}})
+
+    copy = ArrayMatrix()
+    copy.df = m.df
+    assert copy.choices == m.choices
+    assert copy.all_criteria == m.all_criteria
+    assert np.array_equal(copy.percentages, m.percentages)
+
+
+def test_continuous_criteria_interpolate():
+    m = make_matrix()
+    m.add_continuous_criterion('price', weight=5)
+    assert m.criteria == ['taste', 'color']
+    m.add_data('apple', {'price': 4})
+    m.criterion_value_to_score('price', {0: 10, 10: 0})
+    assert m.ratings[0, 2] == 6
+
+
+def test_name_index():
+    index = NameIndex(['a', 'b', 'c'])
+    index.insert(1, 'x')
+    assert index.names == ['a', 'x', 'b', 'c']
+    assert index.position('c') == 3
+    assert index.remove(0) == 'a'
+    assert index.position('x') == 0
+    assert 'a' not in index
+
+
+def test_names_stay_unique():
+    index = NameIndex(['a', 'b', 'a', 'a (2)', 'a'])
+    assert index.names == ['a', 'b', 'a (2)', 'a (2) (2)', 'a (3)']
+    assert index.position('a (3)') == 4
+    assert index.unique('b') == 'b (2)'
+    assert index.unique('c') == 'c'
+    with pytest.raises(ValueError):
+        index.insert(0, 'b')
+
+    m = ArrayMatrix()
+    m.add_choices('apple', 'apple')
+    assert m.choices == ['apple']
+    for _ in range(3):
+        m.insert_choice(len(m.choices), m.unique_choice('apple'))
+    assert m.choices == ['apple', 'apple (2)', 'apple (3)', 'apple (4)']
+    m.load_arrays(['x', 'x'], ['taste', 'taste'], [1, 2], [[1, 2], [3, 4]])
+    assert m.choices == ['x', 'x (2)']
+    assert m.all_criteria == ['taste', 'taste (2)']
+    assert m.unique_criterion('taste') == 'taste (3)'
+    assert m.ratings[1, 1] == 4
+
+
+def test_continuous_bitmap_follows_columns():
+    m = make_matrix()
+    m.add_continuous_criterion('price')
+    m.add_criterion('size')
+    assert list(m.continuous_mask) == [False, False, True, False]
+    assert m.is_continuous('price')
+
+    m.remove_criterion(m.criterion_position('taste'))
+    assert list(m.continuous_mask) == [False, True, False]
+
+    m.insert_criterion(2, 'weight')
+    assert list(m.continuous_mask) == [False, True, False, False]
+    assert m.criteria == ['color', 'weight', 'size']
+
+    m.remove_criterion(m.criterion_position('price'))
+    assert not m.is_continuous('price')
+    assert m.continuous_criteria == []
+
+
+def test_breakpoint_edit_rescores_one_column():
+    m = make_matrix()
+    m.add_continuous_criterion('price', weight=5)
+    m.add_continuous_criterion('size', weight=2)
+    m.add_data('apple', {'price': 4, 'size': 1})
+    m.add_data('orange', {'price': 8, 'size': 3})
+    m.criterion_value_to_score('price', {0: 10, 10: 0})
+    m.criterion_value_to_score('size', {0: 0, 5: 10})
+    m.rate_choices({'apple': {'taste': 6, 'color': 5}})
+
+    m.set_breakpoint('price', 1, 10, 5)
+    m.rescore_dirty()
+    assert m.ratings[0, 2] == 8
+    assert m.ratings[1, 2] == 6
+
+    expected = ArrayMatrix()
+    expected.df = m.df  # Scored from scratch
+    assert np.allclose(m.percentages, expected.percentages)
+
+
+def test_observers_hear_each_edit():
+    m = make_matrix()
+    m.add_continuous_criterion('price', weight=5)
+    heard = []
+    m.observers.append(lambda kind, key: heard.append((kind, key)))
+
+    m.update_rating('apple', 'taste', 6)
+    m.set_weight_at(1, 3)
+    m.rate_choices({'orange': {'taste': 2}})
+    m.add_data('apple', {'price': 4})
+    m.criterion_value_to_score('price', {0: 10, 10: 0})
+    m.set_breakpoint('price', 1, 10, 5)
+    assert heard == [
+        ('rating', ('apple', 'taste')),
+        ('weight', 'color'),
+        ('rating', ('orange', 'taste')),
+        ('data', ('apple', 'price')),
+        ('column', 'price'),
+        ('breakpoint', ('price', 1)),
+    ]
+
+
+def test_breakpoints_stay_compact():
+    m = make_matrix()
+    m.add_continuous_criterion('price', weight=5)
+    m.add_data('apple', {'price': 4})
+    for index, pair in enumerate([(0, 10), (5, 0), (10, 0)]):
+        m.set_breakpoint('price', index, *pair)
+    m.set_breakpoint('size', 0, 1, np.nan)  # Half entered
+
+    m.remove_breakpoint('price', 1)
+    m.rescore_dirty()
+    assert len(m.breakpoints['price']) == 2
+    assert m.breakpoint('price', 1) == (10, 0)
+    assert m.ratings[0, 2] == 6
+
+    # Saved in the usual wide layout, and read back without holes
+    df = m.value_score_df
+    assert list(df.columns) == ['price', 'price_score', 'size', 'size_score']
+    assert df.to_dict()['price'] == {0: 0.0, 1: 10.0}
+    assert np.isnan(df.loc[1, 'size'])
+    expected = ArrayMatrix()
+    expected.value_score_df = df
+    assert len(expected.breakpoints['size']) == 1
+
+
+def test_pairs_move_on_insert_and_remove():
+    m = make_matrix()
+    m.add_continuous_criterion('price')
+    heard = []
+    m.observers.append(lambda kind, key: heard.append((kind, key)))
+    m.criterion_value_to_score('price', {0: 10, 10: 0})
+    m.remove_breakpoint('price', 0)
+    m.insert_breakpoint('price', 0, 5, 5)
+    assert m.breakpoint('price', 0) == (5, 5)
+    assert m.breakpoint('price', 1) == (10, 0)
+    assert heard == [('pairs', 'price'), ('pairs', 'price')]
+
+
+def test_removed_criterion_can_be_restored():
+    m = make_matrix()
+    m.add_continuous_criterion('price', weight=5)
+    m.add_continuous_criterion('per taste')
+    m.define_criterion('per taste', 'price / 2')
+    m.add_data('apple', {'price': 4})
+    m.criterion_value_to_score('price', {0: 10, 10: 0})
+
+    for criterion in ('price', 'per taste'):
+        position = m.criterion_position(criterion)
+        weight, ratings = m.weights[position], m.ratings[:, position].copy()
+        extras = m.criterion_extras(criterion)
+        m.remove_criterion(position)
+        assert criterion not in m.data_df.columns
+        m.insert_criterion(position, criterion, weight, ratings)
+        m.restore_criterion(criterion, extras)
+
+    assert list(m.continuous_mask) == [False, False, True, True]
+    assert m.data_df.at['apple', 'price'] == 4
+    assert m.data_df.at['apple', 'per taste'] == 2
+    assert 'per taste' in m.derived
+    assert m.breakpoint('price', 1) == (10, 0)
+    m.add_data('apple', {'price': 8})
+    assert m.data_df.at['apple', 'per taste'] == 4
+    assert m.ratings[0, 2] == 2
@@ -0,0 +1,67 @@
+import numpy as np
+
+from gui import pareto
+
+
+def brute_force(ratings):
+    points = pareto.prepare(ratings)
+    return np.array([not pareto.dominates(points, point).any() for point in points])
+
+
+def random_ratings(rng, n, m):
+    # Integer ratings, so there are plenty of ties, and a few missing
+    ratings = rng.integers(0, 11, size=(n, m)).astype(float)
+    ratings[rng.random((n, m)) < 0.05] = np.nan
+    return ratings
+
+
+def test_front_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for m in range(1, 6):
+        for n in (0, 1, 7, 300):
+            ratings = random_ratings(rng, n, m)
+            front = pareto.non_dominated(pareto.prepare(ratings))
+            assert np.array_equal(front, brute_force(ratings)), (n, m)
+
+    # Continuous values too, and blocks smaller than the front
+    ratings = rng.random((500, 4)) * 10
+    points = pareto.prepare(ratings)
+    assert np.array_equal(pareto.blocked(points, block=16), brute_force(ratings))
+
+
+def test_rating_changes_update_the_front():
+    rng = np.random.default_rng(1)
+    for m in (2, 3, 4):
+        ratings = random_ratings(rng, 200, m)
+        front = pareto.ParetoFront(ratings)
+        for _ in range(50):
+            row = rng.integers(len(ratings))
+            before = front.front.copy()
+            ratings[row] = random_ratings(rng, 1, m)[0]
+            changed = front.rating_changed(row, ratings[row])
+            assert np.array_equal(front.front, brute_force(ratings))
+            assert set(changed) == set(np.flatnonzero(front.front != before))
+
+
+def test_three_criteria_sweep():
+    rng = np.random.default_rng(2)
+    ratings = rng.random((2000, 3)) * 10
+    expected = brute_force(ratings)
+    points = pareto.prepare(ratings)
+    assert np.array_equal(pareto.non_dominated(points), expected)
+    # The sweep itself takes integer ranks, sorted
+    ranks = np.stack([np.unique(column, return_inverse=True)[1] for column in points.T], axis=1)
+    order = np.lexsort(ranks.T[::-1])
+    assert np.array_equal(pareto.skyline_3d(ranks[order], block=5), expected[order])
+
+
+def test_continuous_rating_changes():
+    rng = np.random.default_rng(3)
+    ratings = rng.random((300, 5)) * 10
+    front = pareto.ParetoFront(ratings)
+    for _ in range(50):
+        row = rng.integers(len(ratings))
+        column = rng.integers(5)
+        ratings[row, column] = rng.choice([0, 10, rng.random() * 10])
+        front.rating_changed(row, ratings[row])
+        assert np.array_equal(front.front, brute_force(ratings))
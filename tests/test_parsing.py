@@ -0,0 +1,51 @@
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+import json
+
+import numpy as np
+import pytest
+
+from gui import parsing
+
+
+def test_read_all_in_order(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f'matrix {i}.json'
+        path.write_text(json.dumps({
+            'matrix': {'taste': {'Weight': 4.0, 'apple': float(i)}},
+            'value_score_df': {},
+            'data_df': {},
+        }))
+        paths.append(str(path))
+
+    pool = parsing.Parsers(workers=2)
+    try:
+        documents = pool.read_all(paths)
+    finally:
+        pool.shutdown()
+    assert [document.ratings.tolist() for document in documents] == [[[0.0]], [[1.0]], [[2.0]]]
+    assert np.array_equal(documents[0].weights, [4.0])
+
+
+def test_one_pool_for_many_threads(tmp_path, monkeypatch):
+    started = []
+
+    class Executor:
+        def __init__(self, *args, **kwargs):
+            started.append(self)
+
+        def submit(self, fn, path):
+            return path
+
+        def shutdown(self, cancel_futures):
+            pass
+
+    monkeypatch.setattr(parsing, 'ProcessPoolExecutor', Executor)
+    pool = parsing.Parsers()
+    with ThreadPoolExecutor(8) as threads:
+        assert list(threads.map(pool.submit, range(64))) == list(range(64))
+    assert len(started) == 1
+
+    pool.shutdown()
+    with pytest.raises(CancelledError):
+        pool.submit('late.json')
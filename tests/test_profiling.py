@@ -0,0 +1,35 @@
+import json
+
+from gui import profiling
+
+
+def test_stats_histogram():
+    stats = profiling.Stats()
+    stats.record(0.000_003, 0)  # 3 µs
+    stats.record(0.002, 4)  # 2000 µs
+    info = stats.to_dict()
+    assert info['calls'] == 2
+    assert info['widgets_allocated'] == 4
+    assert info['histogram_us'] == {'<4': 1, '<2048': 1}
+    assert info['max_ms'] == 2.0
+
+
+def test_profiler_export(tmp_path):
+    profiler = profiling.Profiler()
+    profiler.record('Ui_MainWindow.add_row', 0.001, 2)
+    profiler.record('Ui_MainWindow.add_row', 0.003, 2)
+    path = tmp_path / 'timings.json'
+    profiler.export(path)
+
+    with open(path) as f:
+        data = json.load(f)
+    assert data['Ui_MainWindow.add_row']['calls'] == 2
+    assert data['Ui_MainWindow.add_row']['mean_ms'] == 2.0
+
+
+def test_instrument_is_free_when_disabled(monkeypatch):
+    monkeypatch.setattr(profiling, 'ENABLED', False)
+
+    def fn():
+        pass
+    assert profiling.instrument(fn) is fn
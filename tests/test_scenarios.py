@@ -0,0 +1,73 @@
+import io
+import json
+
+import numpy as np
+
+from gui import jsonstream, scenarios
+from gui.model import ArrayMatrix
+
+
+def make_matrix():
+    m = ArrayMatrix()
+    m.add_choices('apple', 'orange', 'pear')
+    m.add_criterion('taste', weight=4)
+    m.add_criterion('price', weight=7)
+    m.rate_choices({
+        'apple': {'taste': 6, 'price': 5},
+        'orange': {'taste': 9, 'price': 3},
+        'pear': {'taste': 2, 'price': 10},
+    })
+    return m
+
+
+def test_scenarios_match_the_weight_row():
+    m = make_matrix()
+    m.scenarios.add('current', dict(zip(m.all_criteria, m.weights)))
+    m.scenarios.add('quality', {'taste': 10, 'price': 1})
+    percentages = m.scenarios.score(m)
+    assert percentages.shape == (3, 2)
+    assert np.allclose(percentages[:, 0], m.percentages)
+
+    # One more column, then one more row, without scoring the rest again
+    m.scenarios.add('cost', {'price': 10})
+    m.update_rating('pear', 'taste', 8)
+    percentages = m.scenarios.score(m)
+    assert np.allclose(percentages[:, 0], m.percentages)
+    assert np.allclose(percentages[:, 2], [50, 30, 100])
+    assert list(scenarios.ranks(percentages)[:, 1]) == [3, 1, 2]
+
+    m.scenarios.remove('quality')
+    m.add_choices('kiwi')
+    assert m.scenarios.names == ['current', 'cost']
+    assert np.allclose(m.scenarios.score(m)[:3, 1], [50, 30, 100])
+
+
+def test_what_was_scored_again():
+    m = make_matrix()
+    m.scenarios.add('current', dict(zip(m.all_criteria, m.weights)))
+    m.scenarios.score(m)
+    assert m.scenarios.rescored is None
+
+    m.scenarios.add('cost', {'price': 10})
+    m.update_rating('pear', 'taste', 8)
+    m.scenarios.score(m)
+    assert m.scenarios.rescored == ([2], range(1, 2))
+    m.scenarios.score(m)
+    assert m.scenarios.rescored == ([], range(2, 2))
+
+    # Columns after a removed one move, so everything is shown again
+    m.scenarios.remove('current')
+    m.scenarios.score(m)
+    assert m.scenarios.rescored is None
+
+
+def test_scenarios_are_saved():
+    text = json.dumps({
+        'matrix': make_matrix().df.to_dict(),
+        'value_score_df': {},
+        'data_df': {},
+        'scenarios': {'cost': {'price': 10.0}, 'quality': {'taste': 10.0, 'price': 1.0}},
+    })
+    document = jsonstream.read_document(lambda: io.StringIO(text))
+    assert document.scenarios() == {'cost': {'price': 10.0}, 'quality': {'taste': 10.0, 'price': 1.0}}
+    assert ArrayMatrix.from_document(document).scenarios.names == ['cost', 'quality']
@@ -0,0 +1,90 @@
+import random
+
+from gui import search
+from gui.model import ArrayMatrix
+
+
+WORDS = ['apple', 'orange', 'pear', 'plum', 'grape', 'melon', 'kiwi', 'lemon']
+
+
+def brute_force(names, text, limit=100):
+    text = text.casefold()
+    keys = sorted((name.casefold(), kind, name) for kind, name in names)
+    found = [key for key in keys if key[0].startswith(text)][:limit]
+    if len(text) >= search.GRAM:
+        found += [key for key in keys if text in key[0] and key not in found]
+    return [(kind, name) for _, kind, name in found[:limit]]
+
+
+def test_prefixes_then_substrings():
+    index = search.NameSearch([
+        ('choice', 'Apple pie'), ('choice', 'Pineapple'), ('criterion', 'apple count'),
+        ('choice', 'Banana'),
+    ])
+    assert index.search('APP') == [
+        ('criterion', 'apple count'), ('choice', 'Apple pie'), ('choice', 'Pineapple'),
+    ]
+    # Too short for a substring
+    assert index.search('pl') == []
+    assert index.search('') == []
+    assert index.search('apple pie, please') == []
+
+
+def test_matches_a_scan():
+    random.seed(0)
+    names = [
+        ('choice', f'{random.choice(WORDS)} {random.choice(WORDS)} {i}') for i in range(5000)
+    ] + [('criterion', word.title()) for word in WORDS]
+    index = search.NameSearch(names)
+    for text in ('app', 'pear p', 'on 12', '99', 'Lemon', 'e', 'zzz', 'ple 4', '1234'):
+        assert index.search(text, limit=50) == brute_force(names, text, limit=50), text
+
+
+def test_add_and_remove():
+    index = search.NameSearch([('choice', f'choice {i}') for i in range(2000)])
+    index.add('choice', 'New apple')
+    index.add('criterion', 'apple size')
+    assert index.search('apple') == [('criterion', 'apple size'), ('choice', 'New apple')]
+    index.remove('choice', 'New apple')
+    assert index.search('apple') == [('criterion', 'apple size')]
+
+    # Enough removals rebuild the index
+    for i in range(2000):
+        index.remove('choice', f'choice {i}')
+    assert len(index.by_id) < 2000
+    assert index.search('ice 1') == []
+    assert index.search('siz') == [('criterion', 'apple size')]
+
+
+
+def test_edits_match_a_scan():
+    random.seed(1)
+    names = [('choice', f'{random.choice(WORDS)} {i}') for i in range(3000)]
+    index = search.NameSearch(names)
+    # Enough edits to merge the added and removed keys into the sorted list
+    for i in range(3000):
+        name = ('choice', f'{random.choice(WORDS)} {random.choice(WORDS)} {i}')
+        index.add(*name)
+        names.append(name)
+        if i % 3 == 0:
+            name = names.pop(random.randrange(len(names)))
+            index.remove(*name)
+        if i % 500 == 0:
+            # Substrings past the limit come in the order the names were added
+            for text in ('pl', 'lemon ', 'on 1', 'e 7'):
+                assert index.search(text, limit=10**6) == brute_force(names, text, limit=10**6)
+    # A removed name added back
+    index.add(*names[0])
+    for text in ('kiwi', 'wi 2', '12'):
+        assert index.search(text, limit=10**6) == brute_force(names, text, limit=10**6), text
+
+def test_matrix_tells_which_names_changed():
+    m = ArrayMatrix()
+    heard = []
+    m.observers.append(lambda kind, key: heard.append((kind, key)))
+    m.add_choices('apple')
+    m.add_criterion('taste')
+    m.remove_choice(0)
+    assert [key for kind, key in heard if kind == 'shape'] == [
+        ('choice', 'apple'), ('criterion', 'taste'), ('choice', 'apple'),
+    ]
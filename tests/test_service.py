@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+from gui import service
+
+
+DOCUMENT = {
+    'matrix': {
+        'taste': {'Weight': 4.0, 'apple': 3.0, 'orange': 9.0},
+        'price': {'Weight': 7.0, 'apple': 6.0, 'orange': 0.0},
+    },
+    'value_score_df': {'price': {'0': 0.0, '1': 10.0}, 'price_score': {'0': 10.0, '1': 0.0}},
+    'data_df': {'apple': {'price': 2.0}, 'orange': {'price': 9.0}},
+}
+
+
+async def request(port, method, target, body=b''):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(
+        f'{method} {target} HTTP/1.1\r\nHost: localhost\r\n'
+        f'Content-Length: {len(body)}\r\n\r\n'.encode() + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(payload)
+
+
+def test_service():
+    async def run():
+        scoring_service = service.ScoringService()
+        server = await service.Server(scoring_service).start('127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        body = json.dumps(DOCUMENT).encode()
+        async with server:
+            status, first = await request(port, 'POST', '/score', body)
+            _, again = await request(port, 'POST', '/score', body)
+            _, batch = await request(port, 'POST', '/batch?engine=TOPSIS', json.dumps([DOCUMENT] * 2).encode())
+            missing, _ = await request(port, 'GET', '/nowhere')
+            bad, error = await request(port, 'POST', '/score?engine=Coin+flip', body)
+        return scoring_service, status, first, again, batch, missing, bad, error
+
+    scoring_service, status, first, again, batch, missing, bad, error = asyncio.run(run())
+    assert status == 200
+    # price is continuous: 2 -> 8, 9 -> 1
+    assert first['ranking'] == [
+        {'choice': 'apple', 'percentage': (3 * 4 + 8 * 7) / 110 * 100},
+        {'choice': 'orange', 'percentage': (9 * 4 + 1 * 7) / 110 * 100},
+    ]
+    assert again == first
+    assert len(batch) == 2 and batch[0] == batch[1]
+    assert batch[0]['hash'] != first['hash']  # Another engine
+    assert scoring_service.hits == 2  # The repeat and the second batch item
+    assert missing == 404
+    assert bad == 400 and 'Coin flip' in error['error']
+
+
+def test_batch_items_score_as_sent():
+    # Tied choices keep the order they were sent in, and an item shares its
+    # hash and cache entry with the same text on /score
+    tied = {
+        'matrix': {
+            'taste': {'Weight': 1.0, 'pear': 5.0, 'apple': 5.0},
+            'price': {'Weight': 1.0, 'pear': 5.0, 'apple': 5.0},
+        },
+    }
+    scoring_service = service.ScoringService()
+    text = json.dumps(tied, indent=1)
+    single = scoring_service.handle('POST', '/score', {}, text)
+    batch = scoring_service.handle('POST', '/batch', {}, f' [ {text} ,{text}]\n')
+    assert [row['choice'] for row in single['ranking']] == ['pear', 'apple']
+    assert batch == [single, single]
+    assert scoring_service.handle('GET', '/stats', {}, '') == {'cached': 1, 'hits': 2, 'misses': 1}
+    assert scoring_service.handle('POST', '/batch', {}, '[]') == []
+    for body in ('{}', '[1', '[1 2]', '[1] 2', ''):
+        try:
+            scoring_service.handle('POST', '/batch', {}, body)
+        except service.HTTPError as e:
+            assert e.status == 400, body
+        else:
+            assert False, body
+
+
+def test_bad_bodies():
+    async def send(port, data, eof=False):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(data)
+        if eof:
+            writer.write_eof()
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return int(response.split()[1])
+
+    async def run():
+        server = await service.Server(service.ScoringService()).start('127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return [
+                await send(port, b'POST /score HTTP/1.1\r\nContent-Length: ten\r\n\r\n'),
+                await send(port, b'POST /score HTTP/1.1\r\nContent-Length: -1\r\n\r\n'),
+                await send(port, b'POST /score HTTP/1.1\r\nContent-Length: 100\r\n\r\n{}', eof=True),
+            ]
+
+    assert asyncio.run(run()) == [400, 400, 400]
@@ -0,0 +1,35 @@
+import logging
+import time
+from types import SimpleNamespace
+
+from gui.model import ArrayMatrix
+from gui.watchdog import StallWatchdog, matrix_dimensions
+
+
+def slow_handler():
+    time.sleep(0.3)
+
+
+def test_stall_is_logged_with_stack(qtbot, caplog):
+    watchdog = StallWatchdog(50, lambda: (2, 3))
+    watchdog.start()
+    qtbot.wait(100)
+
+    with caplog.at_level(logging.WARNING, logger='gui.watchdog'):
+        slow_handler()
+        qtbot.wait(100)
+    watchdog.stop()
+
+    stalls = [r.getMessage() for r in caplog.records if 'stalled' in r.getMessage()]
+    assert len(stalls) == 1
+    assert '2 choices x 3 criteria' in stalls[0]
+    assert 'slow_handler' in stalls[0]
+    assert any('resumed' in r.getMessage() for r in caplog.records)
+
+
+def test_dimensions_do_not_build_the_frame():
+    ui = SimpleNamespace(matrix=ArrayMatrix())
+    ui.matrix.add_choices('apple', 'orange')
+    ui.matrix.add_criterion('taste')
+    assert matrix_dimensions(ui) == (2, 1)
+    assert ui.matrix._frame is None
@@ -1,13 +1,13 @@
 from unittest.mock import Mock
 
+import numpy as np
 import pytest
 from PySide2.QtCore import Qt
-from PySide2.QtWidgets import QMainWindow
-
-from matrix import Matrix
+from PySide2.QtWidgets import QMainWindow, QTableWidgetItem
 
 from gui import wizard
 from gui.main import Ui_MainWindow
+from gui.model import ArrayMatrix
 
 
 def abstract_multi_input_page_tester(qtbot, w, text1, text2, side):
@@ -45,7 +45,7 @@ def test_choices_wizard_page(qtbot):
     MainWindow = QMainWindow()
     ui = Ui_MainWindow()
     ui.setupUi(MainWindow)
-    ui.matrix = Matrix()
+    ui.matrix = ArrayMatrix()
     w = wizard.Wizard(ui)
     qtbot.addWidget(w)
     w.show()
@@ -62,7 +62,7 @@ def test_criteria_wizard_page(qtbot):
     MainWindow = QMainWindow()
     ui = Ui_MainWindow()
     ui.setupUi(MainWindow)
-    ui.matrix = Matrix()
+    ui.matrix = ArrayMatrix()
     w = wizard.Wizard(ui)
     qtbot.addWidget(w)
     w.show()
@@ -77,6 +77,65 @@ def test_criteria_wizard_page(qtbot):
     assert w.next_button.isEnabled() is True
 
 
+def test_wizard_renames_taken_names(qtbot):
+    MainWindow = QMainWindow()
+    ui = Ui_MainWindow()
+    ui.setupUi(MainWindow)
+    w = wizard.Wizard(ui)
+    qtbot.addWidget(w)
+    w.show()
+    qtbot.mouseClick(w.next_button, Qt.LeftButton)
+    for _ in range(3):
+        qtbot.keyClicks(w.currentPage().line_edit, 'apple')
+        qtbot.keyClick(w.currentPage().line_edit, Qt.Key_Enter)
+    assert [w.currentPage().list.item(i).text() for i in range(3)] == [
+        'apple', 'apple (2)', 'apple (3)',
+    ]
+    assert ui.matrix.choices == ['apple', 'apple (2)', 'apple (3)']
+    assert ui.matrix_widget.verticalHeaderItem(2).text() == 'apple (2)'
+
+    qtbot.mouseClick(w.next_button, Qt.LeftButton)
+    for _ in range(2):
+        qtbot.keyClicks(w.currentPage().line_edit, 'taste')
+        qtbot.keyClick(w.currentPage().line_edit, Qt.Key_Enter)
+    assert ui.matrix.criteria == ['taste', 'taste (2)']
+    assert ui.matrix_widget.horizontalHeaderItem(1).text() == 'taste (2)'
+
+
+def test_wizard_deletes_can_be_undone(qtbot):
+    MainWindow = QMainWindow()
+    ui = Ui_MainWindow()
+    ui.setupUi(MainWindow)
+    w = wizard.Wizard(ui)
+    qtbot.addWidget(w)
+    w.show()
+    qtbot.mouseClick(w.next_button, Qt.LeftButton)
+    for choice in ('apple', 'orange'):
+        qtbot.keyClicks(w.currentPage().line_edit, choice)
+        qtbot.keyClick(w.currentPage().line_edit, Qt.Key_Enter)
+    w.currentPage().list.setCurrentRow(0)
+    qtbot.mouseClick(w.currentPage().delete_button, Qt.LeftButton)
+    assert ui.matrix.choices == ['orange']
+    assert 'apple' not in ui.data_tab_groupboxes
+
+    qtbot.mouseClick(w.next_button, Qt.LeftButton)
+    for criterion in ('taste', 'color'):
+        qtbot.keyClicks(w.currentPage().line_edit, criterion)
+        qtbot.keyClick(w.currentPage().line_edit, Qt.Key_Enter)
+    w.currentPage().list.setCurrentRow(0)
+    qtbot.mouseClick(w.currentPage().delete_button, Qt.LeftButton)
+    assert ui.matrix.all_criteria == ['color']
+
+    ui.undo()
+    assert ui.matrix.all_criteria == ['taste', 'color']
+    assert ui.matrix_widget.horizontalHeaderItem(0).text() == 'taste'
+    # The two criteria added, then the choice deleted
+    for _ in range(3):
+        ui.undo()
+    assert ui.matrix.choices == ['apple', 'orange']
+    assert ui.matrix_widget.verticalHeaderItem(1).text() == 'apple'
+
+
 def abstract_slider_page_tester(qtbot, w):
     assert len(w.currentPage().sliders) == 2
     assert len(w.currentPage().spin_boxes) == 2
@@ -109,7 +168,7 @@ def test_weights_wizard_page_basic(qtbot):
     MainWindow = QMainWindow()
     ui = Ui_MainWindow()
     ui.setupUi(MainWindow)
-    ui.matrix = Matrix()
+    ui.matrix = ArrayMatrix()
     w = wizard.Wizard(ui)
     qtbot.addWidget(w)
     w.show()
@@ -135,7 +194,7 @@ def test_ratings_basic(qtbot):
     MainWindow = QMainWindow()
     ui = Ui_MainWindow()
     ui.setupUi(MainWindow)
-    ui.matrix = Matrix()
+    ui.matrix = ArrayMatrix()
     w = wizard.Wizard(ui)
     w.page(wizard.Page.Weights).collection = lambda: ['color', 'taste']
     qtbot.addWidget(w)
@@ -209,7 +268,7 @@ def test_welcome_page_advanced(qtbot):
     MainWindow = QMainWindow()
     ui = Ui_MainWindow()
     ui.setupUi(MainWindow)
-    ui.matrix = Matrix()
+    ui.matrix = ArrayMatrix()
     w = wizard.Wizard(ui)
     qtbot.addWidget(w)
     w.show()
@@ -227,7 +286,7 @@ def test_continuous_criteria_none(qtbot):
     MainWindow = QMainWindow()
     ui = Ui_MainWindow()
     ui.setupUi(MainWindow)
-    ui.matrix = Matrix()
+    ui.matrix = ArrayMatrix()
     w = wizard.Wizard(ui)
     w.page(wizard.Page.Weights).collection = lambda: ['color', 'taste']
     qtbot.addWidget(w)
@@ -262,7 +321,7 @@ def test_continuous_criteria_wizard_page(qtbot):
     MainWindow = QMainWindow()
     ui = Ui_MainWindow()
     ui.setupUi(MainWindow)
-    ui.matrix = Matrix()
+    ui.matrix = ArrayMatrix()
     ui.data_grid = Mock()
     w = wizard.Wizard(ui)
     w.page(wizard.Page.Weights).collection = lambda: ['color', 'taste']
@@ -329,7 +388,7 @@ def test_continuous_criteria_weights(qtbot):
     MainWindow = QMainWindow()
     ui = Ui_MainWindow()
     ui.setupUi(MainWindow)
-    ui.matrix = Matrix()
+    ui.matrix = ArrayMatrix()
     ui.data_grid = Mock()
     w = wizard.Wizard(ui)
     w.page(wizard.Page.Weights).collection = lambda: ['color', 'taste']
@@ -370,7 +429,7 @@ def test_value_score_wizard_page(qtbot):
     MainWindow = QMainWindow()
     ui = Ui_MainWindow()
     ui.setupUi(MainWindow)
-    ui.matrix = Matrix()
+    ui.matrix = ArrayMatrix()
     ui.data_grid = Mock()
     w = wizard.Wizard(ui)
     w.page(wizard.Page.Weights).collection = lambda: ['color', 'taste']
@@ -417,11 +476,11 @@ def test_value_score_wizard_page(qtbot):
         assert len(spin_boxes) == number_of_choices
 
     for vertical_layout in w.currentPage().vertical_layouts.values():
-        # number_of_choices * form_layouts + one 'add pair' button
+        # number_of_choices * editors + one 'add pair' button
         assert vertical_layout.count() == number_of_choices + 1
 
         for i in range(vertical_layout.count() - 1):
-            form_layout = vertical_layout.itemAt(i)
+            form_layout = vertical_layout.itemAt(i).widget().layout()
             # Each form has a label and an inner grid
             assert form_layout.count() == 2
 
@@ -464,3 +523,103 @@ def test_value_score_wizard_page(qtbot):
     assert w.main_parent.matrix.value_score_df.loc[0, 'price_score'] == 10
 
     assert w.next_button.isEnabled() is True
+
+
+def test_edits_reach_every_view_once(qtbot):
+    MainWindow = QMainWindow()
+    ui = Ui_MainWindow()
+    ui.setupUi(MainWindow)
+    w = wizard.Wizard(ui)
+    qtbot.addWidget(w)
+    for name in ('apple', 'orange'):
+        ui.lineEdit.setText(name)
+        ui.add_row()
+    for name in ('taste', 'color'):
+        ui.lineEdit.setText(name)
+        ui.add_column()
+    ui.matrix.update_weight('taste', 4)
+    ui.matrix.update_weight('color', 7)
+    page = w.page(wizard.Page.Ratings)
+    page.initializePage()
+    ui.matrix.engine.rows_changed = Mock(wraps=ui.matrix.engine.rows_changed)
+
+    # Wizard to main window
+    page.sliders['apple'][0].setValue(5)
+    qtbot.waitUntil(lambda: ui.matrix_widget.item(1, 0).text() == '5')
+    assert ui.matrix_widget.item(1, 2).text() == '18.18%'
+    assert ui.matrix.engine.rows_changed.call_count == 1
+
+    # Main window to wizard
+    ui.matrix_widget.setItem(2, 1, QTableWidgetItem('3'))
+    qtbot.waitUntil(lambda: page.spin_boxes['orange'][1].value() == 3)
+    assert page.sliders['orange'][1].value() == 3
+    assert ui.matrix.engine.rows_changed.call_count == 2
+
+
+def test_wizard_edits_can_be_undone(qtbot):
+    MainWindow = QMainWindow()
+    ui = Ui_MainWindow()
+    ui.setupUi(MainWindow)
+    w = wizard.Wizard(ui)
+    qtbot.addWidget(w)
+    ui.lineEdit.setText('apple')
+    ui.add_row()
+    ui.line_edit_cc_tab.setText('price')
+    ui.add_continuous_criteria()
+    ui.combo_box.setCurrentIndex(1)
+    ui.lineEdit.setText('taste')
+    ui.add_column()
+
+    weights = w.page(wizard.Page.Weights)
+    weights.initializePage()
+    weights.sliders[0].setValue(6)
+    ratings = w.page(wizard.Page.Ratings)
+    ratings.initializePage()
+    ratings.sliders['apple'][0].setValue(7)
+    data = w.page(wizard.Page.Data)
+    data.initializePage()
+    data.sliders['apple']['price'].setValue(4)
+    assert ui.matrix.weight('taste') == 6
+    assert ui.matrix.weight('price') != 6
+
+    ui.undo()
+    assert np.isnan(ui.matrix.data_df.at['apple', 'price'])
+    ui.undo()
+    assert np.isnan(ui.matrix.ratings[0, 1])
+    ui.undo()
+    assert np.isnan(ui.matrix.weight('taste'))
+    assert ui.matrix_widget.item(0, 1).text() == ''
+    ui.redo()
+    assert ui.matrix.weight('taste') == 6
+
+
+def test_deleted_pairs_leave_every_view(qtbot):
+    MainWindow = QMainWindow()
+    ui = Ui_MainWindow()
+    ui.setupUi(MainWindow)
+    w = wizard.Wizard(ui)
+    qtbot.addWidget(w)
+    ui.line_edit_cc_tab.setText('price')
+    ui.add_continuous_criteria()
+    tab = ui.cc_tab_page
+    tab.add_row('price')
+    for index, (value, score) in enumerate([(1, 10), (5, 5), (10, 1)]):
+        tab.value_spin_boxes['price'][index].setValue(value)
+        tab.score_spin_boxes['price'][index].setValue(score)
+    page = w.page(wizard.Page.ValueScores)
+    page.initializePage()
+    assert [box.value() for box in page.value_spin_boxes['price']] == [1, 5, 10]
+
+    page.delete('price', 1)
+    qtbot.waitUntil(lambda: len(tab.editors['price']) == 2)
+    assert [box.value() for box in tab.value_spin_boxes['price']] == [1, 10]
+    # Edits land on the pair shown
+    tab.score_spin_boxes['price'][1].setValue(2)
+    assert ui.matrix.breakpoint('price', 1) == (10, 2)
+    assert len(ui.matrix.breakpoints['price']) == 2
+
+    ui.undo()
+    ui.undo()
+    qtbot.waitUntil(lambda: len(page.editors['price']) == 3)
+    assert [box.value() for box in tab.value_spin_boxes['price']] == [1, 5, 10]
+    assert [box.value() for box in page.score_spin_boxes['price']] == [10, 5, 1]
@@ -0,0 +1,29 @@
+import numpy as np
+
+from gui import scoring
+from gui.worker import ComputeWorker
+
+
+def test_percentages():
+    weights = np.array([4.0, 7.0])
+    ratings = np.array([[3.0, 6.0], [4.0, np.nan]])
+    result = scoring.percentages(weights, ratings)
+    assert result[0] == 49.09090909090909
+    assert result[1] == 16 / 110 * 100
+
+
+def test_worker_coalesces_queued_edits(qtbot):
+    worker = ComputeWorker()
+    worker.submit(1, 'reset', [4.0, 7.0], [[0.0, 0.0], [0.0, 0.0]])
+    worker.submit(2, 'rating', 0, 0, 3.0)
+    worker.submit(3, 'rating', 0, 1, 6.0)
+    worker.submit(4, 'weight', 1, 7.0)
+
+    with qtbot.waitSignal(worker.result_ready) as blocker:
+        worker.start()
+    worker.stop()
+
+    version, result = blocker.args
+    assert version == 4
+    assert result[0] == 49.09090909090909
+    assert result[1] == 0.0